@@ -0,0 +1,5 @@
+"""Benchmarks for the MeasureIt meter pipeline.
+
+Run them from the repository root with `python -m benchmarks`. See
+`python -m benchmarks --help` for saving a new baseline and the regression threshold.
+"""
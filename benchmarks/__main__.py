@@ -0,0 +1,97 @@
+"""Run the MeasureIt benchmarks and compare them with the saved baseline."""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+import timeit
+import tracemalloc
+from pathlib import Path
+
+from . import bench_memory  # noqa: F401 # pylint: disable=unused-import
+from . import bench_pipeline  # noqa: F401 # pylint: disable=unused-import
+from .common import BENCHMARKS
+from .common import MEMORY_BENCHMARKS
+
+BASELINE_FILE = Path(__file__).parent / "baseline.json"
+DEFAULT_THRESHOLD = 1.5
+MEMORY_SAMPLES = 10_000
+
+
+def run_benchmark(name: str, repeat: int, min_time: float) -> float:
+    """Return the best time per operation in microseconds."""
+    func, operations = BENCHMARKS[name]()
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    number = max(number, int(number * min_time / 0.2))
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return best / number / operations * 1e6
+
+
+def run_memory_benchmark(name: str) -> float:
+    """Return the average number of bytes allocated for one object."""
+    factory = MEMORY_BENCHMARKS[name]
+    factory()  # warm up caches and lazy imports
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    objects = [factory() for _ in range(MEMORY_SAMPLES)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    # the list holding the objects is not part of their size
+    allocated -= sys.getsizeof(objects)
+    return allocated / MEMORY_SAMPLES
+
+
+def main() -> int:
+    """Run the benchmarks, return a non-zero exit code on a regression."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    parser.add_argument("-k", dest="filter", default="", help="only run benchmarks containing this text")
+    parser.add_argument("--save", action="store_true", help="save the results as the new baseline")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"fail when a benchmark is this many times slower than the baseline (default {DEFAULT_THRESHOLD})",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="number of repeats, the best one counts")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum seconds per repeat")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    baseline: dict[str, float] = {}
+    if BASELINE_FILE.exists():
+        baseline = json.loads(BASELINE_FILE.read_text(encoding="utf-8"))
+
+    results: dict[str, float] = {}
+    regressions: list[str] = []
+    runs = [(name, "us/op", run_benchmark, (args.repeat, args.min_time)) for name in BENCHMARKS]
+    runs += [(name, "bytes", run_memory_benchmark, ()) for name in MEMORY_BENCHMARKS]
+    for name, unit, runner, runner_args in runs:
+        if args.filter not in name:
+            continue
+        results[name] = result = runner(name, *runner_args)
+        if (reference := baseline.get(name)) is None:
+            print(f"{name:<40} {result:>12.3f} {unit:<6} (no baseline)")
+            continue
+        ratio = result / reference
+        print(f"{name:<40} {result:>12.3f} {unit:<6} {ratio:>6.2f}x baseline")
+        if ratio > args.threshold:
+            regressions.append(name)
+
+    if args.save:
+        BASELINE_FILE.write_text(
+            json.dumps({**baseline, **results}, indent=2, sort_keys=True) + "\n", encoding="utf-8"
+        )
+        print(f"Saved baseline to {BASELINE_FILE}")
+        return 0
+
+    if regressions:
+        print(f"Regressed more than {args.threshold}x: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
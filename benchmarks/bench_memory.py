@@ -0,0 +1,41 @@
+"""Memory benchmarks, to budget installations with many sensors."""
+from __future__ import annotations
+
+from datetime import datetime
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.measureit.const import PREDEFINED_PERIODS
+from custom_components.measureit.meter import Meter
+from custom_components.measureit.period import Period
+from custom_components.measureit.period import PeriodRegistry
+from custom_components.measureit.reading import ReadingData
+
+from .common import memory_benchmark
+
+TZ = dt_util.get_time_zone("Europe/Amsterdam")
+START = datetime(2022, 1, 3, 10, 30, tzinfo=TZ)
+# Like the sensor platform, meters share the schedules of their period patterns.
+PERIOD_REGISTRY = PeriodRegistry()
+
+
+def _period(pattern: str) -> Period:
+    return Period(pattern, START, PERIOD_REGISTRY.schedule(pattern, TZ))
+
+
+@memory_benchmark("memory.meter.day")
+def meter_day():
+    """Create a meter with a predefined day period."""
+    return Meter("bench", _period(PREDEFINED_PERIODS["day"]))
+
+
+@memory_benchmark("memory.meter.cron")
+def meter_cron():
+    """Create a meter with a custom cron period, its cached boundaries are shared."""
+    return Meter("bench", _period("30 6 * * 1-5"))
+
+
+@memory_benchmark("memory.reading")
+def reading():
+    """Create the reading that is created on every update."""
+    return ReadingData(START, True, True, 1.0)
@@ -0,0 +1,314 @@
+"""Benchmarks of the hot paths in the meter pipeline."""
+from __future__ import annotations
+
+from datetime import datetime
+from datetime import timedelta
+import json
+from itertools import count
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.measureit.const import MeterType
+from custom_components.measureit.const import PREDEFINED_PERIODS
+from custom_components.measureit.const import ROLLING_PERIODS
+from custom_components.measureit.coordinator import MeasureItCoordinator
+from custom_components.measureit.input_filter import InputFilter
+from custom_components.measureit.meter import Meter
+from custom_components.measureit.meter import RollingMeter
+from custom_components.measureit.period import Period
+from custom_components.measureit.period import PeriodSchedule
+from custom_components.measureit.reading import ReadingData
+from custom_components.measureit.replay import replay
+from custom_components.measureit.rolling import RollingWindow
+from custom_components.measureit.sensor import MeasureItMeterStoredData
+from custom_components.measureit.sensor import MeasureItSensor
+from custom_components.measureit.stats import MeterStats
+from custom_components.measureit.time_window import TimeWindow
+from custom_components.measureit.util import create_renderer
+
+from .common import FakeHass
+from .common import benchmark
+
+TZ = dt_util.get_time_zone("Europe/Amsterdam")
+START = datetime(2022, 1, 3, 10, 30, tzinfo=TZ)
+ALL_DAYS = ["0", "1", "2", "3", "4", "5", "6"]
+
+
+class BenchSensor(MeasureItSensor):
+    """Sensor that counts state writes instead of writing to a state machine."""
+
+    writes = 0
+
+    def async_write_ha_state(self) -> None:
+        """Count the write."""
+        self.writes += 1
+
+
+def make_sensor(hass: FakeHass, coordinator: MeasureItCoordinator, name: str) -> BenchSensor:
+    """Create a day sensor like the sensor platform does."""
+    meter = Meter(name, Period(PREDEFINED_PERIODS["day"], START))
+    sensor = BenchSensor(
+        coordinator, meter, name, MeterType.SOURCE, name, create_renderer(hass, None), None
+    )
+    sensor.hass = hass
+    return sensor
+
+
+@benchmark("meter.on_update")
+def bench_meter_on_update():
+    """Meter updates while measuring, within a single period."""
+    meter = Meter("bench", Period(PREDEFINED_PERIODS["day"], START))
+    readings = [
+        ReadingData(START + timedelta(seconds=second), True, True, float(second))
+        for second in range(1000)
+    ]
+
+    def run():
+        for reading in readings:
+            meter.on_update(reading)
+
+    return run, len(readings)
+
+
+@benchmark("meter.on_update.stats")
+def bench_meter_on_update_stats():
+    """Meter updates of a source meter, which keeps statistics of the period."""
+    meter = Meter("bench", Period(PREDEFINED_PERIODS["day"], START))
+    meter.stats = MeterStats()
+    readings = [
+        ReadingData(START + timedelta(seconds=second), True, True, float(second % 7 * second))
+        for second in range(1000)
+    ]
+
+    def run():
+        for reading in readings:
+            meter.on_update(reading)
+
+    return run, len(readings)
+
+
+@benchmark("meter.on_update.rolling")
+def bench_rolling_meter_on_update():
+    """Update a rolling meter over two days, so buckets keep expiring."""
+    window, bucket = ROLLING_PERIODS["last_24h"]
+    meter = RollingMeter(
+        "bench",
+        Period(PREDEFINED_PERIODS["forever"], START),
+        RollingWindow(timedelta(seconds=window), timedelta(seconds=bucket)),
+    )
+    readings = [
+        ReadingData(START + timedelta(seconds=second * 173), True, True, float(second))
+        for second in range(1000)
+    ]
+
+    def run():
+        for reading in readings:
+            meter.on_update(reading)
+
+    return run, len(readings)
+
+
+@benchmark("period.update")
+def bench_period_update():
+    """Period updates within a period, the common case."""
+    period = Period(PREDEFINED_PERIODS["day"], START)
+    moments = [START + timedelta(seconds=second) for second in range(1000)]
+
+    def run():
+        for tznow in moments:
+            period.update(tznow, lambda _: None, 0)
+
+    return run, len(moments)
+
+
+@benchmark("period.rollover.day")
+def bench_period_rollover_day():
+    """Period updates that roll over to the next day every time."""
+    days = count()
+
+    def run():
+        period = Period(PREDEFINED_PERIODS["day"], START)
+        for _ in range(100):
+            period.update(START + timedelta(days=next(days) % 3650 + 1), lambda _: None, 0)
+
+    return run, 100
+
+
+@benchmark("period.rollover.cron")
+def bench_period_rollover_cron():
+    """Period updates of a custom cron pattern that roll over every time."""
+
+    def run():
+        period = Period("30 6 * * 1-5", START)
+        for _ in range(100):
+            period.update(period.end, lambda _: None, 0)
+
+    return run, 100
+
+
+@benchmark("period.rollover.cron.500_shared")
+def bench_period_rollover_cron_shared():
+    """Rollover of 500 periods sharing the schedule of a custom cron pattern."""
+    schedule = PeriodSchedule("30 6 * * 1-5", TZ)
+
+    def run():
+        periods = [Period("30 6 * * 1-5", START, schedule) for _ in range(500)]
+        for period in periods:
+            period.update(period.end, lambda _: None, 0)
+
+    return run, 500
+
+
+@benchmark("time_window.is_active")
+def bench_time_window_is_active():
+    """Time window checks of a window that crosses midnight."""
+    time_window = TimeWindow(["0", "2", "4"], "22:00:00", "04:00:00")
+    moments = [START + timedelta(minutes=7 * step) for step in range(1000)]
+
+    def run():
+        for tznow in moments:
+            time_window.is_active(tznow)
+
+    return run, len(moments)
+
+
+def _bench_fanout(sensor_count: int):
+    hass = FakeHass()
+    hass.states.set("sensor.bench", "0")
+    coordinator = MeasureItCoordinator(
+        hass, "bench", None, TimeWindow(ALL_DAYS, "00:00:00", "00:00:00"), MeterType.SOURCE, "sensor.bench"
+    )
+    for index in range(sensor_count):
+        sensor = make_sensor(hass, coordinator, f"bench_{index}")
+        coordinator.async_add_listener(sensor._handle_coordinator_update, sensor.meter)
+    values = count()
+
+    def run():
+        coordinator._update(float(next(values)))
+
+    return run, 1
+
+
+for _sensor_count in (1, 10, 100, 1000):
+    benchmark(f"coordinator.update.{_sensor_count}_sensors")(
+        lambda sensor_count=_sensor_count: _bench_fanout(sensor_count)
+    )
+
+
+def _bench_source_value(input_filter: InputFilter | None):
+    hass = FakeHass()
+    hass.states.set("sensor.bench", "0")
+    coordinator = MeasureItCoordinator(
+        hass,
+        "bench",
+        None,
+        TimeWindow(ALL_DAYS, "00:00:00", "00:00:00"),
+        MeterType.SOURCE,
+        "sensor.bench",
+        input_filter=input_filter,
+    )
+    for index in range(100):
+        sensor = make_sensor(hass, coordinator, f"bench_{index}")
+        coordinator.async_add_listener(sensor._handle_coordinator_update, sensor.meter)
+    values = count()
+
+    def run():
+        coordinator._async_on_source_value(float(next(values)), None)
+
+    return run, 1
+
+
+benchmark("coordinator.source_value.100_sensors")(lambda: _bench_source_value(None))
+# a jittery source, nearly all readings are held back
+benchmark("coordinator.source_value.100_sensors.filtered")(
+    lambda: _bench_source_value(InputFilter(min_interval=60, median_size=5))
+)
+
+
+def _bench_renderer(value_template: str | None):
+    renderer = create_renderer(FakeHass(), value_template)
+    values = [float(value) for value in range(1000)]
+
+    def run():
+        for value in values:
+            renderer(value)
+
+    return run, len(values)
+
+
+benchmark("renderer.none")(lambda: _bench_renderer(None))
+benchmark("renderer.simple")(lambda: _bench_renderer("{{ (value / 3600) | round(2) }}"))
+benchmark("renderer.jinja")(lambda: _bench_renderer("{{ value | multiply(0.001) | round(2) }}"))
+
+
+@benchmark("stored_data.round_trip")
+def bench_stored_data_round_trip():
+    """Serialize and parse the restore data of a meter."""
+    stored = MeasureItMeterStoredData(
+        "measuring", 12.5, 10.0, 100.0, 0.0, START, START + timedelta(days=1)
+    )
+
+    def run():
+        for _ in range(100):
+            MeasureItMeterStoredData.from_dict(stored.as_dict())
+
+    return run, 100
+
+
+def _bench_restore(as_dict):
+    """Restoring 5,000 sensors at startup from the JSON the restore state store keeps."""
+    hass = FakeHass()
+    coordinator = MeasureItCoordinator(
+        hass, "bench", None, TimeWindow(ALL_DAYS, "00:00:00", "00:00:00"), MeterType.SOURCE, "sensor.bench"
+    )
+    stored = MeasureItMeterStoredData(
+        "measuring", 12.5, 10.0, 100.0, 0.0, START, START + timedelta(days=1)
+    )
+    restored = [json.loads(json.dumps(as_dict(stored))) for _ in range(5000)]
+    sensors = [make_sensor(hass, coordinator, f"sensor_{index}") for index in range(5000)]
+
+    def run():
+        for sensor, data in zip(sensors, restored):
+            sensor.restore_meter(MeasureItMeterStoredData.from_dict(data))
+
+    return run, len(sensors)
+
+
+def _legacy_as_dict(stored: MeasureItMeterStoredData) -> dict:
+    return {
+        "measured_value": stored.measured_value,
+        "start_measured_value": stored.start_measured_value,
+        "prev_measured_value": stored.prev_measured_value,
+        "session_start_reading": stored.session_start_reading,
+        "period_last_reset": stored.period_last_reset.isoformat(),
+        "period_end": stored.period_end.isoformat(),
+        "state": stored.state,
+    }
+
+
+benchmark("startup.restore.5000_sensors")(
+    lambda: _bench_restore(MeasureItMeterStoredData.as_dict)
+)
+benchmark("startup.restore.5000_sensors.legacy")(lambda: _bench_restore(_legacy_as_dict))
+
+
+@benchmark("replay.rows")
+def bench_replay():
+    """Replay of a source configuration with an hour and a day sensor, per row."""
+    options = {
+        "config_name": "bench",
+        "meter_type": "source",
+        "when_days": ALL_DAYS,
+        "when_from": "00:00:00",
+        "when_till": "00:00:00",
+        "sensor": [
+            {"sensor_name": "hour", "cron": PREDEFINED_PERIODS["hour"], "period": "hour"},
+            {"sensor_name": "day", "cron": PREDEFINED_PERIODS["day"], "period": "day"},
+        ],
+    }
+    rows = [(START + timedelta(seconds=10 * row), float(row), True) for row in range(10000)]
+
+    def run():
+        replay(options, rows)
+
+    return run, len(rows)
@@ -0,0 +1,95 @@
+"""Benchmark registry and a lightweight stand-in for Home Assistant."""
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from typing import Any
+
+# A benchmark factory does its setup and returns the function to time, and the
+# number of operations one call of that function performs.
+BenchmarkFactory = Callable[[], tuple[Callable[[], Any], int]]
+BENCHMARKS: dict[str, BenchmarkFactory] = {}
+# A memory benchmark factory creates one object, its size is reported in bytes.
+MemoryBenchmarkFactory = Callable[[], Any]
+MEMORY_BENCHMARKS: dict[str, MemoryBenchmarkFactory] = {}
+
+
+def benchmark(name: str) -> Callable[[BenchmarkFactory], BenchmarkFactory]:
+    """Register a benchmark factory under a name."""
+
+    def register(factory: BenchmarkFactory) -> BenchmarkFactory:
+        BENCHMARKS[name] = factory
+        return factory
+
+    return register
+
+
+def memory_benchmark(name: str) -> Callable[[MemoryBenchmarkFactory], MemoryBenchmarkFactory]:
+    """Register a memory benchmark factory under a name."""
+
+    def register(factory: MemoryBenchmarkFactory) -> MemoryBenchmarkFactory:
+        MEMORY_BENCHMARKS[name] = factory
+        return factory
+
+    return register
+
+
+class FakeState:
+    """State object with only what MeasureIt reads from it."""
+
+    def __init__(self, state: str) -> None:
+        """Initialize the state."""
+        self.state = state
+
+
+class FakeStates:
+    """State machine stand-in backed by a dict."""
+
+    def __init__(self) -> None:
+        """Initialize the states."""
+        self._states: dict[str, FakeState] = {}
+
+    def get(self, entity_id: str) -> FakeState | None:
+        """Return the state of an entity."""
+        return self._states.get(entity_id)
+
+    def set(self, entity_id: str, state: str) -> None:
+        """Set the state of an entity."""
+        self._states[entity_id] = FakeState(state)
+
+
+class FakeHandle:
+    """Handle of a callback that is never run."""
+
+    def cancel(self) -> None:
+        """Cancel the callback."""
+
+
+class FakeLoop:
+    """Event loop stand-in with the monotonic clock, scheduled callbacks are never run."""
+
+    def time(self) -> float:
+        """Return the monotonic time."""
+        return time.monotonic()
+
+    def call_at(self, when: float, callback: Callable[..., Any], *args: Any) -> FakeHandle:
+        """Accept a callback for a point in time."""
+        return FakeHandle()
+
+    def call_later(self, delay: float, callback: Callable[..., Any], *args: Any) -> FakeHandle:
+        """Accept a callback for after a delay."""
+        return FakeHandle()
+
+    def call_soon(self, callback: Callable[..., Any], *args: Any) -> FakeHandle:
+        """Accept a callback for the next iteration."""
+        return FakeHandle()
+
+
+class FakeHass:
+    """Lightweight stand-in for HomeAssistant, so the benchmarks run without an event loop."""
+
+    def __init__(self) -> None:
+        """Initialize the stand-in."""
+        self.data: dict[str, Any] = {}
+        self.states = FakeStates()
+        self.loop = FakeLoop()
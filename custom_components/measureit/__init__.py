@@ -1,12 +1,18 @@
 """MeasureIt integration."""
 import logging
+from datetime import timedelta
+from fnmatch import fnmatchcase
 
 import voluptuous as vol
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_UNIQUE_ID
 from homeassistant.const import Platform
 from homeassistant.const import EVENT_HOMEASSISTANT_STARTED, ATTR_ENTITY_ID
 from homeassistant.core import Config, CoreState, callback
 from homeassistant.core import HomeAssistant
+from homeassistant.core import ServiceCall
+from homeassistant.core import ServiceResponse
+from homeassistant.core import SupportsResponse
 from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.template import Template
 from homeassistant.helpers import config_validation as cv
@@ -14,19 +20,46 @@ from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN
 from homeassistant.util import dt as dt_util
 
 from .const import CONF_CONDITION, CONF_CONFIG_NAME, DOMAIN, SOURCE_ENTITY_ID
+from .const import ATTR_CONFIG_ENTRY_ID
+from .const import ATTR_ENTITY_PATTERN
+from .const import ATTR_PERIOD
+from .const import ATTR_RESET_DATETIME
+from .const import ATTR_START_DATETIME
+from .const import CONF_EVENT_DRIVEN
+from .const import CONF_REFRESH_INTERVAL
 from .const import CONF_METER_TYPE
+from .const import CONF_SENSOR
+from .const import CONF_SENSOR_NAME
 from .const import CONF_SOURCE
 from .const import CONF_TW_DAYS
 from .const import CONF_TW_FROM
 from .const import CONF_TW_TILL
+from .const import CONF_TRACE
 from .const import COORDINATOR
 from .const import DOMAIN_DATA
 from .const import METER_TYPE_SOURCE
+from .const import PREDEFINED_PERIODS
+from .const import ROLLING_PERIODS
+from .backfill import async_backfill
 from .coordinator import MeasureItCoordinator
+from .history import async_get_history_store
+from .input_filter import create_input_filter
+from .meter import RollingMeter
+from .sensor import MeasureItSensor
+from .sensor import async_reset_sensors
 from .time_window import TimeWindow
+from .trace import TraceBuffer
 
 _LOGGER: logging.Logger = logging.getLogger(__name__)
 CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN) # required to pass hassfest validation due to use of async_setup
+# The targets of the services, a sensor must match all given targets.
+TARGETS = (ATTR_ENTITY_ID, ATTR_CONFIG_ENTRY_ID, ATTR_PERIOD, ATTR_ENTITY_PATTERN)
+TARGET_SCHEMA = {
+    vol.Optional(ATTR_ENTITY_ID): cv.entity_ids,
+    vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+    vol.Optional(ATTR_PERIOD): cv.string,
+    vol.Optional(ATTR_ENTITY_PATTERN): cv.string,
+}
 
 async def async_setup(hass: HomeAssistant, config: Config):
     """Set up this integration using YAML is not supported."""
@@ -74,8 +107,20 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         entry.options[CONF_TW_TILL],
     )
 
+    refresh_interval = entry.options.get(CONF_REFRESH_INTERVAL)
     coordinator = MeasureItCoordinator(
-        hass, config_name, condition, time_window, meter_type, source_entity
+        hass,
+        config_name,
+        condition,
+        time_window,
+        meter_type,
+        source_entity,
+        event_driven=entry.options.get(CONF_EVENT_DRIVEN, False),
+        refresh_interval=timedelta(seconds=refresh_interval) if refresh_interval else None,
+        input_filter=create_input_filter(entry.options)
+        if meter_type == METER_TYPE_SOURCE
+        else None,
+        trace=TraceBuffer() if entry.options.get(CONF_TRACE, False) else None,
     )
     hass.data.setdefault(DOMAIN_DATA, {}).setdefault(entry.entry_id, {}).update(
         {
@@ -103,27 +148,141 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
 def _register_services(hass: HomeAssistant, config_name: str):
     """Register services for MeasureIt."""
 
+    @callback
     def reset_sensor(service_call):
         """Reset sensor."""
         _LOGGER.debug("%s # Reset sensor with: %s", config_name, service_call.data)
-        reset_datetime = service_call.data.get("reset_datetime") or dt_util.now()
+        reset_datetime = service_call.data.get(ATTR_RESET_DATETIME) or dt_util.now()
         if not reset_datetime.tzinfo:
             reset_datetime = reset_datetime.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
 
-        for entity_id in service_call.data[ATTR_ENTITY_ID]:
-            hass.data[DOMAIN][SENSOR_DOMAIN].get(entity_id).reset(reset_datetime)
+        async_reset_sensors(_resolve_sensors(hass, service_call.data), reset_datetime)
+
+    @callback
+    def get_history(service_call: ServiceCall) -> ServiceResponse:
+        """Return the closed periods of sensors."""
+        return {
+            sensor.entity_id: sensor.meter.history.as_list()
+            for sensor in _resolve_sensors(hass, service_call.data, "get the history of")
+            if sensor.meter.history is not None
+        }
 
     hass.services.async_register(
         DOMAIN,
         "reset_sensor",
         reset_sensor,
-        vol.Schema(
-            {
-                vol.Required(ATTR_ENTITY_ID): cv.entity_ids,
-                vol.Optional("reset_datetime"): cv.datetime,
-            }
+        vol.All(
+            vol.Schema(
+                {
+                    **TARGET_SCHEMA,
+                    vol.Optional(ATTR_RESET_DATETIME): cv.datetime,
+                }
+            ),
+            cv.has_at_least_one_key(*TARGETS),
+        ),
+    )
+
+    @callback
+    def get_trace(service_call: ServiceCall) -> ServiceResponse:
+        """Return the last readings of the configurations of sensors, with the resulting meter values."""
+        response = {}
+        coordinators = {
+            sensor._coordinator: None
+            for sensor in _resolve_sensors(hass, service_call.data, "get the trace of")
+        }
+        for coordinator in coordinators:
+            if coordinator.trace is None:
+                _LOGGER.warning(
+                    "Cannot get the trace of %s, tracing is not turned on", coordinator.name
+                )
+            else:
+                response[coordinator.name] = coordinator.trace.as_list()
+        return response
+
+    async def backfill(service_call: ServiceCall) -> None:
+        """Seed sensors with the recorded history of their source."""
+        start = service_call.data.get(ATTR_START_DATETIME)
+        if start is not None and not start.tzinfo:
+            start = start.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+        await async_backfill(hass, _resolve_sensors(hass, service_call.data, "backfill"), start)
+
+    hass.services.async_register(
+        DOMAIN,
+        "backfill",
+        backfill,
+        vol.All(
+            vol.Schema({**TARGET_SCHEMA, vol.Optional(ATTR_START_DATETIME): cv.datetime}),
+            cv.has_at_least_one_key(*TARGETS),
         ),
     )
+    hass.services.async_register(
+        DOMAIN,
+        "get_history",
+        get_history,
+        vol.All(vol.Schema(TARGET_SCHEMA), cv.has_at_least_one_key(*TARGETS)),
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        "get_trace",
+        get_trace,
+        vol.All(vol.Schema(TARGET_SCHEMA), cv.has_at_least_one_key(*TARGETS)),
+        supports_response=SupportsResponse.ONLY,
+    )
+
+
+@callback
+def _resolve_sensors(
+    hass: HomeAssistant, data: dict, action: str = "reset"
+) -> list[MeasureItSensor]:
+    """Return the sensors that match all targets of a service call."""
+    # sensors are kept by their configured name, which is not their entity id
+    sensors: dict[str, MeasureItSensor] = {
+        sensor.entity_id: sensor
+        for sensor in hass.data[DOMAIN][SENSOR_DOMAIN].values()
+        if sensor.entity_id is not None
+    }
+    entity_ids = list(sensors)
+
+    if ATTR_ENTITY_ID in data:
+        for entity_id in data[ATTR_ENTITY_ID]:
+            if entity_id not in sensors:
+                _LOGGER.warning(
+                    "Cannot %s %s, it is not a MeasureIt sensor", action, entity_id
+                )
+        entity_ids = [entity_id for entity_id in data[ATTR_ENTITY_ID] if entity_id in sensors]
+    if ATTR_CONFIG_ENTRY_ID in data:
+        entry_data = hass.data.get(DOMAIN_DATA, {}).get(data[ATTR_CONFIG_ENTRY_ID])
+        coordinator = entry_data[COORDINATOR] if entry_data else None
+        entity_ids = [
+            entity_id
+            for entity_id in entity_ids
+            if sensors[entity_id]._coordinator is coordinator
+        ]
+    if ATTR_PERIOD in data:
+        period = data[ATTR_PERIOD]
+        if period in ROLLING_PERIODS:
+            entity_ids = [
+                entity_id
+                for entity_id in entity_ids
+                if isinstance(sensors[entity_id].meter, RollingMeter)
+                and sensors[entity_id].meter.period_name == period
+            ]
+        else:
+            pattern = PREDEFINED_PERIODS.get(period, period)
+            entity_ids = [
+                entity_id
+                for entity_id in entity_ids
+                if not isinstance(sensors[entity_id].meter, RollingMeter)
+                and sensors[entity_id].meter.period_pattern == pattern
+            ]
+    if ATTR_ENTITY_PATTERN in data:
+        entity_ids = [
+            entity_id
+            for entity_id in entity_ids
+            if fnmatchcase(entity_id, data[ATTR_ENTITY_PATTERN])
+        ]
+    return [sensors[entity_id] for entity_id in entity_ids]
 
 
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
@@ -131,6 +290,17 @@ async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     await hass.config_entries.async_reload(entry.entry_id)
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Drop the histories of the sensors of a deleted config entry."""
+    history_store = async_get_history_store(hass)
+    await history_store.async_load()
+    config_name = entry.options[CONF_CONFIG_NAME]
+    for sensor in entry.options[CONF_SENSOR]:
+        history_store.async_remove(
+            sensor.get(CONF_UNIQUE_ID) or f"{config_name}_{sensor[CONF_SENSOR_NAME]}"
+        )
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     coordinator = hass.data[DOMAIN_DATA][entry.entry_id][COORDINATOR]
@@ -0,0 +1,207 @@
+"""Backfill of MeasureIt source meters from the recorder history."""
+from __future__ import annotations
+
+import logging
+from collections.abc import Sequence
+from datetime import datetime
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .const import MeterType
+from .meter import RollingMeter
+from .period import Period
+from .time_window import TimeWindow
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from .coordinator import MeasureItCoordinator
+    from .sensor import MeasureItSensor
+
+_LOGGER: logging.Logger = logging.getLogger(__name__)
+
+
+def window_edges(
+    time_window: TimeWindow, start: datetime, end: datetime
+) -> tuple[bool, list[float]]:
+    """Return whether the time window is active at start, and when it opens or closes until end.
+
+    The time window is evaluated in the time zone of start.
+    """
+    edges = []
+    moment = start
+    while (moment := time_window.next_transition(moment)) is not None and moment <= end:
+        edges.append(moment.timestamp())
+    return time_window.is_active(start), edges
+
+
+def period_totals(
+    timestamps: np.ndarray,
+    values: np.ndarray,
+    active_at_start: bool,
+    edges: Sequence[float],
+    boundaries: Sequence[float],
+    rollovers: Sequence[float] | None = None,
+) -> np.ndarray:
+    """Return the totals of the periods between the boundaries, as the meters would measure them.
+
+    The delta between two readings counts when the time window was active at the
+    first of them, and goes to the period in which the second is read. There is
+    one total per boundary, for the period starting at it. At a rollover, by
+    default the boundaries, and at the edges of the time window the
+    coordinator reads the last value again, so the time window counts as it
+    was at the last of those between two readings.
+    """
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    if len(values) < 2:
+        return np.zeros(len(boundaries))
+    boundaries = np.asarray(boundaries, dtype=np.float64)
+    edges = np.asarray(edges, dtype=np.float64)
+    readings_again = np.union1d(boundaries if rollovers is None else rollovers, edges)
+    previous = np.searchsorted(readings_again, timestamps[1:], side="right") - 1
+    moments = np.maximum(
+        timestamps[:-1],
+        np.where(previous >= 0, readings_again[np.maximum(previous, 0)], -np.inf),
+    )
+    # the number of edges passed tells whether the window flipped
+    flips = np.searchsorted(edges, moments, side="right")
+    active = (flips % 2 == 0) if active_at_start else (flips % 2 == 1)
+    deltas = np.where(active, np.diff(values), 0.0)
+    periods = np.searchsorted(boundaries, timestamps[1:], side="right") - 1
+    counted = periods >= 0
+    return np.bincount(periods[counted], weights=deltas[counted], minlength=len(boundaries))
+
+
+def _read_series(
+    hass: HomeAssistant, entity_id: str, start: datetime, end: datetime
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return the timestamps and numeric values of the recorded states of an entity."""
+    import numpy as np  # pylint: disable=import-outside-toplevel
+    from homeassistant.components.recorder.history import (  # pylint: disable=import-outside-toplevel
+        get_significant_states,
+    )
+
+    states = get_significant_states(
+        hass,
+        start,
+        end,
+        [entity_id],
+        significant_changes_only=False,
+        no_attributes=True,
+    ).get(entity_id, [])
+    timestamps = []
+    values = []
+    for state in states:
+        try:
+            value = float(state.state)
+        except ValueError:
+            continue  # like the coordinator, unknown states keep the last reading
+        timestamps.append(max(state.last_updated, start).timestamp())
+        values.append(value)
+    return np.asarray(timestamps, dtype=np.float64), np.asarray(values, dtype=np.float64)
+
+
+def _backfill_job(
+    hass: HomeAssistant,
+    entity_id: str,
+    time_window: TimeWindow,
+    sensor_boundaries: list[list[datetime]],
+    end: datetime,
+) -> tuple[list[list[float]], float | None]:
+    """Read the history once and calculate the totals of each sensor, runs in the recorder thread pool."""
+    start = min(boundaries[0] for boundaries in sensor_boundaries)
+    timestamps, values = _read_series(hass, entity_id, start, end)
+    active_at_start, edges = window_edges(time_window, start, end)
+    # the rollovers of one sensor update all meters of the coordinator
+    rollovers = sorted(
+        {boundary.timestamp() for boundaries in sensor_boundaries for boundary in boundaries}
+    )
+    totals = [
+        period_totals(
+            timestamps,
+            values,
+            active_at_start,
+            edges,
+            [boundary.timestamp() for boundary in boundaries],
+            rollovers,
+        ).tolist()
+        for boundaries in sensor_boundaries
+    ]
+    return totals, float(values[-1]) if len(values) else None
+
+
+def backfill_boundaries(period: Period, start: datetime | None = None) -> list[datetime]:
+    """Return the start of the previous and current period, or those after start."""
+    boundaries = [period.start]
+    if period.end.year < 9999:
+        boundaries.insert(0, period._schedule.floor(period.start - timedelta(microseconds=1)))
+    if start is None:
+        return boundaries
+    if start >= period.start:
+        return [start]
+    return [max(boundaries[0], start), *boundaries[1:]]
+
+
+async def async_backfill(
+    hass: HomeAssistant, sensors: list[MeasureItSensor], start: datetime | None = None
+) -> None:
+    """Seed the meters of sensors with the recorded history of their source.
+
+    The measured value of the current period and the value of the previous
+    period are calculated from the history, with all readings of the source
+    as one series. With a start, only the history from start on is counted.
+    Only source meters without condition can be backfilled, as a condition
+    template cannot be evaluated over the history.
+    """
+    if "recorder" not in hass.config.components:
+        _LOGGER.warning("Cannot backfill %s sensors, the recorder is not loaded", len(sensors))
+        return
+    from homeassistant.components.recorder import get_instance  # pylint: disable=import-outside-toplevel
+
+    by_coordinator: dict[MeasureItCoordinator, list[MeasureItSensor]] = {}
+    for sensor in sensors:
+        coordinator = sensor._coordinator
+        if coordinator.meter_type != MeterType.SOURCE or isinstance(sensor.meter, RollingMeter):
+            _LOGGER.warning(
+                "%s # Cannot backfill, only source meters with a period can be", sensor.name
+            )
+        elif coordinator.condition is not None:
+            _LOGGER.warning("%s # Cannot backfill a meter with a condition", sensor.name)
+        else:
+            by_coordinator.setdefault(coordinator, []).append(sensor)
+
+    end = dt_util.now()
+    for coordinator, coordinator_sensors in by_coordinator.items():
+        sensor_boundaries = [
+            backfill_boundaries(sensor.meter._period, start) for sensor in coordinator_sensors
+        ]
+        totals, last_value = await get_instance(hass).async_add_executor_job(
+            _backfill_job,
+            hass,
+            coordinator.source_entity,
+            coordinator.time_window,
+            sensor_boundaries,
+            end,
+        )
+        for sensor, boundaries, sensor_totals in zip(
+            coordinator_sensors, sensor_boundaries, totals
+        ):
+            meter = sensor.meter
+            if len(sensor_totals) == 2:
+                meter.prev_measured_value = sensor_totals[0]
+            meter.measured_value = sensor_totals[-1]
+            meter._start_measured_value = sensor_totals[-1]
+            if last_value is not None:
+                meter._session_start_reading = last_value
+            _LOGGER.info(
+                "%s # Backfilled from %s: %s, previous period: %s",
+                sensor.name,
+                boundaries[0],
+                meter.measured_value,
+                meter.prev_measured_value,
+            )
+            sensor.async_write_measured_value()
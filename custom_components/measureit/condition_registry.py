@@ -0,0 +1,92 @@
+"""Shared condition template tracking for MeasureIt."""
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE
+from homeassistant.core import HomeAssistant
+from homeassistant.core import callback
+from homeassistant.helpers.event import TrackTemplate
+from homeassistant.helpers.event import TrackTemplateResult
+from homeassistant.helpers.event import async_track_template_result
+from homeassistant.helpers.template import Template
+
+from .const import CONDITION_REGISTRY
+from .const import DOMAIN
+
+ConditionCallback = Callable[[Any, list[TrackTemplateResult]], None]
+_LOGGER: logging.Logger = logging.getLogger(__name__)
+
+
+class _TrackedCondition:
+    """A condition template that is rendered once for all of its subscribers."""
+
+    def __init__(self) -> None:
+        self.subscribers: dict[CALLBACK_TYPE, ConditionCallback] = {}
+        self.last_updates: list[TrackTemplateResult] | None = None
+        self.info = None
+
+    @callback
+    def async_on_update(self, event: Any, updates: list[TrackTemplateResult]) -> None:
+        self.last_updates = updates
+        for condition_callback in list(self.subscribers.values()):
+            # every subscriber gets its own list, as they may consume it
+            condition_callback(event, list(updates))
+
+
+class ConditionRegistry:
+    """Track each distinct condition template once, keyed by its source."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the registry."""
+        self._hass: HomeAssistant = hass
+        self._conditions: dict[str, _TrackedCondition] = {}
+
+    @callback
+    def async_subscribe(
+        self, condition: Template, condition_callback: ConditionCallback
+    ) -> CALLBACK_TYPE:
+        """Subscribe to the result of a condition and return a function to unsubscribe.
+
+        The callback receives the current result right away.
+        """
+        source = condition.template
+
+        @callback
+        def unsubscribe() -> None:
+            """Remove the subscriber and stop tracking the template when it was the last one."""
+            if (tracked := self._conditions.get(source)) is None:
+                return
+            tracked.subscribers.pop(unsubscribe, None)
+            if not tracked.subscribers:
+                _LOGGER.debug("Stop tracking condition: %s", source)
+                tracked.info.async_remove()
+                del self._conditions[source]
+
+        if (tracked := self._conditions.get(source)) is not None:
+            tracked.subscribers[unsubscribe] = condition_callback
+            if tracked.last_updates is not None:
+                condition_callback(None, list(tracked.last_updates))
+            return unsubscribe
+
+        _LOGGER.debug("Start tracking condition: %s", source)
+        tracked = self._conditions[source] = _TrackedCondition()
+        tracked.subscribers[unsubscribe] = condition_callback
+        tracked.info = async_track_template_result(
+            self._hass,
+            [TrackTemplate(condition, None)],
+            tracked.async_on_update,
+        )
+        tracked.info.async_refresh()
+        return unsubscribe
+
+
+@callback
+def async_get_condition_registry(hass: HomeAssistant) -> ConditionRegistry:
+    """Return the condition registry shared by all MeasureIt coordinators."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (registry := domain_data.get(CONDITION_REGISTRY)) is None:
+        registry = domain_data[CONDITION_REGISTRY] = ConditionRegistry(hass)
+    return registry
@@ -29,26 +29,43 @@ from homeassistant.helpers.schema_config_entry_flow import (
     SchemaFlowFormStep,
     SchemaFlowMenuStep,
     SchemaCommonFlowHandler,
+    SchemaFlowError,
 )
 
 from .const import (
     CONF_CONDITION,
     CONF_CONFIG_NAME,
     CONF_CRON,
+    CONF_EVENT_DRIVEN,
+    CONF_HISTORY_SIZE,
+    CONF_IMPORT_STATISTICS,
     CONF_INDEX,
+    CONF_MEDIAN_SIZE,
     CONF_METER_TYPE,
+    CONF_MIN_DELTA,
+    CONF_MIN_INTERVAL,
     CONF_PERIOD,
     CONF_PERIODS,
+    CONF_REFRESH_INTERVAL,
+    CONF_ROLLOVER_WINDOW,
     CONF_SENSOR_NAME,
     CONF_SOURCE,
+    CONF_STATISTICS,
     CONF_TW_DAYS,
     CONF_TW_FROM,
+    CONF_TRACE,
     CONF_TW_TILL,
+    CONF_WRITE_INTERVAL,
+    DEFAULT_HISTORY_SIZE,
+    DEFAULT_REFRESH_INTERVAL,
+    DEFAULT_ROLLOVER_WINDOW,
+    DEFAULT_WRITE_INTERVAL,
     DOMAIN,
     LOGGER,
     METER_TYPE_SOURCE,
     METER_TYPE_TIME,
     PREDEFINED_PERIODS,
+    ROLLING_PERIODS,
 )
 
 PERIOD_OPTIONS = [
@@ -60,6 +77,9 @@ PERIOD_OPTIONS = [
     selector.SelectOptionDict(value="month", label="month"),
     selector.SelectOptionDict(value="year", label="year"),
     selector.SelectOptionDict(value="forever", label="forever (or service-operated)"),
+    selector.SelectOptionDict(value="last_hour", label="last hour (rolling)"),
+    selector.SelectOptionDict(value="last_24h", label="last 24 hours (rolling)"),
+    selector.SelectOptionDict(value="last_7d", label="last 7 days (rolling)"),
 ]
 
 DAY_OPTIONS = [
@@ -102,7 +122,12 @@ async def validate_sensor_setup(
         sensor[CONF_SENSOR_NAME] = make_unique_name(
             period, [item.get(CONF_SENSOR_NAME) for item in sensors]
         )
-        sensor[CONF_CRON] = PREDEFINED_PERIODS[period]
+        # a rolling period slides along and never resets
+        sensor[CONF_CRON] = (
+            PREDEFINED_PERIODS["forever"]
+            if period in ROLLING_PERIODS
+            else PREDEFINED_PERIODS[period]
+        )
         sensor[CONF_PERIOD] = period
         del sensor[CONF_PERIODS]
         sensors.append(sensor)
@@ -140,6 +165,26 @@ async def validate_when(
     return user_input
 
 
+async def validate_advanced(
+    handler: SchemaCommonFlowHandler, user_input: dict[str, Any]
+) -> dict[str, Any]:
+    """Validate the advanced settings."""
+    settings = {**handler.options, **user_input}
+    # closed periods are imported from the history
+    if settings.get(CONF_IMPORT_STATISTICS) and not settings.get(
+        CONF_HISTORY_SIZE, DEFAULT_HISTORY_SIZE
+    ):
+        raise SchemaFlowError("import_statistics_without_history")
+    return user_input
+
+
+async def get_advanced_schema(handler: SchemaCommonFlowHandler) -> vol.Schema:
+    """Return schema for the advanced settings of the meter type."""
+    if handler.options[CONF_METER_TYPE] == METER_TYPE_SOURCE:
+        return vol.Schema({**ADVANCED_CONFIG, **ADVANCED_SOURCE_CONFIG})
+    return vol.Schema({**ADVANCED_CONFIG, **ADVANCED_TIME_CONFIG})
+
+
 async def get_select_sensor_schema(handler: SchemaCommonFlowHandler) -> vol.Schema:
     """Return schema for selecting a sensor."""
     return vol.Schema(
@@ -274,6 +319,88 @@ WHEN_CONFIG = {
     vol.Required(CONF_TW_TILL): selector.TimeSelector(),
 }
 
+ADVANCED_CONFIG = {
+    vol.Optional(
+        CONF_WRITE_INTERVAL, default=DEFAULT_WRITE_INTERVAL
+    ): selector.NumberSelector(
+        selector.NumberSelectorConfig(
+            min=0,
+            max=3600,
+            step=1,
+            unit_of_measurement="s",
+            mode=selector.NumberSelectorMode.BOX,
+        )
+    ),
+    vol.Optional(
+        CONF_ROLLOVER_WINDOW, default=DEFAULT_ROLLOVER_WINDOW
+    ): selector.NumberSelector(
+        selector.NumberSelectorConfig(
+            min=0,
+            max=300,
+            step=1,
+            unit_of_measurement="s",
+            mode=selector.NumberSelectorMode.BOX,
+        )
+    ),
+    vol.Optional(
+        CONF_HISTORY_SIZE, default=DEFAULT_HISTORY_SIZE
+    ): selector.NumberSelector(
+        selector.NumberSelectorConfig(
+            min=0,
+            max=120,
+            step=1,
+            mode=selector.NumberSelectorMode.BOX,
+        )
+    ),
+    vol.Optional(CONF_IMPORT_STATISTICS, default=False): selector.BooleanSelector(),
+    vol.Optional(CONF_TRACE, default=False): selector.BooleanSelector(),
+}
+
+# Advanced settings of time meters only.
+ADVANCED_TIME_CONFIG = {
+    vol.Optional(CONF_EVENT_DRIVEN, default=False): selector.BooleanSelector(),
+    vol.Optional(
+        CONF_REFRESH_INTERVAL, default=DEFAULT_REFRESH_INTERVAL
+    ): selector.NumberSelector(
+        selector.NumberSelectorConfig(
+            min=0,
+            max=86400,
+            step=1,
+            unit_of_measurement="s",
+            mode=selector.NumberSelectorMode.BOX,
+        )
+    ),
+}
+
+# Advanced settings of source meters only.
+ADVANCED_SOURCE_CONFIG = {
+    vol.Optional(CONF_MIN_INTERVAL, default=0): selector.NumberSelector(
+        selector.NumberSelectorConfig(
+            min=0,
+            max=3600,
+            step=0.1,
+            unit_of_measurement="s",
+            mode=selector.NumberSelectorMode.BOX,
+        )
+    ),
+    vol.Optional(CONF_MIN_DELTA, default=0): selector.NumberSelector(
+        selector.NumberSelectorConfig(
+            min=0,
+            step="any",
+            mode=selector.NumberSelectorMode.BOX,
+        )
+    ),
+    vol.Optional(CONF_MEDIAN_SIZE, default=0): selector.NumberSelector(
+        selector.NumberSelectorConfig(
+            min=0,
+            max=15,
+            step=1,
+            mode=selector.NumberSelectorMode.BOX,
+        )
+    ),
+    vol.Optional(CONF_STATISTICS, default=False): selector.BooleanSelector(),
+}
+
 SENSORS_CONFIG = {
     vol.Optional(CONF_PERIODS): selector.SelectSelector(
         selector.SelectSelectorConfig(
@@ -339,12 +466,15 @@ CONFIG_FLOW = {
 
 OPTIONS_FLOW = {
     "init": SchemaFlowMenuStep(
-        ["edit_main", "add_sensors", "select_edit_sensor", "remove_sensor"]
+        ["edit_main", "add_sensors", "select_edit_sensor", "remove_sensor", "advanced"]
     ),
     "edit_main": SchemaFlowFormStep(
         DATA_SCHEMA_EDIT_MAIN,
         validate_user_input=validate_edit_main_config,
     ),
+    "advanced": SchemaFlowFormStep(
+        get_advanced_schema, validate_user_input=validate_advanced
+    ),
     "add_sensors": SchemaFlowFormStep(
         DATA_SCHEMA_SENSORS,
         suggested_values=get_add_sensor_suggested_values,
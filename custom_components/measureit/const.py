@@ -10,6 +10,12 @@ DOMAIN_DATA = "measureit_data"
 VERSION = "0.0.1"
 COORDINATOR = "coordinator"
 STORE = "store"
+HEARTBEAT = "heartbeat"
+SOURCE_DISPATCHER = "source_dispatcher"
+CONDITION_REGISTRY = "condition_registry"
+ROLLOVER_SCHEDULER = "rollover_scheduler"
+PERIOD_REGISTRY = "period_registry"
+STATISTICS_IMPORTER = "statistics_importer"
 SOURCE_ENTITY_ID = "source_entity_id"
 
 # Icons
@@ -34,6 +40,22 @@ CONF_TW_TILL = "when_till"
 CONF_CONFIG_NAME = "config_name"
 CONF_SENSOR_NAME = "sensor_name"
 CONF_INDEX = "index"
+CONF_WRITE_INTERVAL = "write_interval"
+CONF_EVENT_DRIVEN = "event_driven"
+CONF_REFRESH_INTERVAL = "refresh_interval"
+CONF_ROLLOVER_WINDOW = "rollover_window"
+CONF_HISTORY_SIZE = "history_size"
+CONF_IMPORT_STATISTICS = "import_statistics"
+CONF_MIN_INTERVAL = "min_interval"
+CONF_MIN_DELTA = "min_delta"
+CONF_MEDIAN_SIZE = "median_size"
+CONF_TRACE = "trace"
+CONF_STATISTICS = "statistics"
+
+DEFAULT_WRITE_INTERVAL = 0
+DEFAULT_REFRESH_INTERVAL = 0
+DEFAULT_ROLLOVER_WINDOW = 0
+DEFAULT_HISTORY_SIZE = 12
 
 METER_TYPE_TIME = "time"
 METER_TYPE_SOURCE = "source"
@@ -42,6 +64,13 @@ METER_TYPE_SOURCE = "source"
 ATTR_PREV = "prev_period"
 ATTR_NEXT_RESET = "next_reset"
 ATTR_STATUS = "status"
+ATTR_DELTA_STATISTICS = "delta_statistics"
+ATTR_READING_STATISTICS = "reading_statistics"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_ENTITY_PATTERN = "entity_pattern"
+ATTR_PERIOD = "period"
+ATTR_RESET_DATETIME = "reset_datetime"
+ATTR_START_DATETIME = "start_datetime"
 
 PREDEFINED_PERIODS = {
     "5m": "*/5 * * * *",
@@ -53,6 +82,14 @@ PREDEFINED_PERIODS = {
     "forever": "none",
 }
 
+# Rolling periods, with the length of their window and of its buckets in seconds.
+ROLLING_PERIODS = {
+    "last_hour": (3600, 60),
+    "last_24h": (86400, 300),
+    "last_7d": (604800, 3600),
+}
+
+
 class MeterType(str, Enum):
     """Enum with possible meter states."""
 
@@ -2,31 +2,36 @@
 from __future__ import annotations
 
 import logging
+import time
 from datetime import datetime
 from datetime import timedelta
-from typing import Any, get_args
+from typing import Any
 from collections.abc import Callable
 
 import homeassistant.util.dt as dt_util
-from homeassistant.const import STATE_UNAVAILABLE
-from homeassistant.const import STATE_UNKNOWN
 from homeassistant.core import callback
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import TemplateError
 from homeassistant.helpers.event import async_track_point_in_utc_time
-from homeassistant.helpers.event import async_track_template_result
-from homeassistant.helpers.event import async_track_state_change_event
-from homeassistant.helpers.event import TrackTemplate
 from homeassistant.helpers.template import Template
 
+from .condition_registry import async_get_condition_registry
 from .const import MeterType
-
+from .heartbeat import async_get_heartbeat
+from .input_filter import InputFilter
+from .meter import Meter
+from .meter import MeterState
+from .metrics import CoordinatorMetrics
+from .period import reached
 from .reading import ReadingData
+from .rollover import async_get_rollover_scheduler
+from .source_dispatcher import async_get_source_dispatcher
 
 from .time_window import TimeWindow
+from .trace import TraceBuffer
 from .util import NumberType
+from .util import parse_value
 
-UPDATE_INTERVAL = timedelta(minutes=1)
 _LOGGER: logging.Logger = logging.getLogger(__name__)
 
 
@@ -41,6 +46,10 @@ class MeasureItCoordinator:
         time_window: TimeWindow,
         meter_type: MeterType,
         source_entity: str | None = None,
+        event_driven: bool = False,
+        refresh_interval: timedelta | None = None,
+        input_filter: InputFilter | None = None,
+        trace: TraceBuffer | None = None,
     ) -> None:
         """Initialize the coordinator."""
         self._hass: HomeAssistant = hass
@@ -57,54 +66,130 @@ class MeasureItCoordinator:
         self._template_listener = None
         self._entity_update_listener = None
         self._heartbeat_listener = None
+        self._event_driven: bool = event_driven
+        self._refresh_interval: timedelta | None = refresh_interval
+        self._wakeup_listener = None
+        self._wakeups_enabled: bool = False
+        self._rollover_listener = None
+        self._rollover_boundary: datetime | None = None
+        self._rollover_skipped: bool = False  # a period end is passed without a reading
+        self._input_filter: InputFilter | None = input_filter
+        self._flush_listener = None
         self.last_reading = None
+        self.metrics = CoordinatorMetrics()
+        # the last readings, only kept when tracing is turned on
+        self.trace: TraceBuffer | None = trace
 
         self._template_active: bool = True
 
+    @property
+    def name(self) -> str:
+        """Name of the configuration of the coordinator."""
+        return self._name
+
+    @property
+    def meter_type(self) -> MeterType:
+        """Type of the meters of the coordinator."""
+        return self._meter_type
+
+    @property
+    def source_entity(self) -> str | None:
+        """Entity id of the source of source meters."""
+        return self._source_entity
+
+    @property
+    def condition(self) -> Template | None:
+        """Condition template, the meters only measure while it is true."""
+        return self._condition
+
+    @property
+    def time_window(self) -> TimeWindow:
+        """Time window in which the meters measure."""
+        return self._time_window
+
     def stop(self):
         """Stop the coordinator."""
         _LOGGER.debug("Stopping coordinator")
         if self._template_listener:
-            self._template_listener.async_remove()
+            self._template_listener()
+            self._template_listener = None
+        if self._entity_update_listener:
+            self._entity_update_listener()
+            self._entity_update_listener = None
         if self._heartbeat_listener:
             self._heartbeat_listener()
+            self._heartbeat_listener = None
+        self._wakeups_enabled = False
+        if self._wakeup_listener:
+            self._wakeup_listener()
+            self._wakeup_listener = None
+        if self._flush_listener:
+            self._flush_listener()
+            self._flush_listener = None
+        self._async_untrack_rollover()
 
     def start(self):
         """Start the coordinator."""
 
         if self._condition:
-            self._template_listener = async_track_template_result(
-                self._hass,
-                [TrackTemplate(self._condition, None)],
-                self._async_on_template_update,
-            )
-            self._template_listener.async_refresh()
+            self._template_listener = async_get_condition_registry(
+                self._hass
+            ).async_subscribe(self._condition, self._async_on_template_update)
 
         if self._meter_type == MeterType.SOURCE:
-            self._entity_update_listener = async_track_state_change_event(
-                self._hass,
-                self._source_entity,
-                self._async_on_state_change,
-            )
+            self._entity_update_listener = async_get_source_dispatcher(
+                self._hass
+            ).async_subscribe(self._source_entity, self._async_on_source_value)
             # Update once on startup to get the initial state. After that we're tracking state changes and receive events
             source_state = self._hass.states.get(self._source_entity).state
             self._update(source_state)
+            # unchanged states are not dispatched, so read again when the time window opens or closes
+            self._wakeups_enabled = True
+            self._async_schedule_wakeup(dt_util.now())
+
+        elif self._event_driven:
+            self._wakeups_enabled = True
+            self._async_on_wakeup(dt_util.utcnow())
 
         else:
+            self._heartbeat_listener = async_get_heartbeat(self._hass).async_subscribe(
+                self.async_on_heartbeat
+            )
             self.async_on_heartbeat()
 
     @callback
-    def _async_on_state_change(self, event):
-        old_state = event.data.get("old_state").state
-        new_state = event.data.get("new_state").state
-        _LOGGER.debug("%s # Source entity state changed, old: %s, new: %s", self._name, old_state, new_state)
-        self._update(new_state)
+    def _async_on_source_value(
+        self, value: NumberType | None, error: Exception | None, raw: str | None = None
+    ):
+        """Handle a source state change, parsed once by the shared dispatcher."""
+        tznow = dt_util.now()
+        if error is None and (input_filter := self._input_filter) is not None:
+            if self._rollover_boundary is not None and reached(self._rollover_boundary, tznow):
+                # roll over with the last reading first, held back readings belong to the period that ended
+                self._async_on_rollover(self._rollover_boundary)
+            value = input_filter.smooth(value)
+            if not input_filter.passes(value, tznow.timestamp()):
+                # held back, a later reading or the rollover passes it on
+                self.last_reading = value
+                self.metrics.filtered += 1
+                if self.trace is not None:
+                    self.trace.append((tznow.timestamp(), raw, value, None, None, None, None))
+                if self._flush_listener is None and (flush_at := input_filter.flush_at()) is not None:
+                    self._flush_listener = async_track_point_in_utc_time(
+                        self._hass, self._async_on_flush, dt_util.utc_from_timestamp(flush_at)
+                    )
+                return
+        self._update_parsed(value, error, tznow, raw)
 
     @callback
     def async_add_listener(
         self, update_callback: Callable[[ReadingData], None], context: Any = None
     ) -> Callable[[], None]:
-        """Listen for data updates."""
+        """Listen for data updates.
+
+        The context can be the meter of the listener. Its next_reset is used to
+        roll over at the end of the period.
+        """
 
         @callback
         def remove_listener() -> None:
@@ -115,30 +200,49 @@ class MeasureItCoordinator:
 
         if self.last_reading:
             update_callback(self.last_reading)
+        self.async_reschedule()
         return remove_listener
 
-    def _update(self, new_value: NumberType):
-        tznow = dt_util.now()
-        _LOGGER.debug(
-            "%s # Update triggered at: %s. Value: %s",
-            self._name,
-            tznow.isoformat(),
-            new_value
-        )
-
+    def _update(self, new_value: NumberType, tznow: datetime | None = None):
         try:
-            reading_value = self._parse_value(new_value)
-            self.last_reading = reading_value
+            reading_value = parse_value(new_value)
         except (ValueError, AttributeError) as ex:
+            self._update_parsed(None, ex, tznow or dt_util.now(), new_value)
+        else:
+            self._update_parsed(reading_value, None, tznow or dt_util.now(), new_value)
+
+    def _update_parsed(
+        self,
+        reading_value: NumberType | None,
+        error: Exception | None,
+        tznow: datetime,
+        raw: Any = None,
+    ):
+        if self._flush_listener:
+            # the held back reading is superseded by this one
+            self._flush_listener()
+            self._flush_listener = None
+        if self._rollover_boundary is not None and reached(self._rollover_boundary, tznow):
+            # The reading is past the end of a period, which is reached before the
+            # scheduler got to it. Roll over at the boundary itself first.
+            self._async_on_rollover(self._rollover_boundary)
+
+        self.metrics.readings += 1
+        if error is None:
+            self.last_reading = reading_value
+        else:
+            self.metrics.parse_failures += 1
             _LOGGER.warning(
                 "%s # Could not update meters because the input value is invalid. Error: %s",
                 self._name,
-                ex,
+                error,
             )
             # set the input value to the last updated value, so the meters are at least reset when required
             if self.last_reading:
                 reading_value = self.last_reading
             else:
+                if self.trace is not None:
+                    self.trace.append((tznow.timestamp(), raw, None, error, None, None, None))
                 return  # nothing we can do... we'll try again next time
 
         tw_active = self._time_window.is_active(tznow)
@@ -150,20 +254,132 @@ class MeasureItCoordinator:
         )
 
         self._update_listeners(reading)
+        if self.trace is not None:
+            self.trace.append(
+                (
+                    tznow.timestamp(),
+                    raw,
+                    reading_value,
+                    error,
+                    tw_active,
+                    self._template_active,
+                    self._meter_values(),
+                )
+            )
+        if self._rollover_skipped or (
+            self._rollover_boundary is not None and reached(self._rollover_boundary, tznow)
+        ):
+            self._async_track_rollover()
+
+    @callback
+    def async_on_heartbeat(self, tznow: datetime | None = None):
+        """Update the time meters on a tick of the shared heartbeat."""
+        tznow = tznow or dt_util.now()
+        self._update(tznow.timestamp(), tznow)
+
+    @callback
+    def _async_on_wakeup(self, utcnow: datetime):
+        """Update the meters at a time window edge or refresh and schedule the next one."""
+        self._wakeup_listener = None
+        tznow = dt_util.as_local(utcnow)
+        if self._meter_type == MeterType.TIME:
+            self._update(utcnow.timestamp(), tznow)
+        elif self.last_reading is not None:
+            self._update_parsed(self.last_reading, None, tznow)
+            if self._input_filter is not None:
+                self._input_filter.mark(self.last_reading, tznow.timestamp())
+        self._async_schedule_wakeup(tznow)
+
+    @callback
+    def _async_on_flush(self, utcnow: datetime):
+        """Pass on the last held back reading once the minimum interval of the input filter has passed."""
+        self._flush_listener = None
+        tznow = dt_util.as_local(utcnow)
+        self._update_parsed(self.last_reading, None, tznow)
+        self._input_filter.mark(self.last_reading, tznow.timestamp())
+
+    @callback
+    def async_reschedule(self):
+        """Recalculate the next rollover and wake up, e.g. after a period end has changed."""
+        self._async_track_rollover()
+        if self._wakeups_enabled:
+            self._async_schedule_wakeup(dt_util.now())
+
+    @callback
+    def _async_track_rollover(self, after: datetime | None = None):
+        """Track the first period end of the listeners with the shared rollover scheduler.
+
+        Period ends that are not after the given moment are skipped, the periods
+        that end there roll over with the next reading.
+        """
+        boundary = None
+        self._rollover_skipped = False
+        for _, context in self._listeners.values():
+            if (next_reset := getattr(context, "next_reset", None)) is None or next_reset.year == 9999:
+                continue
+            if after is not None and reached(next_reset, after):
+                self._rollover_skipped = True
+            elif boundary is None or not reached(boundary, next_reset):
+                boundary = next_reset
+        if (
+            boundary is not None
+            and boundary == self._rollover_boundary
+            and boundary.fold == self._rollover_boundary.fold
+            and self._rollover_listener
+        ):
+            return
+        self._async_untrack_rollover()
+        if boundary is not None:
+            self._rollover_boundary = boundary
+            self._rollover_listener = async_get_rollover_scheduler(
+                self._hass
+            ).async_track_boundary(boundary, self._async_on_rollover)
+
+    @callback
+    def _async_untrack_rollover(self):
+        if self._rollover_listener:
+            self._rollover_listener()
+            self._rollover_listener = None
+        self._rollover_boundary = None
 
     @callback
-    def async_on_heartbeat(self, now: datetime | None = None):
-        """Configure the coordinator heartbeat."""
-        self._update(dt_util.utcnow().timestamp())
-
-        # We _floor_ utcnow to create a schedule on a rounded minute,
-        # minimizing the time between the point and the real activation.
-        # That way we obtain a constant update frequency,
-        # as long as the update process takes less than a minute
-        self._heartbeat_listener = async_track_point_in_utc_time(
-            self._hass,
-            self.async_on_heartbeat,
-            dt_util.utcnow().replace(second=0, microsecond=0) + UPDATE_INTERVAL,
+    def _async_on_rollover(self, boundary: datetime):
+        """Update the meters with a reading at the end of their period, so they reset at that exact time."""
+        self._async_untrack_rollover()
+        tznow = dt_util.as_local(boundary)
+        if self._meter_type == MeterType.TIME:
+            self._update_parsed(tznow.timestamp(), None, tznow)
+        elif self.last_reading is not None:
+            if self._input_filter is not None and (last := self._input_filter.settle()) is not None:
+                # the exact reading closes the period, not the median that lags behind it
+                self.last_reading = last
+            self._update_parsed(self.last_reading, None, tznow)
+            if self._input_filter is not None:
+                self._input_filter.mark(self.last_reading, tznow.timestamp())
+        else:
+            # Without a reading the periods do not move, do not track their past end again.
+            self._async_track_rollover(after=boundary)
+            return
+        self._async_track_rollover()
+
+    def _async_schedule_wakeup(self, tznow: datetime):
+        """Schedule a wake up at the first time window edge or refresh.
+
+        Period ends are handled by the rollover scheduler.
+        """
+        if self._wakeup_listener:
+            self._wakeup_listener()
+            self._wakeup_listener = None
+
+        wakeups = [self._time_window.next_transition(tznow)]
+        if self._refresh_interval:
+            wakeups.append(tznow + self._refresh_interval)
+        wakeups = [wakeup for wakeup in wakeups if wakeup is not None]
+        if not wakeups:
+            return
+
+        self._wakeup_listener = async_track_point_in_utc_time(
+            self._hass, self._async_on_wakeup, max(min(wakeups), tznow)
         )
 
     @callback
@@ -171,6 +387,7 @@ class MeasureItCoordinator:
         result = updates.pop().result
 
         if isinstance(result, TemplateError):
+            self.metrics.template_errors += 1
             _LOGGER.error(
                 "%s # Encountered a template error: %s. Could not start or stop measuring!",
                 self._name,
@@ -180,21 +397,24 @@ class MeasureItCoordinator:
             _LOGGER.debug("%s # Condition template changed to: %s.", self._name, result)
             self._template_active = result
             if self._meter_type == MeterType.SOURCE:
-                self._update(self._hass.states.get(self._source_entity).state)
+                if self._input_filter is not None and self.last_reading is not None:
+                    # the smoothed reading, the state itself could be an outlier
+                    self._update_parsed(self.last_reading, None, dt_util.now())
+                else:
+                    self._update(self._hass.states.get(self._source_entity).state)
             elif self._meter_type == MeterType.TIME:
                 self._update(dt_util.utcnow().timestamp())
 
     def _update_listeners(self, reading):
+        start = time.perf_counter()
         for update_callback, _ in list(self._listeners.values()):
             update_callback(reading)
+        self.metrics.fanout.record(time.perf_counter() - start)
 
-    def _parse_value(self, value: Any) -> NumberType | None:
-        if isinstance(value, get_args(NumberType)):
-            return value
-        elif value in [STATE_UNKNOWN, STATE_UNAVAILABLE]:
-            _LOGGER.debug(
-                "%s # Error converting value %s to a number.", self._name, value
-            )
-            raise ValueError("Could not process value as it's unknown or unavailable.")
-        else:
-            return float(value)
+    def _meter_values(self) -> tuple[tuple[str, MeterState | None, float], ...]:
+        """Return the name, state and measured value of the meters of the listeners, for the trace."""
+        return tuple(
+            (context.name, context.state, context.measured_value)
+            for _, context in self._listeners.values()
+            if isinstance(context, Meter)
+        )
@@ -0,0 +1,22 @@
+"""Diagnostics support for MeasureIt."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import COORDINATOR
+from .const import DOMAIN_DATA
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = hass.data[DOMAIN_DATA][entry.entry_id][COORDINATOR]
+    return {
+        "options": dict(entry.options),
+        "metrics": coordinator.metrics.as_dict(),
+        "trace": coordinator.trace.as_list() if coordinator.trace is not None else None,
+    }
@@ -0,0 +1,75 @@
+"""Shared heartbeat for MeasureIt time meters."""
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from datetime import timedelta
+from collections.abc import Callable
+
+import homeassistant.util.dt as dt_util
+from homeassistant.core import CALLBACK_TYPE
+from homeassistant.core import HomeAssistant
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
+
+from .const import DOMAIN
+from .const import HEARTBEAT
+
+UPDATE_INTERVAL = timedelta(minutes=1)
+_LOGGER: logging.Logger = logging.getLogger(__name__)
+
+
+class Heartbeat:
+    """Single timer that ticks every interval and fans out to all subscribers."""
+
+    def __init__(self, hass: HomeAssistant, interval: timedelta = UPDATE_INTERVAL) -> None:
+        """Initialize the heartbeat."""
+        self._hass: HomeAssistant = hass
+        self._interval: timedelta = interval
+        self._subscribers: dict[CALLBACK_TYPE, Callable[[datetime], None]] = {}
+        self._timer_listener: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_subscribe(self, tick_callback: Callable[[datetime], None]) -> CALLBACK_TYPE:
+        """Subscribe to the heartbeat and return a function to unsubscribe."""
+
+        @callback
+        def unsubscribe() -> None:
+            """Remove the subscriber and stop the timer when it was the last one."""
+            self._subscribers.pop(unsubscribe, None)
+            if not self._subscribers and self._timer_listener:
+                self._timer_listener()
+                self._timer_listener = None
+
+        self._subscribers[unsubscribe] = tick_callback
+        if self._timer_listener is None:
+            self._schedule()
+        return unsubscribe
+
+    @callback
+    def _async_on_tick(self, utcnow: datetime) -> None:
+        """Handle a tick by notifying every subscriber with the same timestamp."""
+        tznow = dt_util.now()
+        self._schedule()
+        for tick_callback in list(self._subscribers.values()):
+            tick_callback(tznow)
+
+    def _schedule(self) -> None:
+        # We _floor_ utcnow to create a schedule on a rounded minute,
+        # minimizing the time between the point and the real activation.
+        # That way we obtain a constant update frequency,
+        # as long as the update process takes less than a minute
+        self._timer_listener = async_track_point_in_utc_time(
+            self._hass,
+            self._async_on_tick,
+            dt_util.utcnow().replace(second=0, microsecond=0) + self._interval,
+        )
+
+
+@callback
+def async_get_heartbeat(hass: HomeAssistant) -> Heartbeat:
+    """Return the heartbeat shared by all MeasureIt coordinators."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (heartbeat := domain_data.get(HEARTBEAT)) is None:
+        heartbeat = domain_data[HEARTBEAT] = Heartbeat(hass)
+    return heartbeat
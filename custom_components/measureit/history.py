@@ -0,0 +1,189 @@
+"""Period history for MeasureIt sensors."""
+from __future__ import annotations
+
+import asyncio
+from array import array
+from datetime import datetime
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.core import callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .const import STORE
+
+STORAGE_KEY = f"{DOMAIN}.history"
+STORAGE_VERSION = 1
+# Seconds to wait before saving, so the resets of a rollover are saved in one go.
+SAVE_DELAY = 30
+
+
+class PeriodHistory:
+    """The last closed periods of a meter, with their value, start and end.
+
+    The periods are kept in a ring of fixed size, backed by arrays of floats.
+    Start and end are stored as POSIX timestamps.
+    """
+
+    __slots__ = ("opened", "_values", "_starts", "_ends", "_next", "count", "closed")
+
+    def __init__(self, size: int, opened: datetime) -> None:
+        """Initialize the history."""
+        self.opened: float = opened.timestamp()  # start of the period that is still open
+        self._values: array[float] = array("d", bytes(8 * size))
+        self._starts: array[float] = array("d", bytes(8 * size))
+        self._ends: array[float] = array("d", bytes(8 * size))
+        self._next: int = 0
+        self.count: int = 0
+        self.closed: int = 0  # periods closed in this session, including the ones dropped
+
+    @property
+    def size(self) -> int:
+        """Return the number of periods that are kept."""
+        return len(self._values)
+
+    def close(self, value: float, end: datetime) -> None:
+        """Close the open period with its value at end, the next period opens there."""
+        if not self.size:
+            return
+        end_timestamp = end.timestamp()
+        index = self._next
+        self._values[index] = value
+        self._starts[index] = self.opened
+        self._ends[index] = end_timestamp
+        self._next = (index + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+        self.closed += 1
+        self.opened = end_timestamp
+
+    def newest(self, count: int) -> list[tuple[float, datetime, datetime]]:
+        """Return the value, start and end of the newest closed periods, oldest first."""
+        indexes = list(self._indexes())[self.count - min(count, self.count) :]
+        return [
+            (
+                self._values[index],
+                dt_util.utc_from_timestamp(self._starts[index]),
+                dt_util.utc_from_timestamp(self._ends[index]),
+            )
+            for index in indexes
+        ]
+
+    def _indexes(self) -> range | list[int]:
+        """Return the indexes of the closed periods, oldest first."""
+        if self.count < self.size:
+            return range(self.count)
+        return [(self._next + offset) % self.size for offset in range(self.size)]
+
+    def as_list(self) -> list[dict[str, Any]]:
+        """Return the closed periods, oldest first, with start and end in ISO format."""
+        return [
+            {
+                "value": self._values[index],
+                "start": _isoformat(self._starts[index]),
+                "end": _isoformat(self._ends[index]),
+            }
+            for index in self._indexes()
+        ]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the history to be stored, oldest first."""
+        indexes = self._indexes()
+        return {
+            "opened": self.opened,
+            "values": [self._values[index] for index in indexes],
+            "starts": [self._starts[index] for index in indexes],
+            "ends": [self._ends[index] for index in indexes],
+        }
+
+    def restore(self, stored: dict[str, Any]) -> None:
+        """Restore a stored history, keeping the newest periods when it is longer than the size."""
+        self._values = array("d", bytes(8 * self.size))
+        self._starts = array("d", bytes(8 * self.size))
+        self._ends = array("d", bytes(8 * self.size))
+        self._next = 0
+        self.count = 0
+        periods = list(zip(stored["values"], stored["starts"], stored["ends"]))
+        for value, start, end in periods[max(len(periods) - self.size, 0) :]:
+            self.opened = start
+            self.close(value, dt_util.utc_from_timestamp(end))
+        self.opened = stored["opened"]
+        self.closed = 0
+
+
+def _isoformat(timestamp: float) -> str:
+    return dt_util.as_local(dt_util.utc_from_timestamp(timestamp)).isoformat()
+
+
+class HistoryStore:
+    """Single store of the period histories of all MeasureIt sensors.
+
+    Histories are keyed by the unique id of their sensor. Saves are delayed, so
+    all periods that close in a rollover are written to disk once.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the store."""
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._histories: dict[str, PeriodHistory] = {}
+        # stored histories of sensors that are not set up (yet)
+        self._stored: dict[str, dict[str, Any]] = {}
+        self._load_task: asyncio.Future | None = None
+
+    async def async_load(self) -> None:
+        """Load the stored histories, once."""
+        if self._load_task is None:
+            self._load_task = asyncio.ensure_future(self._async_load())
+        await self._load_task
+
+    async def _async_load(self) -> None:
+        if (data := await self._store.async_load()) is not None:
+            self._stored = data["histories"]
+
+    @callback
+    def async_history(self, key: str, size: int, opened: datetime) -> PeriodHistory:
+        """Return the history of a sensor, restored from the store when it was stored before."""
+        history = PeriodHistory(size, opened)
+        if (stored := self._stored.pop(key, None)) is not None:
+            history.restore(stored)
+        self._histories[key] = history
+        return history
+
+    @callback
+    def async_release(self, key: str) -> None:
+        """Keep the history of a sensor that is removed from Home Assistant for a next setup."""
+        if (history := self._histories.pop(key, None)) is not None:
+            self._stored[key] = history.as_dict()
+
+    @callback
+    def async_remove(self, key: str) -> None:
+        """Drop the history of a sensor that is deleted, so it is not stored forever."""
+        if (
+            self._histories.pop(key, None) is not None
+            or self._stored.pop(key, None) is not None
+        ):
+            self.async_schedule_save()
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Save the histories after the save delay."""
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        return {
+            "histories": {
+                **self._stored,
+                **{key: history.as_dict() for key, history in self._histories.items()},
+            }
+        }
+
+
+@callback
+def async_get_history_store(hass: HomeAssistant) -> HistoryStore:
+    """Return the history store shared by all MeasureIt sensors."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (store := domain_data.get(STORE)) is None:
+        store = domain_data[STORE] = HistoryStore(hass)
+    return store
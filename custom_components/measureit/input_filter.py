@@ -0,0 +1,99 @@
+"""Pre-processing of noisy source readings for MeasureIt."""
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Mapping
+from typing import Any
+
+from .const import CONF_MEDIAN_SIZE
+from .const import CONF_MIN_DELTA
+from .const import CONF_MIN_INTERVAL
+
+
+class InputFilter:
+    """Streaming filter of the readings of a source entity, in constant memory.
+
+    Outliers are rejected by taking the median of the last readings. With a
+    minimum interval and/or delta, a reading is only passed on when at least
+    the minimum interval has passed since the last passed reading, or when it
+    differs at least the minimum delta from it. The readings that are held
+    back are not lost: meters measure the difference with their start
+    reading, so the next reading that is passed on, e.g. the one at a period
+    end, includes them. With a minimum interval, the last held back reading
+    is passed on once the interval has passed, see flush_at.
+
+    The median lags behind a source that keeps rising, so at a period end the
+    last reading itself is passed on instead, see settle.
+    """
+
+    __slots__ = ("min_interval", "min_delta", "_window", "_passed_at", "_passed_value")
+
+    def __init__(self, min_interval: float = 0, min_delta: float = 0, median_size: int = 0) -> None:
+        """Initialize the filter, a setting of 0 turns its part off."""
+        self.min_interval: float = min_interval
+        self.min_delta: float = min_delta
+        self._window: deque[float] | None = deque(maxlen=median_size) if median_size > 1 else None
+        self._passed_at: float | None = None
+        self._passed_value: float | None = None
+
+    @property
+    def enabled(self) -> bool:
+        """Return whether the filter changes or holds back readings at all."""
+        return bool(self.min_interval or self.min_delta or self._window is not None)
+
+    def smooth(self, value: float) -> float:
+        """Return the median of the last readings, including value."""
+        window = self._window
+        if window is None:
+            return value
+        window.append(value)
+        ordered = sorted(window)
+        middle = len(ordered) // 2
+        if len(ordered) % 2:
+            return ordered[middle]
+        return (ordered[middle - 1] + ordered[middle]) / 2
+
+    def settle(self) -> float | None:
+        """Return the last reading as is and start the median over, e.g. at a period end.
+
+        Returns None without a median or readings, then the last passed value stands.
+        """
+        window = self._window
+        if not window:
+            return None
+        last = window[-1]
+        window.clear()
+        return last
+
+    def passes(self, value: float, timestamp: float) -> bool:
+        """Return whether a (smoothed) reading at timestamp is passed on, and remember it if so."""
+        if (
+            self._passed_at is not None
+            and (self.min_interval or self.min_delta)
+            and not (self.min_interval and timestamp - self._passed_at >= self.min_interval)
+            and not (self.min_delta and abs(value - self._passed_value) >= self.min_delta)
+        ):
+            return False
+        self.mark(value, timestamp)
+        return True
+
+    def flush_at(self) -> float | None:
+        """Return the timestamp at which a held back reading is due to be passed on, if ever."""
+        if self.min_interval and self._passed_at is not None:
+            return self._passed_at + self.min_interval
+        return None
+
+    def mark(self, value: float, timestamp: float) -> None:
+        """Remember a reading that was passed on outside of the filter, e.g. at a period end."""
+        self._passed_at = timestamp
+        self._passed_value = value
+
+
+def create_input_filter(options: Mapping[str, Any]) -> InputFilter | None:
+    """Create the input filter of a configuration, or None when it has no filter settings."""
+    input_filter = InputFilter(
+        options.get(CONF_MIN_INTERVAL, 0),
+        options.get(CONF_MIN_DELTA, 0),
+        int(options.get(CONF_MEDIAN_SIZE, 0)),
+    )
+    return input_filter if input_filter.enabled else None
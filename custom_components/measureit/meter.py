@@ -1,10 +1,14 @@
 """Meter logic for MeasureIt."""
 from __future__ import annotations
 from datetime import datetime
+from datetime import timedelta
 from enum import Enum
 from .reading import ReadingData
+from .history import PeriodHistory
 from .period import Period
-from .const import LOGGER
+from .rolling import RollingWindow
+from .stats import MeterStats
+from .const import ROLLING_PERIODS
 
 
 class MeterState(str, Enum):
@@ -18,6 +22,20 @@ class MeterState(str, Enum):
 class Meter:
     """Meter implementation."""
 
+    __slots__ = (
+        "name",
+        "_period",
+        "state",
+        "measured_value",
+        "prev_measured_value",
+        "_session_start_reading",
+        "_start_measured_value",
+        "_template_active",
+        "_time_window_active",
+        "stats",
+        "history",
+    )
+
     def __init__(self, name: str, period: Period):
         """Initialize meter."""
         self.name: str = name
@@ -31,6 +49,15 @@ class Meter:
 
         self._template_active: bool = False
         self._time_window_active: bool = False
+        # statistics of the updates within the period, only kept when set
+        self.stats: MeterStats | None = None
+        # the last closed periods, only kept when set
+        self.history: PeriodHistory | None = None
+
+    @property
+    def period_pattern(self) -> str:
+        """Cron pattern of the period."""
+        return self._period.start_pattern
 
     @property
     def last_reset(self):
@@ -49,20 +76,16 @@ class Meter:
     def on_update(self, reading: ReadingData):
         """Update the meter with reading data."""
         if self.state == MeterState.MEASURING:
+            measured_value = self.measured_value
             self._update(reading.value)
+            # an unchanged value is a reading again, e.g. at a time window edge, not a new reading
+            if self.stats is not None and (delta := self.measured_value - measured_value):
+                self.stats.add(delta, reading.value)
         self._period.update(reading.reading_datetime, self._reset, reading.value)
         self._template_active = reading.template_active
         self._time_window_active = reading.timewindow_active
         self._update_state(reading.value)
 
-        LOGGER.debug(
-            "New state - measured value: %s, start_measured_value: %s, session_start_reading: %s, state: %s",
-            self.measured_value,
-            self._start_measured_value,
-            self._session_start_reading,
-            self.state,
-        )
-
     def _update_state(self, reading: float) -> MeterState:
         if self._template_active is True and self._time_window_active is True:
             new_state = MeterState.MEASURING
@@ -91,3 +114,62 @@ class Meter:
         self.prev_measured_value, self.measured_value = self.measured_value, 0
         self._session_start_reading = reading
         self._start_measured_value = self.measured_value
+        if self.stats is not None:
+            self.stats.clear()
+        if self.history is not None:
+            # the period was moved on already, the new one starts where the closed one ended
+            self.history.close(self.prev_measured_value, self._period.start)
+
+
+class RollingMeter(Meter):
+    """Meter of the total within a sliding window, such as the last 24 hours.
+
+    Instead of a running total since the start of the period, every delta is
+    added to the rolling window. The measured value is the total of the window.
+    """
+
+    __slots__ = ("window", "period_name")
+
+    def __init__(
+        self, name: str, period: Period, window: RollingWindow, period_name: str | None = None
+    ):
+        """Initialize meter."""
+        super().__init__(name, period)
+        self.window: RollingWindow = window
+        self.period_name: str | None = period_name  # e.g. last_24h
+
+    def on_update(self, reading: ReadingData):
+        """Update the meter with reading data."""
+        self.expire(reading.reading_datetime)
+        super().on_update(reading)
+
+    def expire(self, tznow: datetime) -> bool:
+        """Drop the deltas that moved out of the window, return whether the value changed."""
+        if self.window.advance(tznow):
+            self.measured_value = self.window.total
+            return True
+        return False
+
+    def _update(self, reading: float):
+        # the session start reading is moved along, so it holds the last reading
+        delta = reading - self._session_start_reading
+        self._session_start_reading = reading
+        self.window.add(delta)
+        self.measured_value = self.window.total
+
+    def _reset(self, reading):
+        super()._reset(reading)
+        self.window.clear()
+
+
+def create_meter(name: str, period: Period, period_name: str | None = None) -> Meter:
+    """Create the meter of a sensor, a rolling meter when period_name is a rolling period."""
+    if (rolling := ROLLING_PERIODS.get(period_name)) is not None:
+        window, bucket = rolling
+        return RollingMeter(
+            name,
+            period,
+            RollingWindow(timedelta(seconds=window), timedelta(seconds=bucket)),
+            period_name,
+        )
+    return Meter(name, period)
@@ -0,0 +1,76 @@
+"""Runtime metrics of a MeasureIt coordinator."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Any
+
+# Upper bounds of the histogram buckets in microseconds, the last bucket is unbounded.
+FANOUT_BUCKETS_US = (10, 50, 100, 500, 1_000, 5_000, 10_000, 50_000)
+
+
+class TimingHistogram:
+    """Histogram of durations with fixed buckets."""
+
+    __slots__ = ("counts", "total", "max")
+
+    def __init__(self) -> None:
+        """Initialize the histogram."""
+        self.counts: list[int] = [0] * (len(FANOUT_BUCKETS_US) + 1)
+        self.total: float = 0.0
+        self.max: float = 0.0
+
+    def record(self, seconds: float) -> None:
+        """Record a duration."""
+        microseconds = seconds * 1_000_000
+        self.counts[bisect_left(FANOUT_BUCKETS_US, microseconds)] += 1
+        self.total += microseconds
+        if microseconds > self.max:
+            self.max = microseconds
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the histogram as a dict."""
+        count = sum(self.counts)
+        labels = [f"<={bound}us" for bound in FANOUT_BUCKETS_US] + [f">{FANOUT_BUCKETS_US[-1]}us"]
+        return {
+            "count": count,
+            "mean_us": round(self.total / count, 1) if count else None,
+            "max_us": round(self.max, 1),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class CoordinatorMetrics:
+    """Counters and timings of a coordinator, cheap enough to always be collected."""
+
+    __slots__ = (
+        "readings",
+        "filtered",
+        "parse_failures",
+        "template_errors",
+        "fanout",
+        "state_writes",
+    )
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        self.readings: int = 0
+        self.filtered: int = 0  # readings held back by the input filter
+        self.parse_failures: int = 0
+        self.template_errors: int = 0
+        self.fanout = TimingHistogram()
+        self.state_writes: dict[str, int] = {}
+
+    def register_sensor(self, name: str) -> None:
+        """Add the state write counter of a sensor, so counting never allocates a key."""
+        self.state_writes.setdefault(name, 0)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics as a dict."""
+        return {
+            "readings": self.readings,
+            "filtered": self.filtered,
+            "parse_failures": self.parse_failures,
+            "template_errors": self.template_errors,
+            "fanout": self.fanout.as_dict(),
+            "state_writes": dict(self.state_writes),
+        }
@@ -1,36 +1,242 @@
 """Period logic for MeasureIt."""
 from __future__ import annotations
 
+from bisect import bisect_right
 from datetime import datetime
+from datetime import time
+from datetime import timedelta
+from datetime import timezone
+from datetime import tzinfo
 from collections.abc import Callable
 
-from croniter import croniter
+from homeassistant.core import HomeAssistant
+from homeassistant.core import callback
+
+from .const import DOMAIN
+from .const import PERIOD_REGISTRY
+
+FOREVER = "none"
+# Number of boundaries of a custom cron pattern that are calculated in one go.
+BOUNDARY_CACHE_SIZE = 8
+
+
+def _floor_minutes(tznow: datetime, minutes: int) -> datetime:
+    return tznow.replace(minute=tznow.minute - tznow.minute % minutes, second=0, microsecond=0)
+
+
+def _add_real_time(moment: datetime, delta: timedelta) -> datetime:
+    # Sub-daily periods have a fixed real duration, so DST transitions are
+    # handled by doing the arithmetic in UTC and converting back.
+    return (moment.astimezone(timezone.utc) + delta).astimezone(moment.tzinfo)
+
+
+def reached(end: datetime, tznow: datetime) -> bool:
+    """Return whether tznow is at or after end.
+
+    Datetimes in the same time zone are compared by wall clock, which is wrong
+    for the second pass of the hour that is repeated when DST ends (fold=1).
+    Then real time is compared. Otherwise the wall clock order is the real one,
+    and comparing datetimes is much cheaper than converting them.
+    """
+    if end.fold or tznow.fold:
+        return end.year < 9999 and end.timestamp() <= tznow.timestamp()
+    return end <= tznow
+
+
+def _midnight(day, tzinfo) -> datetime:
+    return datetime.combine(day, time(), tzinfo=tzinfo)
+
+
+def _next_month(day):
+    return day.replace(year=day.year + day.month // 12, month=day.month % 12 + 1, day=1)
+
+
+class _FixedPeriod:
+    """Native calendar arithmetic for one of the predefined periods."""
+
+    __slots__ = ("floor", "next")
+
+    def __init__(
+        self,
+        floor: Callable[[datetime], datetime],
+        next_start: Callable[[datetime], datetime],
+    ) -> None:
+        self.floor = floor
+        self.next = next_start
+
+
+# Keyed by the cron patterns in PREDEFINED_PERIODS, which is what sensors store.
+# floor() returns the start of the period containing the given time and next()
+# the start of the period following the one containing the given time.
+FIXED_PERIODS: dict[str, _FixedPeriod] = {
+    "*/5 * * * *": _FixedPeriod(
+        lambda dt: _floor_minutes(dt, 5),
+        lambda dt: _add_real_time(_floor_minutes(dt, 5), timedelta(minutes=5)),
+    ),
+    "0 * * * *": _FixedPeriod(
+        lambda dt: _floor_minutes(dt, 60),
+        lambda dt: _add_real_time(_floor_minutes(dt, 60), timedelta(hours=1)),
+    ),
+    "0 0 * * *": _FixedPeriod(
+        lambda dt: _midnight(dt.date(), dt.tzinfo),
+        lambda dt: _midnight(dt.date() + timedelta(days=1), dt.tzinfo),
+    ),
+    "0 0 * * 1": _FixedPeriod(
+        lambda dt: _midnight(dt.date() - timedelta(days=dt.weekday()), dt.tzinfo),
+        lambda dt: _midnight(
+            dt.date() + timedelta(days=7 - dt.weekday()), dt.tzinfo
+        ),
+    ),
+    "0 0 1 * *": _FixedPeriod(
+        lambda dt: _midnight(dt.date().replace(day=1), dt.tzinfo),
+        lambda dt: _midnight(_next_month(dt.date()), dt.tzinfo),
+    ),
+    "0 0 1 1 *": _FixedPeriod(
+        lambda dt: _midnight(dt.date().replace(month=1, day=1), dt.tzinfo),
+        lambda dt: _midnight(dt.date().replace(year=dt.year + 1, month=1, day=1), dt.tzinfo),
+    ),
+}
+
+
+class PeriodSchedule:
+    """The boundaries of a period pattern in one time zone.
+
+    A schedule is shared by all periods with the same pattern, see PeriodRegistry.
+    Predefined periods use native calendar arithmetic, which is cheaper than any
+    lookup. Custom cron patterns keep up to BOUNDARY_CACHE_SIZE + 1 consecutive
+    boundaries, so the periods sharing them normally find the start and end of
+    their period without running croniter.
+    """
+
+    __slots__ = ("pattern", "tzinfo", "_fixed", "_timestamps", "_boundaries")
+
+    def __init__(self, pattern: str, tz: tzinfo | None) -> None:
+        """Initialize the schedule."""
+        self.pattern: str = pattern
+        self.tzinfo: tzinfo | None = tz
+        self._fixed: _FixedPeriod | None = FIXED_PERIODS.get(pattern)
+        # Boundaries are searched by timestamp, because datetimes in the same
+        # time zone are compared by wall clock, which is ambiguous around DST.
+        self._timestamps: list[float] = []
+        self._boundaries: list[datetime] = []
+
+    def floor(self, moment: datetime) -> datetime:
+        """Return the start of the period containing moment."""
+        if self._fixed:
+            return self._fixed.floor(moment)
+        if self.pattern == FOREVER:
+            return moment
+        index = self._index(moment)
+        return self._boundaries[index - 1]
+
+    def next(self, moment: datetime) -> datetime:
+        """Return the first boundary after moment."""
+        if self._fixed:
+            return self._fixed.next(moment)
+        if self.pattern == FOREVER:
+            return datetime.max.replace(tzinfo=moment.tzinfo)
+        index = self._index(moment)
+        return self._boundaries[index]
+
+    def _index(self, moment: datetime) -> int:
+        """Return the index of the first cached boundary after moment."""
+        timestamp = moment.timestamp()
+        if not self._timestamps or timestamp < self._timestamps[0]:
+            self._calculate(moment)
+        elif timestamp >= self._timestamps[-1]:
+            self._extend(moment, timestamp)
+        return bisect_right(self._timestamps, timestamp)
+
+    def _calculate(self, moment: datetime) -> None:
+        """Calculate the boundaries from the start of the period containing moment."""
+        from croniter import croniter  # pylint: disable=import-outside-toplevel
+
+        # get_prev excludes moment itself, which then is the first next boundary
+        start = croniter(self.pattern, moment).get_prev(datetime)
+        self._boundaries = [start, *self._following(start)]
+        self._timestamps = [boundary.timestamp() for boundary in self._boundaries]
+
+    def _extend(self, moment: datetime, timestamp: float) -> None:
+        """Add the boundaries following the cached ones, until there is one after moment."""
+        following = self._following(self._boundaries[-1])
+        if timestamp >= following[-1].timestamp():
+            # moment is far ahead, e.g. after downtime
+            self._calculate(moment)
+            return
+        self._boundaries = [self._boundaries[-1], *following]
+        self._timestamps = [self._timestamps[-1], *(boundary.timestamp() for boundary in following)]
+
+    def _following(self, boundary: datetime) -> list[datetime]:
+        """Return the BOUNDARY_CACHE_SIZE boundaries after a boundary."""
+        from croniter import croniter  # pylint: disable=import-outside-toplevel
+
+        cron = croniter(self.pattern, boundary)
+        return [cron.get_next(datetime) for _ in range(BOUNDARY_CACHE_SIZE)]
+
+
+class PeriodRegistry:
+    """Schedules by pattern and time zone, so each boundary is calculated once for all periods."""
+
+    def __init__(self) -> None:
+        """Initialize the registry."""
+        self._schedules: dict[tuple[str, tzinfo | None], PeriodSchedule] = {}
+
+    def schedule(self, pattern: str, tz: tzinfo | None) -> PeriodSchedule:
+        """Return the schedule of a pattern in a time zone."""
+        key = (pattern, tz)
+        if (schedule := self._schedules.get(key)) is None:
+            schedule = self._schedules[key] = PeriodSchedule(pattern, tz)
+        return schedule
+
+
+@callback
+def async_get_period_registry(hass: HomeAssistant) -> PeriodRegistry:
+    """Return the period registry shared by all MeasureIt sensors."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (registry := domain_data.get(PERIOD_REGISTRY)) is None:
+        registry = domain_data[PERIOD_REGISTRY] = PeriodRegistry()
+    return registry
 
 
 class Period:
-    """Implement a Period."""
+    """Implement a Period.
+
+    The boundaries come from a schedule, which can be shared with other periods.
+    Start, end and last reset are kept per period, as the end can be moved by a
+    manual reset.
+    """
 
-    def __init__(self, start_pattern: str, tznow: datetime) -> None:
+    __slots__ = ("_schedule", "start", "end", "last_reset")
+
+    def __init__(
+        self, start_pattern: str, tznow: datetime, schedule: PeriodSchedule | None = None
+    ) -> None:
         """Initialize period."""
-        self._start_pattern: str = start_pattern
-        if start_pattern == "none":
-            self.start: datetime = tznow
-        else:
-            self.start: datetime = croniter(self._start_pattern, tznow).get_prev(datetime)
+        self._schedule: PeriodSchedule = schedule or PeriodSchedule(
+            start_pattern, tznow.tzinfo
+        )
 
-        self.end: datetime = self._determine_end()
+        self.start: datetime = self._schedule.floor(tznow)
+        self.end: datetime = self._schedule.next(self.start)
         self.last_reset: datetime = tznow
 
+    @property
+    def start_pattern(self) -> str:
+        """The cron pattern at which a new period starts."""
+        return self._schedule.pattern
+
     def update(self, tznow: datetime, reset_func: Callable, input_value: float):
         """Update a period with the current time."""
-        if self.end <= tznow:
+        if reached(self.end, tznow):
             self.last_reset = tznow
             self.start = self.end
-            self.end = self._determine_end()
+            self.end = self._schedule.next(self.start)
             reset_func(input_value)
 
-    def _determine_end(self) -> datetime:
-        """Determine the end of the period."""
-        if self._start_pattern == "none":
-            return datetime.max.replace(tzinfo=self.start.tzinfo)
-        return croniter(self._start_pattern, self.start).get_next(datetime)
+            if reached(self.end, tznow):
+                # More than one period has passed, e.g. after downtime. Jump straight
+                # to the period containing tznow. Nothing was measured in the periods
+                # in between, so they are closed with a second reset.
+                self.start = self._schedule.floor(tznow)
+                self.end = self._schedule.next(self.start)
+                reset_func(input_value)
@@ -3,9 +3,12 @@ from datetime import datetime
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ReadingData:
-    """Class containing data for a specific reading."""
+    """Class containing data for a specific reading.
+
+    A reading is created once per update and shared by all listeners, so it is immutable.
+    """
 
     reading_datetime: datetime = None
     template_active: bool = None
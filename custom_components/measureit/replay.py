@@ -0,0 +1,254 @@
+"""Offline replay of recorded data through the MeasureIt meters.
+
+Runs a configuration against rows of (timestamp, source_state, condition_result)
+from a CSV or JSONL file, without Home Assistant running, and prints the total
+of every period:
+
+    python -m custom_components.measureit.replay options.json data.csv
+
+The options are those of a config entry. Time is taken from the rows, so the
+replay is as fast as the meters are. Like the coordinator, the meters are also
+updated at every period end and when the time window opens or closes. Source
+readings go through the input filter of the configuration.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import sys
+from collections.abc import Iterable
+from collections.abc import Iterator
+from datetime import datetime
+from datetime import tzinfo
+from typing import Any
+from typing import TextIO
+
+from homeassistant.util import dt as dt_util
+
+from .const import CONF_CONFIG_NAME
+from .const import CONF_CRON
+from .const import CONF_METER_TYPE
+from .const import CONF_PERIOD
+from .const import CONF_SENSOR
+from .const import CONF_SENSOR_NAME
+from .const import CONF_TW_DAYS
+from .const import CONF_TW_FROM
+from .const import CONF_TW_TILL
+from .const import METER_TYPE_TIME
+from .history import PeriodHistory
+from .input_filter import InputFilter
+from .input_filter import create_input_filter
+from .meter import Meter
+from .meter import RollingMeter
+from .meter import create_meter
+from .period import Period
+from .period import PeriodRegistry
+from .reading import ReadingData
+from .time_window import TimeWindow
+from .util import parse_value
+
+# The rows of a replay: timestamp, source state and condition result.
+Row = tuple[datetime, Any, bool]
+# The total of a period: start, end and value. The end of the open period is None.
+PeriodTotal = tuple[datetime, datetime | None, float]
+
+_TRUE = {"1", "true", "on", "yes", ""}
+
+
+class Replay:
+    """Replays rows through the meters of a configuration, using the time of the rows as clock."""
+
+    def __init__(self, options: dict[str, Any]) -> None:
+        """Initialize the replay."""
+        self._options: dict[str, Any] = options
+        self._time_meter: bool = options[CONF_METER_TYPE] == METER_TYPE_TIME
+        self._input_filter: InputFilter | None = None if self._time_meter else create_input_filter(options)
+        self._time_window: TimeWindow = TimeWindow(
+            options[CONF_TW_DAYS], options[CONF_TW_FROM], options[CONF_TW_TILL]
+        )
+        self._meters: list[Meter] = []
+        self._totals: dict[str, list[PeriodTotal]] = {}
+        self._last_reading: float | None = None
+        self._condition: bool = True
+        self._next_event: datetime | None = None
+
+    def _start(self, tznow: datetime) -> None:
+        """Create the meters with periods starting at the first row."""
+        registry = PeriodRegistry()
+        for sensor in self._options[CONF_SENSOR]:
+            period = Period(
+                sensor[CONF_CRON], tznow, registry.schedule(sensor[CONF_CRON], tznow.tzinfo)
+            )
+            meter = create_meter(
+                f"{self._options[CONF_CONFIG_NAME]}_{sensor[CONF_SENSOR_NAME]}",
+                period,
+                sensor.get(CONF_PERIOD),
+            )
+            # big enough for a catch-up, the closed periods are collected after each update
+            meter.history = PeriodHistory(2, period.start)
+            self._meters.append(meter)
+            self._totals[meter.name] = []
+        self._schedule(tznow)
+
+    def feed(self, tznow: datetime, source_state: Any, condition: bool = True) -> None:
+        """Update the meters with a row."""
+        if not self._meters:
+            self._start(tznow)
+        while self._next_event is not None and self._next_event <= tznow:
+            # period end or time window edge before this row, with the last known values
+            event = self._next_event
+            if self._time_meter:
+                self._update(event, event.timestamp())
+            elif self._last_reading is not None:
+                self._update(event, self._last_reading)
+                if self._input_filter is not None:
+                    self._input_filter.mark(self._last_reading, event.timestamp())
+            self._schedule(event)
+
+        self._condition = condition
+        if self._time_meter:
+            self._update(tznow, tznow.timestamp())
+            return
+        try:
+            value = parse_value(source_state)
+        except ValueError:
+            if self._last_reading is None:
+                return
+        else:
+            if self._input_filter is not None:
+                value = self._input_filter.smooth(value)
+                if not self._input_filter.passes(value, tznow.timestamp()):
+                    self._last_reading = value
+                    return
+            self._last_reading = value
+        self._update(tznow, self._last_reading)
+
+    def _update(self, tznow: datetime, value: float) -> None:
+        reading = ReadingData(tznow, self._condition, self._time_window.is_active(tznow), value)
+        for meter in self._meters:
+            closed = meter.history.closed
+            meter.on_update(reading)
+            if meter.history.closed != closed:
+                self._totals[meter.name].extend(
+                    (start, end, total)
+                    for total, start, end in meter.history.newest(meter.history.closed - closed)
+                )
+
+    def _schedule(self, tznow: datetime) -> None:
+        """Find the first period end or time window edge after tznow."""
+        events = [
+            meter.next_reset
+            for meter in self._meters
+            if meter.next_reset > tznow and meter.next_reset.year < 9999
+        ]
+        events.append(self._time_window.next_transition(tznow))
+        self._next_event = min((event for event in events if event is not None), default=None)
+
+    def totals(self) -> dict[str, list[PeriodTotal]]:
+        """Return the totals of the closed periods and the period that is still open per sensor."""
+        totals = {}
+        for meter in self._meters:
+            if isinstance(meter, RollingMeter):
+                # a rolling meter never closes a period, its total is that of the last window
+                opened = meter.last_reset
+            else:
+                opened = dt_util.utc_from_timestamp(meter.history.opened)
+            totals[meter.name] = [*self._totals[meter.name], (opened, None, meter.measured_value)]
+        return totals
+
+
+def read_csv(stream: TextIO, tz: tzinfo) -> Iterator[Row]:
+    """Read rows from CSV with a timestamp, source_state and optional condition_result column."""
+    for record in csv.DictReader(stream):
+        yield (
+            _parse_timestamp(record["timestamp"], tz),
+            record.get("source_state"),
+            (record.get("condition_result") or "").strip().lower() in _TRUE,
+        )
+
+
+def read_jsonl(stream: TextIO, tz: tzinfo) -> Iterator[Row]:
+    """Read rows from JSON lines with a timestamp, source_state and optional condition_result key."""
+    for line in stream:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        condition = record.get("condition_result", True)
+        if isinstance(condition, str):
+            condition = condition.strip().lower() in _TRUE
+        yield (
+            _parse_timestamp(record["timestamp"], tz),
+            record.get("source_state"),
+            bool(condition),
+        )
+
+
+def _parse_timestamp(value: Any, tz: tzinfo) -> datetime:
+    """Parse a POSIX timestamp or ISO 8601 datetime, which is in tz when it has no time zone."""
+    if isinstance(value, int | float):
+        return datetime.fromtimestamp(value, tz)
+    try:
+        return datetime.fromtimestamp(float(value), tz)
+    except ValueError:
+        moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=tz)
+    return moment.astimezone(tz)
+
+
+def replay(options: dict[str, Any], rows: Iterable[Row]) -> dict[str, list[PeriodTotal]]:
+    """Replay rows through the meters of a configuration and return the totals per period."""
+    engine = Replay(options)
+    feed = engine.feed
+    for tznow, source_state, condition in rows:
+        feed(tznow, source_state, condition)
+    return engine.totals()
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Replay a file and print the totals as CSV."""
+    parser = argparse.ArgumentParser(
+        prog="python -m custom_components.measureit.replay", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument("options", help="JSON file with the options of a MeasureIt config entry")
+    parser.add_argument("data", help="CSV or JSONL file with the rows, - for stdin")
+    parser.add_argument(
+        "--format", choices=("csv", "jsonl"), help="format of the data, by default its extension"
+    )
+    parser.add_argument(
+        "--time-zone", default="UTC", help="time zone of the periods and of timestamps without one"
+    )
+    args = parser.parse_args(argv)
+
+    if (tz := dt_util.get_time_zone(args.time_zone)) is None:
+        parser.error(f"unknown time zone {args.time_zone}")
+    with open(args.options, encoding="utf-8") as options_file:
+        options = json.load(options_file)
+    data_format = args.format or ("jsonl" if args.data.endswith((".jsonl", ".json")) else "csv")
+    reader = read_jsonl if data_format == "jsonl" else read_csv
+
+    data_file = sys.stdin if args.data == "-" else open(args.data, encoding="utf-8", newline="")
+    try:
+        totals = replay(options, reader(data_file, tz))
+    finally:
+        if data_file is not sys.stdin:
+            data_file.close()
+
+    writer = csv.writer(sys.stdout)
+    writer.writerow(("sensor", "start", "end", "value"))
+    for name, periods in totals.items():
+        for start, end, value in periods:
+            writer.writerow(
+                (
+                    name,
+                    start.astimezone(tz).isoformat(),
+                    end.astimezone(tz).isoformat() if end else "",
+                    value,
+                )
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""Rolling windows for MeasureIt meters."""
+from __future__ import annotations
+
+from array import array
+from datetime import datetime
+from datetime import timedelta
+from math import fsum
+
+
+class RollingWindow:
+    """Total of the deltas within a sliding time window.
+
+    The deltas are kept in a ring of buckets of a fixed length, so adding a
+    delta and expiring a bucket are both O(1). Bucket boundaries are aligned
+    to the epoch, so they do not depend on when the window was created.
+    """
+
+    __slots__ = ("_bucket_seconds", "_buckets", "_bucket", "total")
+
+    def __init__(self, window: timedelta, bucket: timedelta) -> None:
+        """Initialize the window."""
+        self._bucket_seconds: float = bucket.total_seconds()
+        self._buckets: array[float] = _zeros(int(window / bucket))
+        self._bucket: int | None = None  # number of the newest bucket
+        self.total: float = 0.0
+
+    def advance(self, moment: datetime) -> bool:
+        """Move the window up to moment, return whether buckets with a value expired."""
+        bucket = int(moment.timestamp() // self._bucket_seconds)
+        if self._bucket is None:
+            self._bucket = bucket
+            return False
+        if bucket <= self._bucket:
+            return False
+
+        buckets = self._buckets
+        size = len(buckets)
+        changed = False
+        if bucket - self._bucket >= size:
+            changed = self.total != 0
+            self.clear()
+        else:
+            for number in range(self._bucket + 1, bucket + 1):
+                slot = number % size
+                if value := buckets[slot]:
+                    buckets[slot] = 0.0
+                    self.total -= value
+                    changed = True
+                if slot == 0:
+                    # once per round, so the running total does not drift
+                    self.total = fsum(buckets)
+        self._bucket = bucket
+        return changed
+
+    def add(self, delta: float) -> None:
+        """Add a delta to the newest bucket."""
+        if self._bucket is None:
+            raise ValueError("The window needs to be advanced before adding to it.")
+        self._buckets[self._bucket % len(self._buckets)] += delta
+        self.total += delta
+
+    def clear(self) -> None:
+        """Empty all buckets."""
+        self._buckets = _zeros(len(self._buckets))
+        self.total = 0.0
+
+    def as_dict(self) -> dict[str, int | list[float] | None]:
+        """Return the buckets to be stored."""
+        return {"bucket": self._bucket, "values": self._buckets.tolist()}
+
+    def restore(self, stored: dict[str, int | list[float] | None]) -> None:
+        """Restore stored buckets, they are ignored when the number of buckets changed."""
+        values = stored["values"]
+        if len(values) != len(self._buckets):
+            return
+        self._buckets = array("d", values)
+        self._bucket = stored["bucket"]
+        self.total = fsum(self._buckets)
+
+
+def _zeros(size: int) -> array[float]:
+    return array("d", bytes(8 * size))
@@ -0,0 +1,149 @@
+"""Shared rollover scheduler for MeasureIt meters."""
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from functools import partial
+from collections.abc import Callable
+
+from homeassistant.core import CALLBACK_TYPE
+from homeassistant.core import HomeAssistant
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.event import async_track_point_in_utc_time
+
+from .const import DOMAIN
+from .const import ROLLOVER_SCHEDULER
+
+# Spread state writes are grouped in slices of this many seconds.
+WRITE_SLICE_INTERVAL = 1
+_LOGGER: logging.Logger = logging.getLogger(__name__)
+
+
+class RolloverScheduler:
+    """Run the period rollovers that share a boundary in one pass, and spread their state writes.
+
+    There is a single timer per boundary, however many coordinators track it.
+    State writes that are queued during a rollover are spread evenly over the
+    window of each write, so thousands of sensors resetting at midnight do not
+    all write their state in the same tick.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the scheduler."""
+        self._hass: HomeAssistant = hass
+        self._boundaries: dict[datetime, dict[CALLBACK_TYPE, Callable[[datetime], None]]] = {}
+        self._timers: dict[datetime, CALLBACK_TYPE] = {}
+        self._queued_writes: dict[CALLBACK_TYPE, tuple[Callable[[], None], float]] = {}
+        self._scheduled_writes: dict[CALLBACK_TYPE, _WriteSlice] = {}
+        self._spread_scheduled: bool = False
+
+    @callback
+    def async_track_boundary(
+        self, boundary: datetime, rollover_callback: Callable[[datetime], None]
+    ) -> CALLBACK_TYPE:
+        """Call rollover_callback with the boundary once it is reached, return a function to untrack."""
+
+        @callback
+        def untrack() -> None:
+            """Remove the callback and cancel the timer when it was the last one for the boundary."""
+            if (subscribers := self._boundaries.get(boundary)) is None:
+                return
+            subscribers.pop(untrack, None)
+            if not subscribers:
+                del self._boundaries[boundary]
+                self._timers.pop(boundary)()
+
+        if (subscribers := self._boundaries.get(boundary)) is None:
+            subscribers = self._boundaries[boundary] = {}
+            self._timers[boundary] = async_track_point_in_utc_time(
+                self._hass, partial(self._async_on_boundary, boundary), boundary
+            )
+        subscribers[untrack] = rollover_callback
+        return untrack
+
+    @callback
+    def _async_on_boundary(self, boundary: datetime, _utcnow: datetime) -> None:
+        """Roll over everything that tracks the boundary."""
+        self._timers.pop(boundary, None)
+        subscribers = self._boundaries.pop(boundary, {})
+        _LOGGER.debug("Rolling over %s coordinators at %s", len(subscribers), boundary)
+        for rollover_callback in subscribers.values():
+            rollover_callback(boundary)
+
+    @callback
+    def async_queue_write(self, write: Callable[[], None], window: float) -> CALLBACK_TYPE:
+        """Queue a state write to be done within window seconds, return a function to cancel it.
+
+        All writes queued in the same iteration of the event loop are spread
+        evenly over their window.
+        """
+
+        @callback
+        def cancel() -> None:
+            """Drop the write, and its timer when it was the last write of its slice."""
+            self._queued_writes.pop(cancel, None)
+            if (write_slice := self._scheduled_writes.pop(cancel, None)) is not None:
+                write_slice.writes.pop(cancel, None)
+                if not write_slice.writes and write_slice.timer:
+                    write_slice.timer()
+                    write_slice.timer = None
+
+        self._queued_writes[cancel] = (write, window)
+        if not self._spread_scheduled:
+            self._spread_scheduled = True
+            self._hass.loop.call_soon(self._async_spread_writes)
+        return cancel
+
+    @callback
+    def _async_spread_writes(self) -> None:
+        """Divide the queued writes over slices within their window."""
+        self._spread_scheduled = False
+        count = len(self._queued_writes)
+        slices: dict[int, _WriteSlice] = {}
+        for index, (cancel, (write, window)) in enumerate(self._queued_writes.items()):
+            slice_index = int(window * index / count / WRITE_SLICE_INTERVAL)
+            if (write_slice := slices.get(slice_index)) is None:
+                write_slice = slices[slice_index] = _WriteSlice()
+            write_slice.writes[cancel] = write
+            self._scheduled_writes[cancel] = write_slice
+        self._queued_writes.clear()
+
+        for slice_index, write_slice in slices.items():
+            if slice_index == 0:
+                self._async_write_slice(write_slice)
+            else:
+                write_slice.timer = async_call_later(
+                    self._hass,
+                    slice_index * WRITE_SLICE_INTERVAL,
+                    partial(self._async_write_slice, write_slice),
+                )
+
+    @callback
+    def _async_write_slice(self, write_slice: _WriteSlice, _now: datetime | None = None) -> None:
+        """Do the writes of a slice."""
+        write_slice.timer = None
+        writes = write_slice.writes
+        for cancel, write in list(writes.items()):
+            if writes.pop(cancel, None) is not None:
+                del self._scheduled_writes[cancel]
+                write()
+
+
+class _WriteSlice:
+    """State writes that are done together."""
+
+    __slots__ = ("writes", "timer")
+
+    def __init__(self) -> None:
+        self.writes: dict[CALLBACK_TYPE, Callable[[], None]] = {}
+        self.timer: CALLBACK_TYPE | None = None
+
+
+@callback
+def async_get_rollover_scheduler(hass: HomeAssistant) -> RolloverScheduler:
+    """Return the rollover scheduler shared by all MeasureIt coordinators."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (scheduler := domain_data.get(ROLLOVER_SCHEDULER)) is None:
+        scheduler = domain_data[ROLLOVER_SCHEDULER] = RolloverScheduler(hass)
+    return scheduler
@@ -3,6 +3,7 @@ from __future__ import annotations
 
 import logging
 from datetime import datetime
+from functools import partial
 from typing import Any
 from dataclasses import dataclass
 
@@ -12,14 +13,18 @@ from homeassistant.components.sensor import SensorStateClass, DOMAIN as SENSOR_D
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_UNIT_OF_MEASUREMENT
 from homeassistant.const import CONF_VALUE_TEMPLATE, CONF_UNIQUE_ID
+from homeassistant.const import EntityCategory
+from homeassistant.core import CALLBACK_TYPE
 from homeassistant.core import callback
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.restore_state import RestoreEntity, ExtraStoredData
 from homeassistant.util import dt as dt_util
 
 
 from .period import Period
+from .period import async_get_period_registry
 from .reading import ReadingData
 
 from .const import (
@@ -28,18 +33,38 @@ from .const import (
     CONF_CRON,
     CONF_SENSOR,
     CONF_SENSOR_NAME,
+    CONF_HISTORY_SIZE,
+    CONF_IMPORT_STATISTICS,
+    CONF_PERIOD,
+    CONF_ROLLOVER_WINDOW,
+    CONF_STATISTICS,
+    CONF_WRITE_INTERVAL,
+    DEFAULT_HISTORY_SIZE,
+    DEFAULT_ROLLOVER_WINDOW,
+    DEFAULT_WRITE_INTERVAL,
     DOMAIN,
     SOURCE_ENTITY_ID,
 )
+from .const import ATTR_DELTA_STATISTICS
 from .const import ATTR_PREV
+from .const import ATTR_READING_STATISTICS
 from .const import ATTR_STATUS
 from .const import CONF_METER_TYPE
 from .const import COORDINATOR
 from .const import DOMAIN_DATA
 from .const import ICON
+from .const import METER_TYPE_SOURCE
 from .const import METER_TYPE_TIME
 from .coordinator import MeasureItCoordinator
+from .heartbeat import async_get_heartbeat
+from .history import async_get_history_store
 from .meter import Meter
+from .meter import MeterState
+from .meter import RollingMeter
+from .meter import create_meter
+from .rollover import async_get_rollover_scheduler
+from .statistics_import import async_get_statistics_importer
+from .stats import MeterStats
 from .util import create_renderer
 
 
@@ -56,19 +81,42 @@ async def async_setup_entry(
     meter_type: str = config_entry.options[CONF_METER_TYPE]
     _LOGGER.debug("Options: %s", config_entry.options)
     config_name: str = config_entry.options[CONF_CONFIG_NAME]
+    write_interval: float = config_entry.options.get(
+        CONF_WRITE_INTERVAL, DEFAULT_WRITE_INTERVAL
+    )
+    rollover_window: float = config_entry.options.get(
+        CONF_ROLLOVER_WINDOW, DEFAULT_ROLLOVER_WINDOW
+    )
+    history_size = int(config_entry.options.get(CONF_HISTORY_SIZE, DEFAULT_HISTORY_SIZE))
+    import_statistics: bool = config_entry.options.get(CONF_IMPORT_STATISTICS, False)
+    statistics: bool = config_entry.options.get(CONF_STATISTICS, False)
 
     coordinator = hass.data[DOMAIN_DATA][entry_id][COORDINATOR]
     source_entity_id = hass.data[DOMAIN_DATA][entry_id].get(SOURCE_ENTITY_ID)
 
     sensors: list[MeasureItSensor] = []
+    period_registry = async_get_period_registry(hass)
+    history_store = async_get_history_store(hass)
+    await history_store.async_load()
+    tznow = dt_util.now()
 
     for sensor in config_entry.options[CONF_SENSOR]:
         value_template_renderer = None
         unique_id = sensor.get(CONF_UNIQUE_ID)
         sensor_name = f"{config_name}_{sensor[CONF_SENSOR_NAME]}"
 
-        period = Period(sensor[CONF_CRON], dt_util.now())
-        meter = Meter(f"{config_name}_{sensor[CONF_SENSOR_NAME]}", period)
+        period = Period(
+            sensor[CONF_CRON],
+            tznow,
+            period_registry.schedule(sensor[CONF_CRON], tznow.tzinfo),
+        )
+        meter = create_meter(sensor_name, period, sensor.get(CONF_PERIOD))
+        if not isinstance(meter, RollingMeter):
+            meter.history = history_store.async_history(
+                unique_id or sensor_name, history_size, period.start
+            )
+        if meter_type == METER_TYPE_SOURCE and statistics:
+            meter.stats = MeterStats()
 
         value_template_renderer = create_renderer(hass, sensor.get(CONF_VALUE_TEMPLATE))
 
@@ -81,13 +129,42 @@ async def async_setup_entry(
             value_template_renderer,
             sensor.get(CONF_UNIT_OF_MEASUREMENT),
             source_entity_id,
+            write_interval,
+            rollover_window,
+            import_statistics,
         )
         sensors.append(sensor_entity)
         hass.data[DOMAIN][SENSOR_DOMAIN].update(
             {f"{SENSOR_DOMAIN}.{sensor_name}": sensor_entity}
         )
 
-    async_add_entities(sensors)
+    async_add_entities(
+        [*sensors, MeasureItMetricsSensor(coordinator, entry_id, config_name)]
+    )
+
+
+@callback
+def async_reset_sensors(sensors: list[MeasureItSensor], reset_datetime: datetime) -> None:
+    """Reset sensors at the given time.
+
+    All meters are updated first, then each coordinator reschedules once and the
+    states are written in one go.
+    """
+    coordinators: set[MeasureItCoordinator] = set()
+    for sensor in sensors:
+        _LOGGER.info("Resetting sensor %s at %s", sensor.name, reset_datetime)
+        sensor.meter.next_reset = reset_datetime
+        coordinators.add(sensor._coordinator)
+    for coordinator in coordinators:
+        coordinator.async_reschedule()
+    for sensor in sensors:
+        if sensor.hass is not None:
+            sensor._async_write_now()
+
+
+# Version of the stored meter data, see MeasureItMeterStoredData.as_dict.
+STORED_DATA_VERSION = 2
+
 
 def temp_parse_timestamp_or_string(timestamp_or_string: str) -> datetime:
     """Parse a timestamp or string into a datetime object."""
@@ -100,6 +177,21 @@ def temp_parse_timestamp_or_string(timestamp_or_string: str) -> datetime:
         except OverflowError:
             return datetime.max.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
 
+
+def _timestamp_or_none(value: datetime) -> float | None:
+    """Return the POSIX timestamp of a datetime, or None for a period that never ends."""
+    if value.year == datetime.max.year:
+        return None
+    return value.timestamp()
+
+
+def _from_timestamp_or_none(value: float | None) -> datetime:
+    """Return the local datetime of a stored timestamp, where None means forever."""
+    if value is None:
+        return datetime.max.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    return datetime.fromtimestamp(value, dt_util.DEFAULT_TIME_ZONE)
+
+
 @dataclass
 class MeasureItMeterStoredData(ExtraStoredData):
     """Object to hold meter data to be stored."""
@@ -111,26 +203,49 @@ class MeasureItMeterStoredData(ExtraStoredData):
     start_measured_value: float | None = None
     period_last_reset: datetime | None = None
     period_end: datetime | None = None
+    rolling_window: dict[str, Any] | None = None
+    stats: dict[str, Any] | None = None
 
     def as_dict(self) -> dict[str, Any]:
-        """Return a dict representation of the meter data."""
+        """Return a dict representation of the meter data.
 
-        _LOGGER.debug("Persisting meter data")
-
-        data = {
+        Datetimes are stored as POSIX timestamps, so they can be restored
+        without parsing. A period that never ends is stored as None.
+        """
+        return {
+            "version": STORED_DATA_VERSION,
             "measured_value": self.measured_value,
             "start_measured_value": self.start_measured_value,
             "prev_measured_value": self.prev_measured_value,
             "session_start_reading": self.session_start_reading,
-            "period_last_reset": self.period_last_reset.isoformat(),
-            "period_end": self.period_end.isoformat(),
+            "period_last_reset": self.period_last_reset.timestamp(),
+            "period_end": _timestamp_or_none(self.period_end),
             "state": self.state,
+            "rolling_window": self.rolling_window,
+            "stats": self.stats,
         }
-        return data
 
     @classmethod
     def from_dict(cls, restored: dict[str, Any]) -> MeasureItMeterStoredData | None:
         """Initialize a stored sensor state from a dict."""
+        if restored.get("version") != STORED_DATA_VERSION:
+            return cls._from_legacy_dict(restored)
+
+        return cls(
+            restored["state"],
+            restored["measured_value"],
+            restored["prev_measured_value"],
+            restored["session_start_reading"],
+            restored["start_measured_value"],
+            datetime.fromtimestamp(restored["period_last_reset"], dt_util.DEFAULT_TIME_ZONE),
+            _from_timestamp_or_none(restored["period_end"]),
+            restored.get("rolling_window"),
+            restored.get("stats"),
+        )
+
+    @classmethod
+    def _from_legacy_dict(cls, restored: dict[str, Any]) -> MeasureItMeterStoredData | None:
+        """Initialize a stored sensor state from the unversioned format with ISO strings."""
 
         try:
             measured_value = restored["measured_value"]
@@ -158,6 +273,9 @@ class MeasureItMeterStoredData(ExtraStoredData):
 class MeasureItSensor(RestoreEntity, SensorEntity):
     """MeasureIt Sensor Entity."""
 
+    # the statistics change with every update, the recorder would store each version
+    _unrecorded_attributes = frozenset({ATTR_DELTA_STATISTICS, ATTR_READING_STATISTICS})
+
     def __init__(
         self,
         coordinator,
@@ -168,6 +286,9 @@ class MeasureItSensor(RestoreEntity, SensorEntity):
         value_template_renderer,
         unit_of_measurement,
         source_entity_id=None,
+        write_interval=DEFAULT_WRITE_INTERVAL,
+        rollover_window=DEFAULT_ROLLOVER_WINDOW,
+        import_statistics=False,
     ):
         """Initialize a sensor entity."""
         self._meter_type = meter_type
@@ -178,10 +299,22 @@ class MeasureItSensor(RestoreEntity, SensorEntity):
         self._attr_icon = ICON
         self._attr_extra_state_attributes = {}
         self._value_template_renderer = value_template_renderer
-        self._attr_state_class = SensorStateClass.TOTAL
+        # a rolling total goes up and down, without resets
+        self._attr_state_class = (
+            SensorStateClass.MEASUREMENT
+            if isinstance(meter, RollingMeter)
+            else SensorStateClass.TOTAL
+        )
         self._attr_native_unit_of_measurement = unit_of_measurement
         self._attr_should_poll = False
         self._source_entity_id = source_entity_id
+        self._write_interval: float = write_interval
+        self._rollover_window: float = rollover_window
+        self._import_statistics: bool = import_statistics
+        self._last_write: float | None = None
+        self._pending_write: CALLBACK_TYPE | None = None
+        self._rendered_prev: tuple[float, Any] | None = None
+        coordinator.metrics.register_sensor(sensor_name)
 
         if self._meter_type == METER_TYPE_TIME:
             self._attr_device_class = SensorDeviceClass.DURATION
@@ -195,47 +328,168 @@ class MeasureItSensor(RestoreEntity, SensorEntity):
                 self._attr_name,
                 last_meter_data,
             )
-            self.meter.state = last_meter_data.state
-            self.meter.measured_value = last_meter_data.measured_value
-            self.meter._start_measured_value = last_meter_data.start_measured_value
-            self.meter.prev_measured_value = last_meter_data.prev_measured_value
-            self.meter._session_start_reading = last_meter_data.session_start_reading
-            self.meter._period.last_reset = last_meter_data.period_last_reset
-            self.meter._period.end = last_meter_data.period_end
+            self.restore_meter(last_meter_data)
         else:
             _LOGGER.warning("%s # Could not restore data", self._attr_name)
 
         self.async_on_remove(
-            self._coordinator.async_add_listener(self._handle_coordinator_update)
+            self._coordinator.async_add_listener(
+                self._handle_coordinator_update, self.meter
+            )
         )
+        self.async_on_remove(self._async_cancel_pending_write)
+        if self.meter.history is not None:
+            self.async_on_remove(
+                partial(
+                    async_get_history_store(self.hass).async_release,
+                    self._attr_unique_id or self._attr_name,
+                )
+            )
+        if isinstance(self.meter, RollingMeter):
+            # deltas also leave the window when there are no readings
+            self.async_on_remove(
+                async_get_heartbeat(self.hass).async_subscribe(self._async_on_heartbeat)
+            )
+
+    async def async_removed_from_registry(self) -> None:
+        """Drop the history of the sensor when it is deleted, not just unloaded."""
+        if self.meter.history is not None:
+            async_get_history_store(self.hass).async_remove(self._attr_unique_id or self._attr_name)
+
+    def restore_meter(self, last_meter_data: MeasureItMeterStoredData) -> None:
+        """Restore the meter from the data of the last session."""
+        # stored as its string, which equals but is not a meter state
+        self.meter.state = MeterState(last_meter_data.state) if last_meter_data.state else None
+        self.meter.measured_value = last_meter_data.measured_value
+        self.meter._start_measured_value = last_meter_data.start_measured_value
+        self.meter.prev_measured_value = last_meter_data.prev_measured_value
+        self.meter._session_start_reading = last_meter_data.session_start_reading
+        self.meter._period.last_reset = last_meter_data.period_last_reset
+        self.meter._period.end = last_meter_data.period_end
+        if isinstance(self.meter, RollingMeter) and last_meter_data.rolling_window:
+            self.meter.window.restore(last_meter_data.rolling_window)
+        if self.meter.stats is not None and last_meter_data.stats:
+            self.meter.stats.restore(last_meter_data.stats)
 
     @property
     def extra_state_attributes(self) -> dict[str, str]:
         """Return the state attributes."""
         attributes = {
             ATTR_STATUS: self.meter.state,
-            ATTR_PREV: self._value_template_renderer(self.meter.prev_measured_value),
+            ATTR_PREV: self._render_prev_measured_value(),
             ATTR_NEXT_RESET: self.meter.next_reset,
         }
         if self._source_entity_id:
             attributes.update({SOURCE_ENTITY_ID: self._source_entity_id})
+        if (stats := self.meter.stats) is not None:
+            attributes[ATTR_DELTA_STATISTICS] = stats.deltas.summary()
+            attributes[ATTR_READING_STATISTICS] = stats.readings.summary()
         return attributes
 
+    def _render_prev_measured_value(self) -> Any:
+        """Render the value of the previous period, which only changes at a reset."""
+        prev_measured_value = self.meter.prev_measured_value
+        if self._rendered_prev is None or self._rendered_prev[0] != prev_measured_value:
+            self._rendered_prev = (
+                prev_measured_value,
+                self._value_template_renderer(prev_measured_value),
+            )
+        return self._rendered_prev[1]
+
     def reset(self, reset_datetime: datetime):
         """Reset the sensor."""
-        _LOGGER.info("Resetting sensor %s at %s", self._attr_name, reset_datetime)
-        self.meter.next_reset = reset_datetime
-        self.schedule_update_ha_state()
+        async_reset_sensors([self], reset_datetime)
 
     @callback
     def _handle_coordinator_update(self, reading: ReadingData) -> None:
         """Handle updated data from the coordinator."""
+        prev_state = self.meter.state
+        prev_last_reset = self.meter.last_reset
+        prev_closed = self.meter.history.closed if self.meter.history is not None else 0
         self.meter.on_update(reading)
-        self._attr_native_value = self._value_template_renderer(
-            self.meter.measured_value
+        native_value = self._value_template_renderer(self.meter.measured_value)
+        if self.meter.last_reset != prev_last_reset and self.meter.history is not None:
+            # the closed periods were added to the history
+            async_get_history_store(self.hass).async_schedule_save()
+            if self._import_statistics:
+                async_get_statistics_importer(self.hass).async_queue(
+                    self._attr_name,
+                    self._attr_native_unit_of_measurement,
+                    self.meter.history.newest(self.meter.history.closed - prev_closed),
+                )
+
+        if self.meter.state != prev_state:
+            # state transitions are always written right away
+            self._attr_native_value = native_value
+            self._async_write_now()
+        elif self.meter.last_reset != prev_last_reset:
+            self._attr_native_value = native_value
+            self._async_write_rollover()
+        elif native_value != self._attr_native_value:
+            self._attr_native_value = native_value
+            self._async_write_coalesced()
+
+    @callback
+    def async_write_measured_value(self) -> None:
+        """Write the state after the meter was changed from outside, e.g. by a backfill."""
+        self._attr_native_value = self._value_template_renderer(self.meter.measured_value)
+        self._async_write_now()
+
+    @callback
+    def _async_on_heartbeat(self, tznow: datetime) -> None:
+        """Expire the buckets of a rolling meter that moved out of its window."""
+        if self.meter.expire(tznow):
+            self._attr_native_value = self._value_template_renderer(self.meter.measured_value)
+            self._async_write_coalesced()
+
+    @callback
+    def _async_write_coalesced(self) -> None:
+        """Write the state, but at most once per write interval."""
+        if self._pending_write:
+            return  # the pending write will pick up the latest value
+        now = self.hass.loop.time()
+        if (
+            not self._write_interval
+            or self._last_write is None
+            or now - self._last_write >= self._write_interval
+        ):
+            self._async_write_now()
+            return
+        self._pending_write = async_call_later(
+            self.hass,
+            self._write_interval - (now - self._last_write),
+            self._async_on_pending_write,
         )
+
+    @callback
+    def _async_write_rollover(self) -> None:
+        """Write the state after a period reset, spread with the other resets over the rollover window."""
+        if not self._rollover_window:
+            self._async_write_now()
+            return
+        self._async_cancel_pending_write()
+        self._pending_write = async_get_rollover_scheduler(self.hass).async_queue_write(
+            self._async_write_now, self._rollover_window
+        )
+
+    @callback
+    def _async_on_pending_write(self, _now: datetime) -> None:
+        self._pending_write = None
+        self._async_write_now()
+
+    @callback
+    def _async_write_now(self) -> None:
+        self._async_cancel_pending_write()
+        self._last_write = self.hass.loop.time()
+        self._coordinator.metrics.state_writes[self._attr_name] += 1
         self.async_write_ha_state()
 
+    @callback
+    def _async_cancel_pending_write(self) -> None:
+        if self._pending_write:
+            self._pending_write()
+            self._pending_write = None
+
     @property
     def extra_restore_state_data(self) -> MeasureItMeterStoredData:
         """Return sensor specific state data to be restored."""
@@ -248,6 +502,8 @@ class MeasureItSensor(RestoreEntity, SensorEntity):
             self.meter._start_measured_value,
             self.meter._period.last_reset,
             self.meter._period.end,
+            self.meter.window.as_dict() if isinstance(self.meter, RollingMeter) else None,
+            self.meter.stats.as_dict() if self.meter.stats is not None else None,
         )
 
     async def async_get_last_sensor_data(self) -> MeasureItMeterStoredData | None:
@@ -255,3 +511,31 @@ class MeasureItSensor(RestoreEntity, SensorEntity):
         if (restored_last_extra_data := await self.async_get_last_extra_data()) is None:
             return None
         return MeasureItMeterStoredData.from_dict(restored_last_extra_data.as_dict())
+
+
+class MeasureItMetricsSensor(SensorEntity):
+    """Diagnostic sensor with the runtime metrics of a coordinator."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_icon = "mdi:chart-timeline-variant"
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_native_unit_of_measurement = "readings"
+
+    def __init__(self, coordinator: MeasureItCoordinator, entry_id: str, config_name: str):
+        """Initialize a metrics sensor entity."""
+        self._coordinator: MeasureItCoordinator = coordinator
+        self._attr_name = f"{config_name}_metrics"
+        self._attr_unique_id = f"{entry_id}_metrics"
+
+    @property
+    def native_value(self) -> int:
+        """Return the number of processed readings."""
+        return self._coordinator.metrics.readings
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the other metrics."""
+        metrics = self._coordinator.metrics.as_dict()
+        metrics.pop("readings")
+        return metrics
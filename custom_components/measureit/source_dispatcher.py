@@ -0,0 +1,101 @@
+"""Shared dispatcher of source entity state changes for MeasureIt."""
+from __future__ import annotations
+
+from collections.abc import Callable
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import CALLBACK_TYPE
+from homeassistant.core import Event
+from homeassistant.core import HomeAssistant
+from homeassistant.core import callback
+
+from .const import DOMAIN
+from .const import SOURCE_DISPATCHER
+from .util import NumberType
+from .util import parse_value
+
+# Called with the parsed value or the parse error, and the state itself.
+SourceCallback = Callable[[NumberType | None, Exception | None, str | None], None]
+
+
+class SourceDispatcher:
+    """Track the source entities and hand the parsed value to all their coordinators.
+
+    State changed events in which the state of a source did not change, e.g.
+    when only its attributes changed, are filtered out by the event bus
+    before they are dispatched. A state that parses to the same value as the
+    last one, e.g. "10.0" after "10", is not handed to the coordinators either.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the dispatcher."""
+        self._hass: HomeAssistant = hass
+        self._subscribers: dict[str, dict[CALLBACK_TYPE, SourceCallback]] = {}
+        self._last_values: dict[str, NumberType] = {}
+        self._bus_listener: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_subscribe(self, entity_id: str, source_callback: SourceCallback) -> CALLBACK_TYPE:
+        """Subscribe to parsed state changes of an entity and return a function to unsubscribe."""
+
+        @callback
+        def unsubscribe() -> None:
+            """Remove the subscriber and stop tracking the entity when it was the last one."""
+            subscribers = self._subscribers.get(entity_id, {})
+            subscribers.pop(unsubscribe, None)
+            if not subscribers:
+                self._subscribers.pop(entity_id, None)
+                self._last_values.pop(entity_id, None)
+            if not self._subscribers and self._bus_listener is not None:
+                self._bus_listener()
+                self._bus_listener = None
+
+        self._subscribers.setdefault(entity_id, {})[unsubscribe] = source_callback
+        if self._bus_listener is None:
+            self._bus_listener = self._hass.bus.async_listen(
+                EVENT_STATE_CHANGED,
+                self._async_on_state_change,
+                event_filter=self._async_filter_state_change,
+                run_immediately=True,
+            )
+        return unsubscribe
+
+    @callback
+    def _async_filter_state_change(self, event: Event) -> bool:
+        """Return whether the state of a source changed, called by the event bus for every state change."""
+        data = event.data
+        if data["entity_id"] not in self._subscribers:
+            return False
+        new_state = data.get("new_state")
+        old_state = data.get("old_state")
+        return new_state is None or old_state is None or new_state.state != old_state.state
+
+    @callback
+    def _async_on_state_change(self, event: Event) -> None:
+        entity_id = event.data["entity_id"]
+        new_state = event.data.get("new_state")
+        state = new_state.state if new_state else None
+
+        value: NumberType | None = None
+        error: Exception | None = None
+        try:
+            value = parse_value(state)
+        except ValueError as ex:
+            error = ex
+            # a coordinator that starts now has no reading, so the next value is passed on
+            self._last_values.pop(entity_id, None)
+        else:
+            if self._last_values.get(entity_id) == value:
+                return
+            self._last_values[entity_id] = value
+        for source_callback in list(self._subscribers.get(entity_id, {}).values()):
+            source_callback(value, error, state)
+
+
+@callback
+def async_get_source_dispatcher(hass: HomeAssistant) -> SourceDispatcher:
+    """Return the source dispatcher shared by all MeasureIt coordinators."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (dispatcher := domain_data.get(SOURCE_DISPATCHER)) is None:
+        dispatcher = domain_data[SOURCE_DISPATCHER] = SourceDispatcher(hass)
+    return dispatcher
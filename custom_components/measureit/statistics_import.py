@@ -0,0 +1,154 @@
+"""Import of closed periods into the long-term statistics of the recorder."""
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from datetime import timedelta
+from typing import Any
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import CALLBACK_TYPE
+from homeassistant.core import Event
+from homeassistant.core import HomeAssistant
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+from homeassistant.util import slugify
+
+from .const import DOMAIN
+from .const import STATISTICS_IMPORTER
+
+# Seconds to wait before importing, so the periods closed in a rollover are imported in one batch.
+IMPORT_DELAY = 10
+_LOGGER: logging.Logger = logging.getLogger(__name__)
+
+
+def statistic_id(sensor_name: str) -> str:
+    """Return the id of the external statistic of a sensor."""
+    return f"{DOMAIN}:{slugify(sensor_name)}"
+
+
+def statistic_rows(
+    periods: list[tuple[float, datetime, datetime]], base_sum: float
+) -> list[dict[str, Any]]:
+    """Return the hourly statistics of closed periods, continuing the sum at base_sum.
+
+    Statistics are kept per hour, a period is added to the hour in which it
+    ends. When more periods end in the same hour, the row of that hour has the
+    value and last reset of the last one and the sum of all.
+    """
+    rows: dict[datetime, dict[str, Any]] = {}
+    total = base_sum
+    for value, start, end in periods:
+        total += value
+        hour = dt_util.as_utc(end - timedelta(microseconds=1)).replace(
+            minute=0, second=0, microsecond=0
+        )
+        rows[hour] = {
+            "start": hour,
+            "state": value,
+            "sum": total,
+            "last_reset": dt_util.as_utc(start),
+        }
+    return list(rows.values())
+
+
+class StatisticsImporter:
+    """Imports the closed periods of sensors into the long-term statistics in batches.
+
+    The recorder then no longer needs the states of the sensors for their
+    history, so they can be excluded from it.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the importer."""
+        self._hass: HomeAssistant = hass
+        self._queued: dict[str, tuple[dict[str, Any], list[tuple[float, datetime, datetime]]]] = {}
+        self._timer: CALLBACK_TYPE | None = None
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, self._async_on_stop)
+
+    @callback
+    def async_queue(
+        self,
+        sensor_name: str,
+        unit_of_measurement: str | None,
+        periods: list[tuple[float, datetime, datetime]],
+    ) -> None:
+        """Queue closed periods of a sensor to be imported."""
+        if not periods:
+            return
+        identifier = statistic_id(sensor_name)
+        if (queued := self._queued.get(identifier)) is None:
+            metadata = {
+                "has_mean": False,
+                "has_sum": True,
+                "name": sensor_name,
+                "source": DOMAIN,
+                "statistic_id": identifier,
+                "unit_of_measurement": unit_of_measurement,
+            }
+            queued = self._queued[identifier] = (metadata, [])
+        queued[1].extend(periods)
+        if self._timer is None:
+            self._timer = async_call_later(self._hass, IMPORT_DELAY, self._async_on_timer)
+
+    @callback
+    def _async_on_timer(self, _now: datetime) -> None:
+        self._timer = None
+        queued, self._queued = self._queued, {}
+        self._hass.async_create_task(self._async_import(queued))
+
+    async def _async_on_stop(self, _event: Event) -> None:
+        """Import the queued periods right away, they would be lost on shutdown."""
+        if self._timer is not None:
+            self._timer()
+            self._timer = None
+        queued, self._queued = self._queued, {}
+        if queued:
+            await self._async_import(queued)
+
+    async def _async_import(
+        self, queued: dict[str, tuple[dict[str, Any], list[tuple[float, datetime, datetime]]]]
+    ) -> None:
+        """Import the queued periods, continuing the sums of their statistics."""
+        if "recorder" not in self._hass.config.components:
+            _LOGGER.warning(
+                "Cannot import the statistics of %s sensors, the recorder is not loaded",
+                len(queued),
+            )
+            return
+        # pylint: disable-next=import-outside-toplevel
+        from homeassistant.components.recorder import get_instance
+        # pylint: disable-next=import-outside-toplevel
+        from homeassistant.components.recorder.statistics import async_add_external_statistics
+
+        last_sums = await get_instance(self._hass).async_add_executor_job(
+            _last_sums, self._hass, list(queued)
+        )
+        for identifier, (metadata, periods) in queued.items():
+            async_add_external_statistics(
+                self._hass, metadata, statistic_rows(periods, last_sums.get(identifier, 0.0))
+            )
+        _LOGGER.debug("Imported the statistics of %s sensors", len(queued))
+
+
+def _last_sums(hass: HomeAssistant, identifiers: list[str]) -> dict[str, float]:
+    """Return the last sum of each statistic, runs in the recorder thread pool."""
+    # pylint: disable-next=import-outside-toplevel
+    from homeassistant.components.recorder.statistics import get_last_statistics
+
+    last_sums = {}
+    for identifier in identifiers:
+        last = get_last_statistics(hass, 1, identifier, True, {"sum"})
+        if rows := last.get(identifier):
+            last_sums[identifier] = rows[0]["sum"] or 0.0
+    return last_sums
+
+
+@callback
+def async_get_statistics_importer(hass: HomeAssistant) -> StatisticsImporter:
+    """Return the statistics importer shared by all MeasureIt sensors."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (importer := domain_data.get(STATISTICS_IMPORTER)) is None:
+        importer = domain_data[STATISTICS_IMPORTER] = StatisticsImporter(hass)
+    return importer
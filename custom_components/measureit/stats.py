@@ -0,0 +1,214 @@
+"""Streaming statistics for MeasureIt meters."""
+from __future__ import annotations
+
+from math import sqrt
+from typing import Any
+
+# Number of markers of the P² algorithm.
+_MARKERS = 5
+
+
+class P2Quantile:
+    """Estimate of a quantile with the P² algorithm, in constant memory.
+
+    Five markers track the minimum, the maximum, the quantile and the points
+    halfway in between. Every observation moves the markers towards their
+    desired positions, with a parabolic prediction of their heights. See Jain
+    and Chlamtac, "The P² algorithm for dynamic calculation of quantiles and
+    histograms without storing observations" (1985).
+    """
+
+    __slots__ = ("quantile", "count", "_heights", "_positions")
+
+    def __init__(self, quantile: float) -> None:
+        """Initialize the estimate."""
+        self.quantile: float = quantile
+        self.count: int = 0
+        # until there are five observations, the heights are the sorted observations
+        self._heights: list[float] = []
+        self._positions: list[int] = []
+
+    @property
+    def value(self) -> float | None:
+        """Return the estimated quantile, or None without observations."""
+        if self.count >= _MARKERS:
+            return self._heights[2]
+        if not self.count:
+            return None
+        return self._heights[round(self.quantile * (self.count - 1))]
+
+    def add(self, value: float) -> None:
+        """Add an observation."""
+        self.count += 1
+        heights = self._heights
+        if self.count <= _MARKERS:
+            heights.append(value)
+            heights.sort()
+            if self.count == _MARKERS:
+                self._positions = list(range(_MARKERS))
+            return
+
+        positions = self._positions
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = 2 if value < heights[3] else 3
+            while cell and value < heights[cell]:
+                cell -= 1
+        for index in range(cell + 1, _MARKERS):
+            positions[index] += 1
+
+        # desired positions of the three middle markers after count observations
+        last = self.count - 1
+        quantile = self.quantile
+        for index, desired in (
+            (1, last * quantile / 2),
+            (2, last * quantile),
+            (3, last * (1 + quantile) / 2),
+        ):
+            offset = desired - positions[index]
+            if (offset >= 1 and positions[index + 1] - positions[index] > 1) or (
+                offset <= -1 and positions[index - 1] - positions[index] < -1
+            ):
+                step = 1 if offset > 0 else -1
+                height = self._parabolic(index, step)
+                if not heights[index - 1] < height < heights[index + 1]:
+                    height = self._linear(index, step)
+                heights[index] = height
+                positions[index] += step
+
+    def _parabolic(self, index: int, step: int) -> float:
+        heights = self._heights
+        positions = self._positions
+        below = positions[index] - positions[index - 1]
+        above = positions[index + 1] - positions[index]
+        return heights[index] + step / (positions[index + 1] - positions[index - 1]) * (
+            (below + step) * (heights[index + 1] - heights[index]) / above
+            + (above - step) * (heights[index] - heights[index - 1]) / below
+        )
+
+    def _linear(self, index: int, step: int) -> float:
+        heights = self._heights
+        positions = self._positions
+        return heights[index] + step * (heights[index + step] - heights[index]) / (
+            positions[index + step] - positions[index]
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the markers to be stored."""
+        return {"count": self.count, "heights": self._heights, "positions": self._positions}
+
+    def restore(self, stored: dict[str, Any]) -> None:
+        """Restore stored markers."""
+        self.count = stored["count"]
+        self._heights = list(stored["heights"])
+        self._positions = list(stored["positions"])
+
+
+class StreamingStats:
+    """Minimum, maximum, mean, standard deviation, median and 95th percentile of a stream of values.
+
+    The mean and variance are updated with Welford's algorithm, the median and
+    95th percentile are estimated with P². Memory use does not depend on the
+    number of values.
+    """
+
+    __slots__ = ("count", "mean", "_m2", "min", "max", "_p50", "_p95")
+
+    def __init__(self) -> None:
+        """Initialize the statistics."""
+        self.count: int = 0
+        self.mean: float = 0.0
+        self._m2: float = 0.0
+        self.min: float | None = None
+        self.max: float | None = None
+        self._p50: P2Quantile = P2Quantile(0.5)
+        self._p95: P2Quantile = P2Quantile(0.95)
+
+    @property
+    def stdev(self) -> float | None:
+        """Return the population standard deviation, or None without values."""
+        if not self.count:
+            return None
+        return sqrt(self._m2 / self.count)
+
+    def add(self, value: float) -> None:
+        """Add a value."""
+        self.count += 1
+        difference = value - self.mean
+        self.mean += difference / self.count
+        self._m2 += difference * (value - self.mean)
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        self._p50.add(value)
+        self._p95.add(value)
+
+    def summary(self) -> dict[str, float | int | None]:
+        """Return the statistics as state attribute."""
+        return {
+            "count": self.count,
+            "min": self.min,
+            "max": self.max,
+            "mean": self.mean if self.count else None,
+            "stdev": self.stdev,
+            "p50": self._p50.value,
+            "p95": self._p95.value,
+        }
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the statistics to be stored."""
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self._m2,
+            "min": self.min,
+            "max": self.max,
+            "p50": self._p50.as_dict(),
+            "p95": self._p95.as_dict(),
+        }
+
+    def restore(self, stored: dict[str, Any]) -> None:
+        """Restore stored statistics."""
+        self.count = stored["count"]
+        self.mean = stored["mean"]
+        self._m2 = stored["m2"]
+        self.min = stored["min"]
+        self.max = stored["max"]
+        self._p50.restore(stored["p50"])
+        self._p95.restore(stored["p95"])
+
+
+class MeterStats:
+    """Statistics of the deltas and readings of a meter within its period."""
+
+    __slots__ = ("deltas", "readings")
+
+    def __init__(self) -> None:
+        """Initialize the statistics."""
+        self.deltas: StreamingStats = StreamingStats()
+        self.readings: StreamingStats = StreamingStats()
+
+    def add(self, delta: float, reading: float) -> None:
+        """Add the delta and reading of a meter update."""
+        self.deltas.add(delta)
+        self.readings.add(reading)
+
+    def clear(self) -> None:
+        """Start over, e.g. at the start of a new period."""
+        self.deltas = StreamingStats()
+        self.readings = StreamingStats()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the statistics to be stored."""
+        return {"deltas": self.deltas.as_dict(), "readings": self.readings.as_dict()}
+
+    def restore(self, stored: dict[str, Any]) -> None:
+        """Restore stored statistics."""
+        self.deltas.restore(stored["deltas"])
+        self.readings.restore(stored["readings"])
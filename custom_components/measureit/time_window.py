@@ -1,9 +1,22 @@
 """Time window for MeasureIt."""
+from __future__ import annotations
+
+from bisect import bisect_right
 from datetime import datetime
+from datetime import time
+from datetime import timedelta
+
+US_PER_DAY = 86_400_000_000
+US_PER_WEEK = 7 * US_PER_DAY
 
 
 class TimeWindow:
-    """TimeWindow class with active check."""
+    """TimeWindow class with active check.
+
+    The window is compiled at construction into half-open intervals measured in
+    microseconds since the start of the week (monday 00:00). The 'till' time is
+    inclusive, so its interval ends one microsecond after it.
+    """
 
     def __init__(self, days: list[str], from_time: str, till_time: str) -> None:
         """Initialize TimeWindow."""
@@ -11,23 +24,98 @@ class TimeWindow:
         self.start = datetime.strptime(from_time, "%H:%M:%S").time()
         self.end = datetime.strptime(till_time, "%H:%M:%S").time()
 
-    def is_active(self, tznow: datetime):
+        intervals = _week_intervals(self.days, _time_to_us(self.start), _time_to_us(self.end))
+        self._day_ranges: tuple[tuple[tuple[int, int], ...], ...] = tuple(
+            _day_ranges(intervals, day) for day in range(7)
+        )
+        self._transitions: list[int] = _transitions(intervals)
+
+    def is_active(self, tznow: datetime) -> bool:
         """Check if a given datetime is inside the time window."""
-        check_time = tznow.time()
-        if self.start < self.end:
-            if check_time >= self.start and check_time <= self.end:
-                return tznow.weekday() in self.days
-        else:  # crosses midnight
-            if check_time >= self.start or check_time <= self.end:
-                if check_time < self.start:
-                    return prev_weekday(tznow.weekday()) in self.days
-                else:
-                    return tznow.weekday() in self.days
+        position = (
+            (tznow.hour * 3600 + tznow.minute * 60 + tznow.second) * 1_000_000
+            + tznow.microsecond
+        )
+        for start, end in self._day_ranges[tznow.weekday()]:
+            if start <= position < end:
+                return True
         return False
 
+    def next_transition(self, tznow: datetime) -> datetime | None:
+        """Return the first moment after tznow at which is_active changes.
+
+        Returns None when the window is always or never active.
+        """
+        if not self._transitions:
+            return None
+        weekday = tznow.weekday()
+        position = weekday * US_PER_DAY + _time_to_us(tznow.time())
+        index = bisect_right(self._transitions, position)
+        if index < len(self._transitions):
+            target = self._transitions[index]
+        else:
+            target = self._transitions[0] + US_PER_WEEK
+        days, time_of_day = divmod(target, US_PER_DAY)
+        return datetime.combine(
+            tznow.date() + timedelta(days=days - weekday),
+            _us_to_time(time_of_day),
+            tzinfo=tznow.tzinfo,
+        )
+
+
+def _time_to_us(value: time) -> int:
+    return (value.hour * 3600 + value.minute * 60 + value.second) * 1_000_000 + value.microsecond
+
+
+def _us_to_time(value: int) -> time:
+    seconds, microsecond = divmod(value, 1_000_000)
+    minutes, second = divmod(seconds, 60)
+    hour, minute = divmod(minutes, 60)
+    return time(hour, minute, second, microsecond)
+
+
+def _week_intervals(days: list[int], start: int, end: int) -> list[tuple[int, int]]:
+    """Return the sorted and merged intervals of the window within a week."""
+    intervals = []
+    for day in set(days):
+        base = day * US_PER_DAY
+        if start < end:
+            interval = (base + start, base + end + 1)
+        elif start == end:  # a full day, starting at the 'from' time
+            interval = (base + start, base + US_PER_DAY + start)
+        else:  # crosses midnight
+            interval = (base + start, base + US_PER_DAY + end + 1)
+
+        if interval[1] > US_PER_WEEK:  # crosses the end of the week
+            intervals.append((interval[0], US_PER_WEEK))
+            intervals.append((0, interval[1] - US_PER_WEEK))
+        else:
+            intervals.append(interval)
+
+    merged: list[tuple[int, int]] = []
+    for interval in sorted(intervals):
+        if merged and interval[0] <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], interval[1]))
+        else:
+            merged.append(interval)
+    return merged
+
+
+def _day_ranges(intervals: list[tuple[int, int]], day: int) -> tuple[tuple[int, int], ...]:
+    """Return the parts of the intervals that fall on the given day, relative to its midnight."""
+    day_start = day * US_PER_DAY
+    day_end = day_start + US_PER_DAY
+    return tuple(
+        (max(start, day_start) - day_start, min(end, day_end) - day_start)
+        for start, end in intervals
+        if start < day_end and end > day_start
+    )
+
 
-def prev_weekday(day: int) -> int:
-    """Return the previous weekday."""
-    if day == 0:
-        return 6
-    return day - 1
+def _transitions(intervals: list[tuple[int, int]]) -> list[int]:
+    """Return the sorted positions in the week at which the window opens or closes."""
+    transitions = sorted({edge for interval in intervals for edge in interval})
+    if intervals and intervals[0][0] == 0 and intervals[-1][1] == US_PER_WEEK:
+        # the window continues over the end of the week, so these are not real edges
+        transitions = [edge for edge in transitions if edge not in (0, US_PER_WEEK)]
+    return transitions
@@ -0,0 +1,87 @@
+"""Trace of the readings of a MeasureIt coordinator."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+from .meter import MeterState
+
+# Number of readings that are kept in the trace of a coordinator.
+TRACE_SIZE = 100
+
+# A reading as traced: POSIX timestamp, raw value, parsed value, parse error,
+# time window and template flags, and the name, state and measured value of
+# each meter after the update. The flags and meters are None when the reading
+# did not reach the meters.
+TraceRecord = tuple[
+    float,
+    Any,
+    "float | None",
+    "Exception | None",
+    "bool | None",
+    "bool | None",
+    "tuple[tuple[str, MeterState | None, float], ...] | None",
+]
+
+
+class TraceBuffer:
+    """The last readings of a coordinator, to explain how the meters got their values.
+
+    Records are kept as tuples in a ring of fixed size, so appending one does
+    no formatting and never allocates more than the record itself. They are
+    only formatted when the trace is dumped.
+    """
+
+    __slots__ = ("_records", "_next", "count")
+
+    def __init__(self, size: int = TRACE_SIZE) -> None:
+        """Initialize the trace."""
+        self._records: list[TraceRecord | None] = [None] * size
+        self._next: int = 0
+        self.count: int = 0  # readings traced, including the ones dropped
+
+    def append(self, record: TraceRecord) -> None:
+        """Add a record, dropping the oldest one when the trace is full."""
+        index = self._next
+        self._records[index] = record
+        index += 1
+        self._next = index if index < len(self._records) else 0
+        self.count += 1
+
+    def records(self) -> list[TraceRecord]:
+        """Return the records, oldest first."""
+        if self.count < len(self._records):
+            return self._records[: self.count]
+        return self._records[self._next :] + self._records[: self._next]
+
+    def as_list(self) -> list[dict[str, Any]]:
+        """Return the records, oldest first, formatted for a service response or diagnostics."""
+        return [
+            {
+                "time": dt_util.as_local(dt_util.utc_from_timestamp(timestamp)).isoformat(),
+                "raw": raw if raw is None or isinstance(raw, int | float) else str(raw),
+                "value": value,
+                "error": str(error) if error is not None else None,
+                "timewindow_active": timewindow_active,
+                "template_active": template_active,
+                "meters": None
+                if meters is None
+                else {
+                    name: {
+                        "state": state.value if state is not None else None,
+                        "measured_value": measured_value,
+                    }
+                    for name, state, measured_value in meters
+                },
+            }
+            for (
+                timestamp,
+                raw,
+                value,
+                error,
+                timewindow_active,
+                template_active,
+                meters,
+            ) in self.records()
+        ]
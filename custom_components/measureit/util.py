@@ -1,21 +1,72 @@
 """Utilities for MeasureIt."""
 import logging
+import operator
+from collections.abc import Callable
 from decimal import Decimal
-from typing import Union
+from typing import Any, Union, get_args
 
+from jinja2 import Environment, nodes
+from jinja2.exceptions import TemplateSyntaxError
+from homeassistant.const import STATE_UNAVAILABLE
+from homeassistant.const import STATE_UNKNOWN
 from homeassistant.exceptions import TemplateError
 from homeassistant.helpers.template import Template
+from homeassistant.helpers.template import forgiving_float_filter
+from homeassistant.helpers.template import forgiving_int_filter
+from homeassistant.helpers.template import forgiving_round
 
 NumberType = Union[float, Decimal, int]  # noqa: UP007
 
 _LOGGER: logging.Logger = logging.getLogger(__name__)
 
+# Only used to parse value templates, they are never rendered with it.
+_JINJA_PARSER = Environment()
+
+_BINARY_OPERATORS: dict[type[nodes.BinExpr], Callable[[Any, Any], Any]] = {
+    nodes.Add: operator.add,
+    nodes.Sub: operator.sub,
+    nodes.Mul: operator.mul,
+    nodes.Div: operator.truediv,
+    nodes.FloorDiv: operator.floordiv,
+    nodes.Mod: operator.mod,
+}
+_UNARY_OPERATORS: dict[type[nodes.UnaryExpr], Callable[[Any], Any]] = {
+    nodes.Neg: operator.neg,
+    nodes.Pos: operator.pos,
+}
+# The same filter functions as the Home Assistant template environment uses.
+_FILTERS: dict[str, Callable[..., Any]] = {
+    "round": forgiving_round,
+    "int": forgiving_int_filter,
+    "float": forgiving_float_filter,
+}
+
+
+def parse_value(value: Any) -> NumberType:
+    """Parse a (state) value into a number, raise ValueError when that is not possible."""
+    if isinstance(value, get_args(NumberType)):
+        return value
+    if value in (STATE_UNKNOWN, STATE_UNAVAILABLE, None):
+        raise ValueError("Could not process value as it's unknown or unavailable.")
+    return float(value)
+
 
 def create_renderer(hass, value_template):
     """Create a renderer based on variable_template value."""
     if value_template is None:
         return lambda value: value
 
+    if (compiled := compile_simple_template(value_template)) is not None:
+
+        def _render_native(value):
+            try:
+                return str(compiled(value))
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error parsing value")
+                return value
+
+        return _render_native
+
     value_template = Template(value_template, hass)
 
     def _render(value):
@@ -26,3 +77,68 @@ def create_renderer(hass, value_template):
             return value
 
     return _render
+
+
+def compile_simple_template(value_template: str) -> Callable[[Any], Any] | None:
+    """Compile a template of plain arithmetic on value into a python callable.
+
+    Supported are numbers, the value variable, + - * / // %, parentheses and
+    the round, int and float filters. Returns None for any other template, which
+    then needs to be rendered by Jinja.
+    """
+    try:
+        template = _JINJA_PARSER.parse(value_template)
+    except TemplateSyntaxError:
+        return None
+
+    if len(template.body) != 1 or not isinstance(template.body[0], nodes.Output):
+        return None
+    expressions = [
+        node
+        for node in template.body[0].nodes
+        if not (isinstance(node, nodes.TemplateData) and not node.data.strip())
+    ]  # whitespace around the expression is stripped from the result anyway
+    if len(expressions) != 1:
+        return None
+    return _compile_node(expressions[0])
+
+
+def _compile_node(node: nodes.Node) -> Callable[[Any], Any] | None:
+    if isinstance(node, nodes.Name) and node.name == "value":
+        return lambda value: value
+    if isinstance(node, nodes.Const) and type(node.value) in (int, float):
+        constant = node.value
+        return lambda value: constant
+    if (binary := _BINARY_OPERATORS.get(type(node))) is not None:
+        left = _compile_node(node.left)
+        right = _compile_node(node.right)
+        if left is None or right is None:
+            return None
+        return lambda value: binary(left(value), right(value))
+    if (unary := _UNARY_OPERATORS.get(type(node))) is not None:
+        operand = _compile_node(node.node)
+        if operand is None:
+            return None
+        return lambda value: unary(operand(value))
+    if isinstance(node, nodes.Filter):
+        return _compile_filter(node)
+    return None
+
+
+def _compile_filter(node: nodes.Filter) -> Callable[[Any], Any] | None:
+    if (
+        node.name not in _FILTERS
+        or node.node is None
+        or node.dyn_args is not None
+        or node.dyn_kwargs is not None
+        or not all(isinstance(arg, nodes.Const) for arg in node.args)
+        or not all(isinstance(kwarg.value, nodes.Const) for kwarg in node.kwargs)
+    ):
+        return None
+    operand = _compile_node(node.node)
+    if operand is None:
+        return None
+    filter_func = _FILTERS[node.name]
+    args = [arg.value for arg in node.args]
+    kwargs = {kwarg.key: kwarg.value.value for kwarg in node.kwargs}
+    return lambda value: filter_func(operand(value), *args, **kwargs)
@@ -17,6 +17,11 @@
 from unittest.mock import patch
 
 import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.measureit.const import DOMAIN
+from custom_components.measureit.const import PREDEFINED_PERIODS
+from custom_components.measureit.const import ROLLING_PERIODS
 
 pytest_plugins = "pytest_homeassistant_custom_component"
 
@@ -41,6 +46,48 @@ def skip_notifications_fixture():
         yield
 
 
+# This fixture returns a factory of MeasureIt config entries. By default they measure
+# sensor.water, or the time for meter_type="time", all day, every day, with a day sensor.
+# Options are overridden by keyword.
+@pytest.fixture(name="create_config_entry")
+def create_config_entry_fixture():
+    """Return a factory of MeasureIt config entries."""
+
+    def create_config_entry(
+        config_name: str,
+        periods: tuple[str, ...] = ("day",),
+        meter_type: str = "source",
+        **options,
+    ) -> MockConfigEntry:
+        """Create the config entry of a configuration with a sensor per period."""
+        if meter_type == "source":
+            options.setdefault("source_entity", "sensor.water")
+        return MockConfigEntry(
+            data={},
+            domain=DOMAIN,
+            options={
+                "config_name": config_name,
+                "meter_type": meter_type,
+                "when_days": ["0", "1", "2", "3", "4", "5", "6"],
+                "when_from": "00:00:00",
+                "when_till": "00:00:00",
+                "sensor": [
+                    {
+                        "unique_id": f"{config_name}_{period}",
+                        "sensor_name": period,
+                        "cron": "none" if period in ROLLING_PERIODS else PREDEFINED_PERIODS[period],
+                        "period": period,
+                    }
+                    for period in periods
+                ],
+                **options,
+            },
+            title=config_name,
+        )
+
+    return create_config_entry
+
+
 # # This fixture, when used, will result in calls to async_get_data to return None. To have the call
 # # return a value, we would add the `return_value=<VALUE_TO_RETURN>` parameter to the patch call.
 # @pytest.fixture(name="bypass_get_data")
@@ -0,0 +1,184 @@
+"""Tests for the MeasureIt backfill."""
+import random
+from datetime import datetime
+from datetime import timedelta
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from homeassistant.core import State
+from homeassistant.util import dt as dt_util
+from custom_components.measureit.backfill import _read_series
+from custom_components.measureit.backfill import async_backfill
+from custom_components.measureit.backfill import backfill_boundaries
+from custom_components.measureit.backfill import period_totals
+from custom_components.measureit.backfill import window_edges
+from custom_components.measureit.const import DOMAIN
+from custom_components.measureit.period import Period
+from custom_components.measureit.replay import replay
+from custom_components.measureit.time_window import TimeWindow
+
+TZ = dt_util.get_time_zone("Europe/Amsterdam")
+ALL_DAYS = ["0", "1", "2", "3", "4", "5", "6"]
+
+
+def test_window_edges():
+    """Test the moments at which the time window opens and closes."""
+    time_window = TimeWindow(ALL_DAYS, "08:00:00", "17:59:59")
+    start = datetime(2024, 1, 1, 12, 0, tzinfo=TZ)
+    active, edges = window_edges(time_window, start, start + timedelta(days=1))
+    assert active is True
+    assert edges == [
+        # till is inclusive
+        datetime(2024, 1, 1, 17, 59, 59, 1, tzinfo=TZ).timestamp(),
+        datetime(2024, 1, 2, 8, 0, tzinfo=TZ).timestamp(),
+    ]
+
+
+def test_backfill_boundaries():
+    """Test the periods that are backfilled."""
+    period = Period("0 0 * * *", datetime(2024, 1, 2, 12, 0, tzinfo=TZ))
+    previous = datetime(2024, 1, 1, tzinfo=TZ)
+    current = datetime(2024, 1, 2, tzinfo=TZ)
+    assert backfill_boundaries(period) == [previous, current]
+    assert backfill_boundaries(period, datetime(2023, 6, 1, tzinfo=TZ)) == [previous, current]
+    start = datetime(2024, 1, 1, 6, 0, tzinfo=TZ)
+    assert backfill_boundaries(period, start) == [start, current]
+    start = datetime(2024, 1, 2, 6, 0, tzinfo=TZ)
+    assert backfill_boundaries(period, start) == [start]
+
+    forever = Period("none", datetime(2024, 1, 2, 12, 0, tzinfo=TZ))
+    assert backfill_boundaries(forever) == [forever.start]
+
+
+def test_period_totals():
+    """Test that deltas are counted while the window is active, in the period of their second reading."""
+    timestamps = np.array([0.0, 10, 20, 30, 40, 50])
+    values = np.array([0.0, 1, 3, 6, 10, 15])
+    # the window closes at 25 and opens at 35
+    totals = period_totals(timestamps, values, True, [25.0, 35.0], [0.0, 30.0])
+    # 1 + 2 in the first period; the last value is read again when the window
+    # closes and opens, so the delta read at 30 does not count and the one at 40 does
+    assert totals.tolist() == [3, 4 + 5]
+    assert period_totals(timestamps[:1], values[:1], True, [], [0.0]).tolist() == [0]
+
+
+@pytest.mark.parametrize(
+    "days,time_from,time_till",
+    [
+        (["0", "1", "2", "3", "4", "5", "6"], "00:00:00", "00:00:00"),
+        (["0", "1", "2", "4", "5"], "07:30:00", "22:00:00"),
+        # the window closes at a period end
+        (["0", "1", "2", "4", "5"], "00:00:00", "00:00:00"),
+    ],
+)
+def test_same_as_replay(days, time_from, time_till):
+    """Test that the vectorized totals equal those of the meters, replaying the same series."""
+    rng = random.Random(3)
+    start = datetime(2024, 3, 29, tzinfo=TZ)  # over a DST change
+    moments = sorted(start + timedelta(seconds=rng.uniform(0, 4 * 86400)) for _ in range(2000))
+    values = np.cumsum([rng.uniform(0, 2) for _ in moments])
+    options = {
+        "config_name": "test",
+        "meter_type": "source",
+        "when_days": days,
+        "when_from": time_from,
+        "when_till": time_till,
+        "sensor": [{"sensor_name": "day", "cron": "0 0 * * *", "period": "day"}],
+    }
+    totals = replay(options, [(moment, value, True) for moment, value in zip(moments, values)])
+    expected = [total for _, _, total in totals["test_day"]]
+    boundaries = [period_start.astimezone(TZ) for period_start, _, _ in totals["test_day"]]
+
+    time_window = TimeWindow(options["when_days"], options["when_from"], options["when_till"])
+    active, edges = window_edges(time_window, boundaries[0], moments[-1])
+    # the replay starts with the period containing the first reading
+    calculated = period_totals(
+        np.array([moment.timestamp() for moment in moments]),
+        values,
+        active,
+        edges,
+        [boundary.timestamp() for boundary in boundaries],
+    )
+    assert calculated.tolist() == pytest.approx(expected)
+
+
+async def test_backfill_needs_recorder(hass, caplog):
+    """Test that nothing is backfilled without the recorder."""
+    await async_backfill(hass, [object()])
+    assert "Cannot backfill 1 sensors, the recorder is not loaded" in caplog.text
+
+
+def _states(entity_id: str, readings: list[tuple[datetime, str]]) -> dict[str, list[State]]:
+    return {
+        entity_id: [
+            State(entity_id, state, last_changed=moment, last_updated=moment)
+            for moment, state in readings
+        ]
+    }
+
+
+def test_read_series(hass):
+    """Test that the numeric recorded states are read, from start on."""
+    start = datetime(2024, 1, 1, tzinfo=TZ)
+    end = start + timedelta(days=1)
+    readings = [
+        (start - timedelta(hours=1), "100"),
+        (start + timedelta(hours=6), "unavailable"),
+        (start + timedelta(hours=12), "110.5"),
+    ]
+    with patch(
+        "homeassistant.components.recorder.history.get_significant_states",
+        return_value=_states("sensor.water", readings),
+    ) as get_significant_states:
+        timestamps, values = _read_series(hass, "sensor.water", start, end)
+    get_significant_states.assert_called_once_with(
+        hass, start, end, ["sensor.water"], significant_changes_only=False, no_attributes=True
+    )
+    # the state at start is the one that was recorded before it
+    assert timestamps.tolist() == [start.timestamp(), (start + timedelta(hours=12)).timestamp()]
+    assert values.tolist() == [100.0, 110.5]
+
+
+async def test_backfill_seeds_meters(hass, create_config_entry, freezer):
+    """Test that the current and previous period are calculated from the recorded history."""
+    tz = dt_util.DEFAULT_TIME_ZONE
+    freezer.move_to(datetime(2024, 1, 2, 12, 0, tzinfo=tz))
+    hass.states.async_set("sensor.water", "120")
+    config_entry = create_config_entry("test_backfill")
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    readings = [
+        (datetime(2024, 1, 1, 6, 0, tzinfo=tz), "100"),
+        (datetime(2024, 1, 1, 18, 0, tzinfo=tz), "110"),
+        (datetime(2024, 1, 2, 6, 0, tzinfo=tz), "115"),
+        (datetime(2024, 1, 2, 10, 0, tzinfo=tz), "unavailable"),
+        (datetime(2024, 1, 2, 11, 0, tzinfo=tz), "120"),
+    ]
+    recorder = MagicMock()
+    recorder.async_add_executor_job = hass.async_add_executor_job
+    hass.config.components.add("recorder")
+    with patch(
+        "homeassistant.components.recorder.get_instance", return_value=recorder
+    ), patch(
+        "homeassistant.components.recorder.history.get_significant_states",
+        return_value=_states("sensor.water", readings),
+    ):
+        await hass.services.async_call(
+            DOMAIN, "backfill", {"entity_id": "sensor.test_backfill_day"}, blocking=True
+        )
+    await hass.async_block_till_done()
+    day = hass.states.get("sensor.test_backfill_day")
+    assert day.state == "10.0"
+    assert day.attributes["prev_period"] == 10
+
+    # the meter continues from the last recorded reading
+    hass.states.async_set("sensor.water", "123")
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.test_backfill_day").state == "13.0"
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
@@ -0,0 +1,49 @@
+"""Tests for MeasureIt condition registry class."""
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.template import Template
+
+from custom_components.measureit.condition_registry import async_get_condition_registry
+from custom_components.measureit.const import CONDITION_REGISTRY, DOMAIN
+
+CONDITION = "{{ is_state('input_boolean.home', 'on') }}"
+
+
+async def test_shared_condition(hass: HomeAssistant):
+    """Test that coordinators with the same condition share one tracker."""
+    hass.states.async_set("input_boolean.home", "on")
+    registry = async_get_condition_registry(hass)
+    assert hass.data[DOMAIN][CONDITION_REGISTRY] is registry
+
+    results_1 = []
+    results_2 = []
+
+    def on_update_1(event, updates):
+        results_1.append(updates.pop().result)
+
+    def on_update_2(event, updates):
+        results_2.append(updates.pop().result)
+
+    unsub_1 = registry.async_subscribe(Template(CONDITION, hass), on_update_1)
+    unsub_2 = registry.async_subscribe(Template(CONDITION, hass), on_update_2)
+    assert len(registry._conditions) == 1
+    # both receive the current result on subscribing
+    assert results_1 == [True]
+    assert results_2 == [True]
+
+    hass.states.async_set("input_boolean.home", "off")
+    await hass.async_block_till_done()
+    assert results_1 == [True, False]
+    assert results_2 == [True, False]
+
+    unsub_1()
+    hass.states.async_set("input_boolean.home", "on")
+    await hass.async_block_till_done()
+    assert results_1 == [True, False]
+    assert results_2 == [True, False, True]
+
+    # the tracker is removed with the last subscriber
+    unsub_2()
+    assert not registry._conditions
+    hass.states.async_set("input_boolean.home", "off")
+    await hass.async_block_till_done()
+    assert results_2 == [True, False, True]
@@ -4,6 +4,7 @@ from homeassistant.core import HomeAssistant
 from homeassistant import config_entries, data_entry_flow
 from homeassistant.data_entry_flow import FlowResultType
 import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
 
 from custom_components.measureit.const import CONF_CONFIG_NAME, DOMAIN
 
@@ -47,3 +48,77 @@ async def test_config_flow(hass: HomeAssistant) -> None:
     )
 
     assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
+
+
+@pytest.mark.parametrize(
+    "meter_type,shown,hidden",
+    [
+        ("source", "min_interval", "event_driven"),
+        ("time", "event_driven", "min_interval"),
+    ],
+)
+async def test_advanced_options_of_meter_type(
+    hass: HomeAssistant, meter_type: str, shown: str, hidden: str
+) -> None:
+    """Test that the advanced settings only show the options of the meter type."""
+    entry = MockConfigEntry(
+        data={},
+        domain=DOMAIN,
+        options={
+            "config_name": "test",
+            "meter_type": meter_type,
+            "source_entity": "sensor.water",
+            "when_days": ["0", "1", "2", "3", "4", "5", "6"],
+            "when_from": "00:00:00",
+            "when_till": "00:00:00",
+            "sensor": [],
+        },
+    )
+    entry.add_to_hass(hass)
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], user_input={"next_step_id": "advanced"}
+    )
+    assert result["type"] == FlowResultType.FORM
+    keys = {str(key) for key in result["data_schema"].schema}
+    assert shown in keys
+    assert hidden not in keys
+    assert "write_interval" in keys
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], user_input={"write_interval": 5}
+    )
+    assert result["type"] == FlowResultType.CREATE_ENTRY
+    assert entry.options["write_interval"] == 5
+
+
+async def test_advanced_import_statistics_needs_history(hass: HomeAssistant) -> None:
+    """Test that importing statistics without a history is rejected, nothing would be imported."""
+    entry = MockConfigEntry(
+        data={},
+        domain=DOMAIN,
+        options={
+            "config_name": "test",
+            "meter_type": "time",
+            "when_days": ["0", "1", "2", "3", "4", "5", "6"],
+            "when_from": "00:00:00",
+            "when_till": "00:00:00",
+            "sensor": [],
+        },
+    )
+    entry.add_to_hass(hass)
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], user_input={"next_step_id": "advanced"}
+    )
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], user_input={"history_size": 0, "import_statistics": True}
+    )
+    assert result["type"] == FlowResultType.FORM
+    assert result["errors"] == {"base": "import_statistics_without_history"}
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], user_input={"history_size": 1, "import_statistics": True}
+    )
+    assert result["type"] == FlowResultType.CREATE_ENTRY
+    assert entry.options["import_statistics"] is True
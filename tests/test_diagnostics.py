@@ -0,0 +1,69 @@
+"""Tests for MeasureIt diagnostics."""
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.measureit import async_setup_entry, async_unload_entry
+from custom_components.measureit.const import DOMAIN
+from custom_components.measureit.diagnostics import async_get_config_entry_diagnostics
+
+
+async def test_metrics_in_diagnostics(hass: HomeAssistant):
+    """Test that the coordinator metrics are part of the diagnostics."""
+    hass.states.async_set("sensor.water", "10")
+    config_entry = MockConfigEntry(
+        data={},
+        domain=DOMAIN,
+        options={
+            "config_name": "test_metrics",
+            "meter_type": "source",
+            "source_entity": "sensor.water",
+            "trace": True,
+            "when_days": ["0", "1", "2", "3", "4", "5", "6"],
+            "when_from": "00:00:00",
+            "when_till": "00:00:00",
+            "sensor": [
+                {
+                    "unique_id": "c1b2f6a8-c4e1-11ee-9c1c-0242ac110002",
+                    "sensor_name": "day",
+                    "cron": "0 0 * * *",
+                    "period": "day",
+                },
+            ],
+        },
+        title="My metrics config",
+    )
+    config_entry.add_to_hass(hass)
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+
+    hass.states.async_set("sensor.water", "11")
+    hass.states.async_set("sensor.water", "unknown")
+    hass.states.async_set("sensor.water", "12")
+    await hass.async_block_till_done()
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, config_entry)
+    metrics = diagnostics["metrics"]
+    assert metrics["readings"] == 4
+    assert metrics["parse_failures"] == 1
+    assert metrics["template_errors"] == 0
+    assert metrics["fanout"]["count"] == 4
+    assert sum(metrics["fanout"]["buckets"].values()) == 4
+    # the initial state and two changes; the unknown state keeps the value
+    assert metrics["state_writes"] == {"test_metrics_day": 3}
+
+    # the readings, with the value of the sensor after each of them
+    trace = diagnostics["trace"]
+    assert [record["raw"] for record in trace] == ["10", "11", "unknown", "12"]
+    assert trace[2]["error"] is not None
+    assert [record["meters"]["test_metrics_day"]["measured_value"] for record in trace] == [
+        0,
+        1,
+        1,
+        2,
+    ]
+
+    # the diagnostic sensor is disabled by default
+    assert hass.states.get("sensor.test_metrics_metrics") is None
+
+    await async_unload_entry(hass, config_entry)
+    await hass.async_block_till_done()
@@ -0,0 +1,39 @@
+"""Tests for MeasureIt heartbeat class."""
+from datetime import timedelta
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.measureit.const import DOMAIN, HEARTBEAT
+from custom_components.measureit.heartbeat import async_get_heartbeat
+
+
+async def test_single_timer_fans_out(hass: HomeAssistant):
+    """Test that all subscribers receive the same tick from one timer."""
+    heartbeat = async_get_heartbeat(hass)
+    assert hass.data[DOMAIN][HEARTBEAT] is heartbeat
+    assert async_get_heartbeat(hass) is heartbeat
+
+    ticks_1 = []
+    ticks_2 = []
+    unsub_1 = heartbeat.async_subscribe(ticks_1.append)
+    unsub_2 = heartbeat.async_subscribe(ticks_2.append)
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(minutes=1))
+    await hass.async_block_till_done()
+    assert len(ticks_1) == 1
+    assert ticks_1 == ticks_2
+
+    unsub_1()
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(minutes=2))
+    await hass.async_block_till_done()
+    assert len(ticks_1) == 1
+    assert len(ticks_2) == 2
+
+    # timer is cancelled when the last subscriber leaves
+    unsub_2()
+    assert heartbeat._timer_listener is None
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(minutes=3))
+    await hass.async_block_till_done()
+    assert len(ticks_2) == 2
@@ -0,0 +1,89 @@
+"""Tests for MeasureIt period history."""
+
+from datetime import datetime
+from datetime import timedelta
+
+from homeassistant.util import dt as dt_util
+from custom_components.measureit.history import PeriodHistory
+from custom_components.measureit.meter import Meter
+from custom_components.measureit.period import Period
+from custom_components.measureit.reading import ReadingData
+
+TZ = dt_util.UTC
+START = datetime(2022, 1, 1, tzinfo=TZ)
+
+
+def _day(day: int) -> datetime:
+    return START + timedelta(days=day)
+
+
+def test_ring_keeps_the_last_periods():
+    """Test that the oldest periods are dropped when the history is full."""
+    history = PeriodHistory(3, START)
+    assert history.as_dict()["values"] == []
+    for day in range(1, 6):
+        history.close(day * 10, _day(day))
+
+    stored = history.as_dict()
+    assert stored["values"] == [30, 40, 50]
+    assert stored["starts"] == [_day(day).timestamp() for day in (2, 3, 4)]
+    assert stored["ends"] == [_day(day).timestamp() for day in (3, 4, 5)]
+    assert stored["opened"] == _day(5).timestamp()
+    assert [period["value"] for period in history.as_list()] == [30, 40, 50]
+
+
+def test_restore_other_size():
+    """Test restoring a history into a smaller and a larger one."""
+    history = PeriodHistory(3, START)
+    for day in range(1, 4):
+        history.close(day, _day(day))
+
+    smaller = PeriodHistory(2, START)
+    smaller.restore(history.as_dict())
+    assert smaller.as_dict() == {
+        "opened": _day(3).timestamp(),
+        "values": [2, 3],
+        "starts": [_day(1).timestamp(), _day(2).timestamp()],
+        "ends": [_day(2).timestamp(), _day(3).timestamp()],
+    }
+
+    larger = PeriodHistory(5, START)
+    larger.restore(history.as_dict())
+    larger.close(4, _day(4))
+    assert larger.as_dict()["values"] == [1, 2, 3, 4]
+
+    disabled = PeriodHistory(0, START)
+    disabled.restore(history.as_dict())
+    disabled.close(4, _day(4))
+    assert disabled.as_list() == []
+
+
+def test_meter_closes_periods():
+    """Test that a meter adds every closed period to its history."""
+    period = Period("0 0 * * *", START + timedelta(hours=10))
+    meter = Meter("day", period)
+    meter.history = PeriodHistory(12, period.start)
+    meter.on_update(ReadingData(START + timedelta(hours=10), True, True, 100))
+    meter.on_update(ReadingData(START + timedelta(hours=11), True, True, 105))
+    meter.on_update(ReadingData(_day(1) + timedelta(hours=1), True, True, 107))
+    # after downtime, the skipped days are closed as one period without a value
+    meter.on_update(ReadingData(_day(4) + timedelta(hours=1), True, True, 120))
+
+    assert meter.history.as_dict() == {
+        "opened": _day(4).timestamp(),
+        "values": [7, 13, 0],
+        "starts": [START.timestamp(), _day(1).timestamp(), _day(2).timestamp()],
+        "ends": [_day(1).timestamp(), _day(2).timestamp(), _day(4).timestamp()],
+    }
+
+
+def test_newest_periods():
+    """Test returning the periods closed in the last update."""
+    history = PeriodHistory(3, START)
+    history.close(1, _day(1))
+    closed = history.closed
+    history.close(2, _day(2))
+    history.close(3, _day(3))
+    assert history.newest(history.closed - closed) == [(2, _day(1), _day(2)), (3, _day(2), _day(3))]
+    # no more than the size of the history
+    assert len(history.newest(5)) == 3
@@ -0,0 +1,242 @@
+"""Tests for the MeasureIt services."""
+from datetime import datetime
+from datetime import timedelta
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.measureit.const import DOMAIN
+from custom_components.measureit.history import SAVE_DELAY
+from custom_components.measureit.history import async_get_history_store
+from custom_components.measureit.history import STORAGE_KEY
+
+RESET_DATETIME = datetime(2030, 1, 1, 0, 0)
+
+
+def _config_entry(config_name: str) -> MockConfigEntry:
+    return MockConfigEntry(
+        data={},
+        domain=DOMAIN,
+        options={
+            "config_name": config_name,
+            "meter_type": "time",
+            "trace": config_name == "heating",
+            "when_days": ["0", "1", "2", "3", "4", "5", "6"],
+            "when_from": "00:00:00",
+            "when_till": "00:00:00",
+            "sensor": [
+                {
+                    "unique_id": f"{config_name}_day",
+                    "sensor_name": "day",
+                    "cron": "0 0 * * *",
+                    "period": "day",
+                },
+                {
+                    "unique_id": f"{config_name}_month",
+                    "sensor_name": "month",
+                    "cron": "0 0 1 * *",
+                    "period": "month",
+                },
+            ],
+        },
+        title=config_name,
+    )
+
+
+@pytest.fixture
+async def entries(hass: HomeAssistant):
+    """Set up two MeasureIt configurations with a day and a month sensor each."""
+    entries = [_config_entry("heating"), _config_entry("cooling")]
+    for entry in entries:
+        entry.add_to_hass(hass)
+    # sets up the integration, and with it all of its config entries
+    assert await hass.config_entries.async_setup(entries[0].entry_id)
+    await hass.async_block_till_done()
+    yield entries
+    for entry in entries:
+        assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+def _reset_entities(hass: HomeAssistant) -> set[str]:
+    expected = dt_util.as_utc(RESET_DATETIME.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE))
+    return {
+        state.entity_id
+        for state in hass.states.async_all("sensor")
+        if state.attributes.get("next_reset") == expected
+    }
+
+
+@pytest.mark.parametrize(
+    ("targets", "expected"),
+    [
+        ({"entity_id": "sensor.heating_day"}, {"sensor.heating_day"}),
+        ({"period": "month"}, {"sensor.heating_month", "sensor.cooling_month"}),
+        ({"period": "0 0 * * *"}, {"sensor.heating_day", "sensor.cooling_day"}),
+        ({"entity_pattern": "sensor.cooling_*"}, {"sensor.cooling_day", "sensor.cooling_month"}),
+        (
+            {"entity_pattern": "sensor.*ing_*", "period": "day"},
+            {"sensor.heating_day", "sensor.cooling_day"},
+        ),
+    ],
+)
+async def test_reset_targets(hass: HomeAssistant, entries, targets, expected):
+    """Test that the reset service resets the sensors that match all targets."""
+    await hass.services.async_call(
+        DOMAIN, "reset_sensor", {**targets, "reset_datetime": RESET_DATETIME}, blocking=True
+    )
+    assert _reset_entities(hass) == expected
+
+
+async def test_reset_config_entry(hass: HomeAssistant, entries):
+    """Test resetting all sensors of a config entry."""
+    await hass.services.async_call(
+        DOMAIN,
+        "reset_sensor",
+        {"config_entry_id": entries[0].entry_id, "reset_datetime": RESET_DATETIME},
+        blocking=True,
+    )
+    assert _reset_entities(hass) == {"sensor.heating_day", "sensor.heating_month"}
+
+
+async def test_reset_unknown_entity(hass: HomeAssistant, entries, caplog):
+    """Test that unknown entities are skipped with a warning."""
+    await hass.services.async_call(
+        DOMAIN,
+        "reset_sensor",
+        {"entity_id": ["sensor.unknown", "sensor.cooling_day"], "reset_datetime": RESET_DATETIME},
+        blocking=True,
+    )
+    assert _reset_entities(hass) == {"sensor.cooling_day"}
+    assert "Cannot reset sensor.unknown" in caplog.text
+
+
+@pytest.fixture
+async def upstairs(hass: HomeAssistant, create_config_entry):
+    """Set up a MeasureIt configuration whose name is not an entity id, with a day and a rolling sensor."""
+    entry = create_config_entry("Heating Upstairs", ("day", "last_24h"), meter_type="time")
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    yield entry
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+def _targets(upstairs: MockConfigEntry, targets: dict) -> dict:
+    return {
+        key: upstairs.entry_id if value == "upstairs" else value for key, value in targets.items()
+    }
+
+
+@pytest.mark.parametrize(
+    ("targets", "expected"),
+    [
+        ({"entity_id": "sensor.heating_upstairs_day"}, {"sensor.heating_upstairs_day"}),
+        (
+            {"config_entry_id": "upstairs"},
+            {"sensor.heating_upstairs_day", "sensor.heating_upstairs_last_24h"},
+        ),
+        (
+            {"entity_pattern": "sensor.heating_upstairs_*"},
+            {"sensor.heating_upstairs_day", "sensor.heating_upstairs_last_24h"},
+        ),
+        ({"period": "last_24h"}, {"sensor.heating_upstairs_last_24h"}),
+        ({"period": "forever"}, set()),
+    ],
+)
+async def test_reset_targets_by_entity_id(hass: HomeAssistant, upstairs, targets, expected):
+    """Test that targets match the entity ids of the sensors, not their configured names."""
+    await hass.services.async_call(
+        DOMAIN,
+        "reset_sensor",
+        {**_targets(upstairs, targets), "reset_datetime": RESET_DATETIME},
+        blocking=True,
+    )
+    assert _reset_entities(hass) == expected
+
+
+async def test_get_history(hass: HomeAssistant, entries, hass_storage, freezer):
+    """Test that a reset closes a period in the history, which is saved and returned by the service."""
+    reset_datetime = dt_util.now().replace(microsecond=0) + timedelta(seconds=30)
+    await hass.services.async_call(
+        DOMAIN,
+        "reset_sensor",
+        {"entity_id": "sensor.heating_day", "reset_datetime": reset_datetime},
+        blocking=True,
+    )
+    freezer.move_to(reset_datetime)
+    async_fire_time_changed(hass, reset_datetime)
+    await hass.async_block_till_done()
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        "get_history",
+        {"entity_pattern": "sensor.*_day"},
+        blocking=True,
+        return_response=True,
+    )
+    assert response["sensor.cooling_day"] == []
+    assert [period["end"] for period in response["sensor.heating_day"]] == [
+        reset_datetime.isoformat()
+    ]
+
+    # the history is saved after a delay
+    assert STORAGE_KEY not in hass_storage
+    async_fire_time_changed(hass, reset_datetime + timedelta(seconds=SAVE_DELAY + 1))
+    await hass.async_block_till_done()
+    stored = hass_storage[STORAGE_KEY]["data"]["histories"]["heating_day"]
+    assert stored["ends"] == [reset_datetime.timestamp()]
+
+
+async def test_get_trace(hass: HomeAssistant, entries):
+    """Test that the trace of the configuration of a sensor is returned once."""
+    response = await hass.services.async_call(
+        DOMAIN,
+        "get_trace",
+        {"entity_id": ["sensor.heating_day", "sensor.heating_month"]},
+        blocking=True,
+        return_response=True,
+    )
+    assert list(response) == ["heating"]
+    record = response["heating"][-1]
+    assert record["value"] == record["raw"]
+    assert record["error"] is None
+    assert record["timewindow_active"] is True
+    assert record["template_active"] is True
+    assert record["meters"]["heating_day"]["state"] == "measuring"
+    assert set(record["meters"]) == {"heating_day", "heating_month"}
+
+    # the cooling configuration is not traced
+    response = await hass.services.async_call(
+        DOMAIN, "get_trace", {"period": "day"}, blocking=True, return_response=True
+    )
+    assert list(response) == ["heating"]
+
+
+async def test_deleted_sensors_drop_their_history(hass: HomeAssistant, create_config_entry):
+    """Test that the history of a deleted sensor is dropped, and kept for an unloaded one."""
+    entry = create_config_entry("attic", ("day", "week"), meter_type="time")
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    history_store = async_get_history_store(hass)
+    assert set(history_store._data_to_save()["histories"]) == {"attic_day", "attic_week"}
+
+    # a sensor that is removed from the registry is deleted
+    er.async_get(hass).async_remove("sensor.attic_week")
+    await hass.async_block_till_done()
+    assert set(history_store._data_to_save()["histories"]) == {"attic_day"}
+
+    # an unloaded sensor may be set up again
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert set(history_store._data_to_save()["histories"]) == {"attic_day"}
+
+    assert await hass.config_entries.async_remove(entry.entry_id)
+    await hass.async_block_till_done()
+    assert history_store._data_to_save()["histories"] == {}
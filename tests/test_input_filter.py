@@ -0,0 +1,84 @@
+"""Tests for the MeasureIt input filter."""
+from custom_components.measureit.input_filter import InputFilter
+from custom_components.measureit.input_filter import create_input_filter
+
+
+def test_min_interval():
+    """Test that readings are held back until the minimum interval has passed."""
+    input_filter = InputFilter(min_interval=10)
+    assert input_filter.passes(1, 0)
+    assert not input_filter.passes(2, 5)
+    assert not input_filter.passes(3, 9.9)
+    assert input_filter.passes(4, 10)
+    assert not input_filter.passes(5, 15)
+
+
+def test_min_delta():
+    """Test that readings are held back until they changed at least the minimum delta."""
+    input_filter = InputFilter(min_delta=1)
+    assert input_filter.passes(10, 0)
+    assert not input_filter.passes(10.5, 1)
+    assert not input_filter.passes(9.5, 2)
+    assert input_filter.passes(11, 3)
+
+
+def test_min_interval_or_delta():
+    """Test that a big change passes before the minimum interval has passed."""
+    input_filter = InputFilter(min_interval=60, min_delta=5)
+    assert input_filter.passes(0, 0)
+    assert not input_filter.passes(1, 10)
+    assert input_filter.passes(6, 20)
+    assert not input_filter.passes(7, 30)
+    assert input_filter.passes(7, 80)
+
+
+def test_mark():
+    """Test that a reading passed on outside of the filter restarts the interval."""
+    input_filter = InputFilter(min_interval=10)
+    input_filter.passes(1, 0)
+    input_filter.mark(2, 8)
+    assert not input_filter.passes(3, 12)
+    assert input_filter.passes(3, 18)
+
+
+def test_flush_at():
+    """Test that a held back reading is due when the minimum interval has passed."""
+    assert InputFilter(min_delta=1).flush_at() is None
+    input_filter = InputFilter(min_interval=10)
+    assert input_filter.flush_at() is None
+    input_filter.passes(1, 5)
+    assert input_filter.flush_at() == 15
+
+
+def test_median():
+    """Test that outliers are rejected by the median of the last readings."""
+    input_filter = InputFilter(median_size=3)
+    assert [input_filter.smooth(value) for value in (1, 2, 1000, 4, 5, -1000, 7)] == [
+        1,
+        1.5,
+        2,
+        4,
+        5,
+        4,
+        5,
+    ]
+
+
+def test_settle():
+    """Test that settling returns the last reading as is and starts the median over."""
+    assert InputFilter(min_delta=1).settle() is None
+    input_filter = InputFilter(median_size=3)
+    assert input_filter.settle() is None
+    for value in (1, 2, 3, 4):
+        input_filter.smooth(value)
+    assert input_filter.settle() == 4
+    assert input_filter.smooth(10) == 10
+
+
+def test_create_input_filter():
+    """Test that no filter is created without settings."""
+    assert create_input_filter({}) is None
+    assert create_input_filter({"min_interval": 0, "min_delta": 0, "median_size": 1}) is None
+    input_filter = create_input_filter({"min_interval": 5, "median_size": 3.0})
+    assert input_filter.min_interval == 5
+    assert input_filter.smooth(1) == 1
@@ -1,14 +1,19 @@
 """Tests for MeasureIt meter class."""
 
 from datetime import datetime
+from datetime import timedelta
 
 import pytest
 from homeassistant.util import dt as dt_util
 from custom_components.measureit.meter import Meter
 from custom_components.measureit.meter import MeterState
+from custom_components.measureit.meter import RollingMeter
+from custom_components.measureit.period import FOREVER
 from custom_components.measureit.period import Period
 from custom_components.measureit.reading import ReadingData
+from custom_components.measureit.rolling import RollingWindow
 from custom_components.measureit.sensor import MeasureItMeterStoredData
+from custom_components.measureit.stats import MeterStats
 
 START_PATTERN = "0 0 * * *"  # every day at midnight
 NAME = "24h"
@@ -162,3 +167,104 @@ def test_update_after_restore_forever_meter(meter: Meter):
 
     restored_meter = MeasureItMeterStoredData.from_dict(restore)
     assert restored_meter.period_end == datetime.max.replace(tzinfo=TZ)
+
+
+def test_restore_after_downtime(meter: Meter):
+    """Test that a meter restored after days of downtime shows the right values."""
+    meter.on_update(ReadingData(datetime(2022, 1, 1, 10, 35, tzinfo=TZ), True, True, 100))
+    meter.on_update(ReadingData(datetime(2022, 1, 1, 20, 0, tzinfo=TZ), True, True, 150))
+    assert meter.measured_value == 50
+
+    # home assistant was down for a week
+    tznow = datetime(2022, 1, 8, 12, 0, tzinfo=TZ)
+    meter.on_update(ReadingData(tznow, True, True, 300))
+    assert meter.measured_value == 0
+    assert meter.prev_measured_value == 0  # nothing was measured yesterday
+    assert meter.last_reset == tznow
+    assert meter.next_reset == datetime(2022, 1, 9, 0, 0, tzinfo=TZ)
+
+    meter.on_update(ReadingData(datetime(2022, 1, 8, 13, 0, tzinfo=TZ), True, True, 310))
+    assert meter.measured_value == 10
+
+
+def test_stored_data_format():
+    """Test that stored data uses the versioned format with timestamps."""
+    tz = dt_util.DEFAULT_TIME_ZONE
+    last_reset = datetime(2022, 1, 1, 10, 30, tzinfo=tz)
+    end = datetime(2022, 1, 2, 0, 0, tzinfo=tz)
+    stored = MeasureItMeterStoredData("measuring", 150, 50, 100, 0, last_reset, end)
+
+    restore = stored.as_dict()
+    assert restore["version"] == 2
+    assert restore["period_last_reset"] == last_reset.timestamp()
+    assert restore["period_end"] == end.timestamp()
+
+    restored = MeasureItMeterStoredData.from_dict(restore)
+    assert restored == stored
+    assert restored.period_end.tzinfo == tz
+
+
+def test_stored_data_legacy_format():
+    """Test restoring data stored in the unversioned format with ISO strings."""
+    tz = dt_util.DEFAULT_TIME_ZONE
+    restore = {
+        "measured_value": 150,
+        "start_measured_value": 0,
+        "prev_measured_value": 50,
+        "session_start_reading": 100,
+        "period_last_reset": "2022-01-01T10:30:00",
+        "period_end": datetime.max.isoformat(),
+        "state": "measuring",
+    }
+    restored = MeasureItMeterStoredData.from_dict(restore)
+    assert restored.measured_value == 150
+    assert restored.period_last_reset == datetime(2022, 1, 1, 10, 30, tzinfo=tz)
+    assert restored.period_end == datetime.max.replace(tzinfo=tz)
+
+    # migrated data is stored in the new format
+    assert MeasureItMeterStoredData.from_dict(restored.as_dict()) == restored
+
+    del restore["state"]
+    assert MeasureItMeterStoredData.from_dict(restore) is None
+
+
+def test_rolling_meter():
+    """Test that a rolling meter measures the total within its window."""
+    start = datetime(2022, 1, 1, 10, 0, tzinfo=TZ)
+    meter = RollingMeter(
+        NAME,
+        Period(FOREVER, start),
+        RollingWindow(timedelta(hours=1), timedelta(minutes=1)),
+    )
+    meter.on_update(ReadingData(start, True, True, 100))
+    meter.on_update(ReadingData(start + timedelta(minutes=10), True, True, 104))
+    meter.on_update(ReadingData(start + timedelta(minutes=40), True, True, 110))
+    assert meter.measured_value == 10
+
+    # the first delta moves out of the window
+    assert meter.expire(start + timedelta(minutes=75)) is True
+    assert meter.measured_value == 6
+
+    # the delta while waiting for the condition is skipped
+    meter.on_update(ReadingData(start + timedelta(minutes=80), False, True, 115))
+    meter.on_update(ReadingData(start + timedelta(minutes=81), True, True, 120))
+    meter.on_update(ReadingData(start + timedelta(minutes=82), True, True, 121))
+    assert meter.measured_value == 12
+
+
+def test_meter_stats(meter: Meter):
+    """Test that the statistics follow the updates within a period."""
+    meter.stats = MeterStats()
+    meter.on_update(ReadingData(datetime(2022, 1, 1, 11, 0, tzinfo=TZ), True, True, 100))
+    meter.on_update(ReadingData(datetime(2022, 1, 1, 11, 5, tzinfo=TZ), True, True, 102))
+    meter.on_update(ReadingData(datetime(2022, 1, 1, 11, 10, tzinfo=TZ), True, True, 108))
+    # reading the same value again, e.g. when the condition changes, is not a new reading
+    meter.on_update(ReadingData(datetime(2022, 1, 1, 11, 15, tzinfo=TZ), True, True, 108))
+    summary = meter.stats.deltas.summary()
+    assert (summary["count"], summary["min"], summary["max"], summary["mean"]) == (2, 2, 6, 4)
+    assert meter.stats.readings.max == 108
+
+    # the statistics start over with the period
+    meter.on_update(ReadingData(datetime(2022, 1, 2, 0, 1, tzinfo=TZ), True, True, 110))
+    assert meter.stats.deltas.count == 0
+    assert meter.stats.readings.count == 0
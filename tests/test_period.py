@@ -3,9 +3,13 @@
 from datetime import datetime
 from datetime import timedelta
 
+import pytest
+from croniter import croniter
 from homeassistant.util import dt as dt_util
 from custom_components.measureit.const import PREDEFINED_PERIODS
 from custom_components.measureit.period import Period
+from custom_components.measureit.period import PeriodRegistry
+from custom_components.measureit.period import PeriodSchedule
 
 TZ = dt_util.DEFAULT_TIME_ZONE
 
@@ -53,3 +57,170 @@ def test_update_period():
     period.update(tznow4, fake_reset, 123)
     assert period.last_reset == tznow3
     assert reset_called is False
+
+
+@pytest.mark.parametrize("time_zone", ["Europe/Amsterdam", "America/New_York", "Asia/Kolkata"])
+@pytest.mark.parametrize("period", ["5m", "hour", "day", "week", "month", "year"])
+def test_predefined_periods_match_croniter(period, time_zone):
+    """Test that the native calendar arithmetic agrees with croniter.
+
+    Periods of a day or longer follow the wall clock, so they are compared with
+    croniter on naive datetimes (croniter is not DST safe for aware ones).
+    Shorter periods are compared outside of DST transitions.
+    """
+    tz = dt_util.get_time_zone(time_zone)
+    pattern = PREDEFINED_PERIODS[period]
+    wall_clock = period in ("day", "week", "month", "year")
+    tznow = datetime(2022, 1, 1, 0, 7, 13, tzinfo=tz)
+    while tznow.year == 2022:
+        period_obj = Period(pattern, tznow)
+        if wall_clock:
+            naive_start = croniter(pattern, tznow.replace(tzinfo=None)).get_prev(datetime)
+            naive_end = croniter(pattern, naive_start).get_next(datetime)
+            assert period_obj.start.replace(tzinfo=None) == naive_start
+            assert period_obj.end.replace(tzinfo=None) == naive_end
+        elif tznow.fold == 0 and tznow.dst() == (tznow + timedelta(hours=1)).dst():
+            assert period_obj.start == croniter(pattern, tznow).get_prev(datetime)
+            assert period_obj.end == croniter(pattern, period_obj.start).get_next(datetime)
+        tznow += timedelta(hours=17, minutes=11)
+
+
+def test_hour_period_over_dst_transitions():
+    """Test that hour periods always last one real hour."""
+    tz = dt_util.get_time_zone("Europe/Amsterdam")
+
+    # clocks go forward at 02:00
+    period = Period(PREDEFINED_PERIODS["hour"], datetime(2022, 3, 27, 1, 30, tzinfo=tz))
+    assert period.end == datetime(2022, 3, 27, 3, 0, tzinfo=tz)
+    assert dt_util.as_utc(period.end) - dt_util.as_utc(period.start) == timedelta(hours=1)
+
+    # clocks go back at 03:00, so 02:00 - 03:00 happens twice
+    period = Period(PREDEFINED_PERIODS["hour"], datetime(2022, 10, 30, 2, 30, tzinfo=tz))
+    period.update(period.end, lambda _: None, 0)
+    assert period.start.utcoffset() == timedelta(hours=1)
+    assert (period.start.hour, period.end.hour) == (2, 3)
+    assert dt_util.as_utc(period.end) - dt_util.as_utc(period.start) == timedelta(hours=1)
+
+
+def test_hour_period_in_repeated_hour():
+    """Test that the first of the repeated hours ends after a real hour, not by wall clock."""
+    tz = dt_util.get_time_zone("US/Pacific")
+    resets = []
+    # clocks go back at 02:00 PDT to 01:00 PST
+    period = Period(PREDEFINED_PERIODS["hour"], datetime(2024, 11, 3, 0, 30, tzinfo=tz))
+    period.update(datetime(2024, 11, 3, 1, 0, tzinfo=tz), resets.append, 1)
+    assert period.start.utcoffset() == timedelta(hours=-7)
+    assert period.end.fold == 1
+
+    # 01:15 PDT is after 01:00 PST by wall clock, but 45 minutes before it
+    period.update(datetime(2024, 11, 3, 1, 15, tzinfo=tz), resets.append, 2)
+    assert resets == [1]
+    period.update(datetime(2024, 11, 3, 1, 15, fold=1, tzinfo=tz), resets.append, 3)
+    assert resets == [1, 3]
+    assert period.start.utcoffset() == timedelta(hours=-8)
+
+
+def test_day_period_over_dst_transition():
+    """Test that day periods always start at local midnight."""
+    tz = dt_util.get_time_zone("Europe/Amsterdam")
+    period = Period(PREDEFINED_PERIODS["day"], datetime(2022, 3, 27, 10, 0, tzinfo=tz))
+    assert period.start == datetime(2022, 3, 27, 0, 0, tzinfo=tz)
+    assert period.end == datetime(2022, 3, 28, 0, 0, tzinfo=tz)
+    assert dt_util.as_utc(period.end) - dt_util.as_utc(period.start) == timedelta(hours=23)
+
+
+def test_custom_cron_boundaries_are_cached():
+    """Test rolling over a custom cron pattern and manually moving the end."""
+    pattern = "30 6 * * 1-5"  # weekdays at 06:30
+    period = Period(pattern, datetime(2022, 1, 3, 10, 0, tzinfo=TZ))  # monday
+    assert period.start == datetime(2022, 1, 3, 6, 30, tzinfo=TZ)
+
+    ends = []
+    for _ in range(12):
+        ends.append(period.end)
+        period.update(period.end, lambda _: None, 0)
+    expected = []
+    cron = croniter(pattern, datetime(2022, 1, 3, 6, 30, tzinfo=TZ))
+    for _ in range(12):
+        expected.append(cron.get_next(datetime))
+    assert ends == expected
+
+    # a manual end before the cached boundaries starts a fresh calculation
+    period.end = datetime(2022, 1, 4, 12, 0, tzinfo=TZ)
+    period.update(period.end, lambda _: None, 0)
+    assert period.end == datetime(2022, 1, 5, 6, 30, tzinfo=TZ)
+
+
+def test_forever_period():
+    """Test that a forever period never ends."""
+    fake_now = datetime(2022, 1, 1, 10, 30, tzinfo=TZ)
+    period = Period(PREDEFINED_PERIODS["forever"], fake_now)
+    assert period.start == fake_now
+    assert period.end == datetime.max.replace(tzinfo=TZ)
+
+
+@pytest.mark.parametrize("start_pattern", [PREDEFINED_PERIODS["day"], "0 0 * * 1-5"])
+def test_catch_up_after_downtime(start_pattern):
+    """Test that a period catches up in one update after many periods have passed."""
+    period = Period(start_pattern, datetime(2022, 1, 3, 10, 30, tzinfo=TZ))  # monday
+    resets = []
+
+    tznow = datetime(2022, 1, 13, 9, 15, tzinfo=TZ)  # thursday, more than a week later
+    period.update(tznow, resets.append, 123)
+
+    assert resets == [123, 123]
+    assert period.last_reset == tznow
+    assert period.start == datetime(2022, 1, 13, 0, 0, tzinfo=TZ)
+    assert period.end == datetime(2022, 1, 14, 0, 0, tzinfo=TZ)
+
+    # no more resets within the current period
+    period.update(tznow + timedelta(hours=1), resets.append, 124)
+    assert resets == [123, 123]
+
+
+def test_catch_up_on_boundary():
+    """Test catching up to exactly the start of a custom cron period."""
+    period = Period("0 0 * * 1-5", datetime(2022, 1, 3, 10, 30, tzinfo=TZ))
+    resets = []
+
+    tznow = datetime(2022, 1, 13, 0, 0, tzinfo=TZ)
+    period.update(tznow, resets.append, 123)
+    assert len(resets) == 2
+    assert period.start == tznow
+    assert period.end == datetime(2022, 1, 14, 0, 0, tzinfo=TZ)
+
+
+def test_period_registry():
+    """Test that periods with the same pattern and time zone share one schedule."""
+    registry = PeriodRegistry()
+    schedule = registry.schedule(PREDEFINED_PERIODS["day"], TZ)
+    assert registry.schedule(PREDEFINED_PERIODS["day"], TZ) is schedule
+    assert registry.schedule(PREDEFINED_PERIODS["week"], TZ) is not schedule
+    other_tz = dt_util.get_time_zone("Asia/Kolkata")
+    assert registry.schedule(PREDEFINED_PERIODS["day"], other_tz) is not schedule
+
+
+def test_shared_schedule_is_calculated_once(monkeypatch):
+    """Test that periods sharing a schedule reuse its boundaries, but keep their own end."""
+    pattern = "30 6 * * 1-5"
+    schedule = PeriodSchedule(pattern, TZ)
+    tznow = datetime(2022, 1, 3, 10, 0, tzinfo=TZ)
+    periods = [Period(pattern, tznow, schedule) for _ in range(100)]
+    assert len(schedule._boundaries) == 9
+
+    calls = []
+    original_init = croniter.__init__
+
+    def counting_init(self, *args, **kwargs):
+        calls.append(args)
+        original_init(self, *args, **kwargs)
+
+    monkeypatch.setattr(croniter, "__init__", counting_init)
+    for period in periods:
+        period.update(period.end, lambda _: None, 0)
+    assert calls == []
+    assert {period.start for period in periods} == {datetime(2022, 1, 4, 6, 30, tzinfo=TZ)}
+
+    # a manual reset only moves the end of that period
+    periods[0].end = datetime(2022, 1, 4, 12, 0, tzinfo=TZ)
+    assert periods[1].end == datetime(2022, 1, 5, 6, 30, tzinfo=TZ)
@@ -0,0 +1,109 @@
+"""Tests for the MeasureIt replay engine."""
+import io
+import json
+from datetime import datetime
+from datetime import timedelta
+
+import pytest
+from homeassistant.util import dt as dt_util
+from custom_components.measureit.replay import main
+from custom_components.measureit.replay import read_csv
+from custom_components.measureit.replay import read_jsonl
+from custom_components.measureit.replay import replay
+
+TZ = dt_util.get_time_zone("Europe/Amsterdam")
+ALL_DAYS = ["0", "1", "2", "3", "4", "5", "6"]
+
+
+def _options(meter_type: str, when_from="00:00:00", when_till="00:00:00") -> dict:
+    return {
+        "config_name": "test",
+        "meter_type": meter_type,
+        "when_days": ALL_DAYS,
+        "when_from": when_from,
+        "when_till": when_till,
+        "sensor": [
+            {"sensor_name": "hour", "cron": "0 * * * *", "period": "hour"},
+            {"sensor_name": "day", "cron": "0 0 * * *", "period": "day"},
+        ],
+    }
+
+
+def test_source_totals():
+    """Test the totals per period of a source meter, including the condition."""
+    data = io.StringIO(
+        "timestamp,source_state,condition_result\n"
+        "2024-01-01T10:15:00,100,true\n"
+        "2024-01-01T10:45:00,103,true\n"
+        "2024-01-01T11:30:00,110,false\n"
+        "2024-01-01T11:40:00,111,false\n"
+        "2024-01-01T11:50:00,112,true\n"
+        "2024-01-01T12:10:00,115,true\n"
+        "2024-01-01T12:20:00,unavailable,true\n"
+    )
+    totals = replay(_options("source"), read_csv(data, TZ))
+
+    hour = [(start.astimezone(TZ).hour, value) for start, _, value in totals["test_hour"]]
+    # the hour of 11:00 measures until the condition turns false
+    assert hour == [(10, 3), (11, 7), (12, 3)]
+    assert totals["test_day"][-1][1:] == (None, 13)
+
+
+def test_time_totals_with_time_window():
+    """Test that a time meter is updated when its time window opens and closes."""
+    rows = [
+        {"timestamp": datetime(2024, 1, 1, 7, 30, tzinfo=TZ).timestamp()},
+        {"timestamp": datetime(2024, 1, 2, 20, 0, tzinfo=TZ).timestamp()},
+    ]
+    data = io.StringIO("\n".join(json.dumps(row) for row in rows))
+    totals = replay(_options("time", "08:00:00", "09:00:00"), read_jsonl(data, TZ))
+
+    # only the hour from 8:00 till 9:00 counts, both days
+    assert [value for _, _, value in totals["test_day"]] == [
+        pytest.approx(3600),
+        pytest.approx(3600),
+    ]
+    assert totals["test_day"][0][1] == datetime(2024, 1, 2, tzinfo=TZ)
+    hours = {start.astimezone(TZ).hour: value for start, _, value in totals["test_hour"]}
+    assert hours[8] == pytest.approx(3600)
+
+
+def test_command_line(tmp_path, capsys):
+    """Test the command line entry point."""
+    options = tmp_path / "options.json"
+    options.write_text(json.dumps(_options("source")))
+    data = tmp_path / "data.jsonl"
+    start = datetime(2024, 1, 1, 23, 30, tzinfo=TZ)
+    data.write_text(
+        "\n".join(
+            json.dumps(
+                {
+                    "timestamp": (start + timedelta(minutes=20 * index)).isoformat(),
+                    "source_state": index,
+                }
+            )
+            for index in range(4)
+        )
+    )
+
+    assert main([str(options), str(data), "--time-zone", "Europe/Amsterdam"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == "sensor,start,end,value"
+    assert "test_day,2024-01-01T00:00:00+01:00,2024-01-02T00:00:00+01:00,1.0" in lines
+    assert "test_day,2024-01-02T00:00:00+01:00,,2" in lines
+
+
+@pytest.mark.parametrize("settings", [{"min_interval": 600}, {"min_delta": 5}])
+def test_input_filter_keeps_totals(settings):
+    """Test that readings held back by the input filter are counted at the end of the period."""
+    start = datetime(2024, 1, 1, 9, 0, tzinfo=TZ)
+    rows = [(start + timedelta(seconds=17 * index), index * 0.1, True) for index in range(2000)]
+    expected = replay(_options("source"), rows)
+    totals = replay({**_options("source"), **settings}, rows)
+
+    for name in ("test_hour", "test_day"):
+        assert [value for _, _, value in totals[name]] == pytest.approx(
+            [value for _, _, value in expected[name]][:-1] + [totals[name][-1][2]]
+        )
+    # the open period only misses the readings that are still held back
+    assert totals["test_day"][-1][2] <= expected["test_day"][-1][2]
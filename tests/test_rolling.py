@@ -0,0 +1,84 @@
+"""Tests for MeasureIt rolling window class."""
+
+from datetime import datetime
+from datetime import timedelta
+
+import pytest
+from homeassistant.util import dt as dt_util
+from custom_components.measureit.rolling import RollingWindow
+
+TZ = dt_util.UTC
+START = datetime(2022, 1, 1, 10, 0, tzinfo=TZ)
+
+
+@pytest.fixture
+def window():
+    """Create a window of an hour with buckets of a minute."""
+    return RollingWindow(timedelta(hours=1), timedelta(minutes=1))
+
+
+def test_add_and_expire(window: RollingWindow):
+    """Test that deltas leave the window after its length."""
+    with pytest.raises(ValueError):
+        window.add(1)
+
+    window.advance(START)
+    window.add(2)
+    assert window.advance(START + timedelta(minutes=30)) is False
+    window.add(3)
+    assert window.total == 5
+
+    assert window.advance(START + timedelta(minutes=59, seconds=59)) is False
+    assert window.total == 5
+    assert window.advance(START + timedelta(minutes=60)) is True
+    assert window.total == 3
+    assert window.advance(START + timedelta(minutes=90)) is True
+    assert window.total == 0
+
+
+def test_advance_back_in_time(window: RollingWindow):
+    """Test that a moment before the newest bucket does not change the window."""
+    window.advance(START)
+    window.add(2)
+    assert window.advance(START - timedelta(minutes=5)) is False
+    window.add(1)
+    assert window.total == 3
+
+
+def test_gap_longer_than_window(window: RollingWindow):
+    """Test that all buckets are cleared after a gap of more than the window."""
+    window.advance(START)
+    window.add(2)
+    assert window.advance(START + timedelta(days=3)) is True
+    assert window.total == 0
+    assert window.advance(START + timedelta(days=4)) is False
+
+
+def test_no_drift(window: RollingWindow):
+    """Test that the running total does not drift over many rounds."""
+    moment = START
+    window.advance(moment)
+    for _ in range(10 * 60):
+        window.add(0.1)
+        moment += timedelta(minutes=1)
+        window.advance(moment)
+    # the window holds the last 59 full buckets
+    assert window.total == pytest.approx(5.9, abs=1e-12)
+
+
+def test_store_and_restore(window: RollingWindow):
+    """Test storing and restoring the buckets."""
+    window.advance(START)
+    window.add(2)
+    window.advance(START + timedelta(minutes=10))
+    window.add(3)
+
+    restored = RollingWindow(timedelta(hours=1), timedelta(minutes=1))
+    restored.restore(window.as_dict())
+    assert restored.total == 5
+    assert restored.advance(START + timedelta(minutes=65)) is True
+    assert restored.total == 3
+
+    other = RollingWindow(timedelta(hours=1), timedelta(minutes=5))
+    other.restore(window.as_dict())
+    assert other.total == 0
@@ -0,0 +1,69 @@
+"""Tests for MeasureIt rollover scheduler."""
+from datetime import timedelta
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.measureit.const import DOMAIN, ROLLOVER_SCHEDULER
+from custom_components.measureit.rollover import async_get_rollover_scheduler
+
+
+async def test_boundary_is_tracked_once(hass: HomeAssistant):
+    """Test that everything tracking the same boundary is rolled over by one timer."""
+    scheduler = async_get_rollover_scheduler(hass)
+    assert hass.data[DOMAIN][ROLLOVER_SCHEDULER] is scheduler
+
+    boundary = dt_util.now().replace(microsecond=0) + timedelta(minutes=5)
+    rollovers_1 = []
+    rollovers_2 = []
+    rollovers_3 = []
+    scheduler.async_track_boundary(boundary, rollovers_1.append)
+    scheduler.async_track_boundary(dt_util.as_utc(boundary), rollovers_2.append)
+    untrack_3 = scheduler.async_track_boundary(boundary, rollovers_3.append)
+    assert len(scheduler._timers) == 1
+
+    untrack_3()
+    async_fire_time_changed(hass, boundary)
+    await hass.async_block_till_done()
+    assert rollovers_1 == [boundary]
+    assert rollovers_2 == [boundary]
+    assert rollovers_3 == []
+    assert not scheduler._timers
+
+    # untracking after the rollover is harmless
+    untrack_3()
+
+
+async def test_untrack_cancels_timer(hass: HomeAssistant):
+    """Test that the timer is cancelled when nothing tracks the boundary anymore."""
+    scheduler = async_get_rollover_scheduler(hass)
+    boundary = dt_util.now() + timedelta(minutes=5)
+    rollovers = []
+    untrack = scheduler.async_track_boundary(boundary, rollovers.append)
+    untrack()
+    assert not scheduler._timers
+
+    async_fire_time_changed(hass, boundary)
+    await hass.async_block_till_done()
+    assert rollovers == []
+
+
+async def test_writes_are_spread(hass: HomeAssistant):
+    """Test that writes queued together are spread over their window."""
+    scheduler = async_get_rollover_scheduler(hass)
+    writes = []
+    cancels = [
+        scheduler.async_queue_write(lambda index=index: writes.append(index), 4)
+        for index in range(8)
+    ]
+    cancels[7]()
+    await hass.async_block_till_done()
+    assert writes == [0, 1]
+
+    expected_writes = {1: [0, 1, 2, 3], 2: [0, 1, 2, 3, 4, 5], 3: [0, 1, 2, 3, 4, 5, 6]}
+    for seconds, expected in expected_writes.items():
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=seconds))
+        await hass.async_block_till_done()
+        assert writes == expected
+    assert not scheduler._scheduled_writes
@@ -1,43 +1,24 @@
 """Tests for MeasureIt sensor class."""
-from pytest_homeassistant_custom_component.common import MockConfigEntry
+from datetime import datetime
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from homeassistant.core import State
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+from pytest_homeassistant_custom_component.common import mock_restore_cache_with_extra_data
 from custom_components.measureit import async_setup_entry, async_unload_entry
+from custom_components.measureit.const import COORDINATOR
 from custom_components.measureit.const import DOMAIN
+from custom_components.measureit.const import DOMAIN_DATA
+from custom_components.measureit.rollover import async_get_rollover_scheduler
+from custom_components.measureit.sensor import MeasureItMeterStoredData
 
 
-async def test_sensor_creation(hass):
+async def test_sensor_creation(hass, create_config_entry):
     """Test the creation of sensors in Home Assistant."""
-    config_entry = MockConfigEntry(
-        data={},
-        domain=DOMAIN,
-        options={
-            "config_name": "test_config",
-            "meter_type": "time",
-            "when_days": ["0", "1", "2", "3", "4", "5", "6"],
-            "when_from": "00:00:00",
-            "when_till": "00:00:00",
-            "sensor": [
-                {
-                    "unit_of_measurement": "s",
-                    "device_class": "duration",
-                    "state_class": "total_increasing",
-                    "unique_id": "50d844d8-b5ff-11ee-8d04-0242ac110002",
-                    "sensor_name": "day",
-                    "cron": "0 0 * * *",
-                    "period": "day",
-                },
-                {
-                    "unit_of_measurement": "s",
-                    "device_class": "duration",
-                    "state_class": "total_increasing",
-                    "unique_id": "50d859e6-b5ff-11ee-8d04-0242ac110002",
-                    "sensor_name": "week",
-                    "cron": "0 0 * * 1",
-                    "period": "week",
-                },
-            ],
-        },
-        title="My time config",
-    )
+    config_entry = create_config_entry("test_config", ("day", "week"), meter_type="time")
 
     assert await async_setup_entry(hass, config_entry)
     await hass.async_block_till_done()
@@ -49,3 +30,347 @@ async def test_sensor_creation(hass):
 
     await async_unload_entry(hass, config_entry)
     await hass.async_block_till_done()
+
+
+async def test_state_writes_are_coalesced(hass, create_config_entry):
+    """Test that unchanged values are skipped and bursts are combined into one write."""
+    hass.states.async_set("sensor.gas", "10")
+    config_entry = create_config_entry("test_writes", source_entity="sensor.gas", write_interval=60)
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+
+    first = hass.states.get("sensor.test_writes_day")
+    assert first.state == "0"
+
+    # same value after a change of attributes: nothing to write
+    hass.states.async_set("sensor.gas", "10", {"foo": "bar"})
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.test_writes_day").last_updated == first.last_updated
+
+    # a burst of changes is written once after the write interval
+    hass.states.async_set("sensor.gas", "11")
+    hass.states.async_set("sensor.gas", "12")
+    hass.states.async_set("sensor.gas", "13")
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.test_writes_day").state == "0"
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=61))
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.test_writes_day").state == "3.0"
+
+    await async_unload_entry(hass, config_entry)
+    await hass.async_block_till_done()
+
+
+async def test_event_driven_time_meter(hass, create_config_entry, freezer):
+    """Test that an event driven time meter only updates on window edges and period ends."""
+    tz = dt_util.get_time_zone(hass.config.time_zone)
+    freezer.move_to(datetime(2022, 1, 3, 9, 0, tzinfo=tz))
+    config_entry = create_config_entry(
+        "test_events",
+        meter_type="time",
+        when_from="10:00:00",
+        when_till="12:00:00",
+        event_driven=True,
+    )
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+    state = hass.states.get("sensor.test_events_day")
+    assert state.attributes["status"] == "waiting for time window"
+
+    # the window opens
+    freezer.move_to(datetime(2022, 1, 3, 10, 0, tzinfo=tz))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    state = hass.states.get("sensor.test_events_day")
+    assert state.attributes["status"] == "measuring"
+    assert float(state.state) == 0
+
+    # nothing happens while measuring
+    freezer.move_to(datetime(2022, 1, 3, 11, 0, tzinfo=tz))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.test_events_day").last_updated == state.last_updated
+
+    # the window closes
+    freezer.move_to(datetime(2022, 1, 3, 12, 0, 1, tzinfo=tz))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    state = hass.states.get("sensor.test_events_day")
+    assert state.attributes["status"] == "waiting for time window"
+    assert float(state.state) == pytest.approx(7200)
+
+    # the period ends at midnight
+    freezer.move_to(datetime(2022, 1, 4, 0, 0, tzinfo=tz))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    state = hass.states.get("sensor.test_events_day")
+    assert float(state.state) == 0
+    assert float(state.attributes["prev_period"]) == pytest.approx(7200)
+
+    await async_unload_entry(hass, config_entry)
+    await hass.async_block_till_done()
+
+
+async def test_rollover_at_boundary(hass, create_config_entry, freezer):
+    """Test that sensors reset at the exact boundary and their writes are spread."""
+    tz = dt_util.get_time_zone(hass.config.time_zone)
+    freezer.move_to(datetime(2022, 1, 2, 23, 58, 0, tzinfo=tz))  # sunday
+    config_entry = create_config_entry(
+        "test_rollover", ("day", "week"), meter_type="time", rollover_window=10
+    )
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+    freezer.move_to(datetime(2022, 1, 2, 23, 59, 0, tzinfo=tz))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert float(hass.states.get("sensor.test_rollover_day").state) == pytest.approx(60)
+
+    # the heartbeat of midnight arrives a bit late
+    midnight = datetime(2022, 1, 3, 0, 0, tzinfo=tz)
+    freezer.move_to(midnight + timedelta(milliseconds=30))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+
+    sensors = hass.data[DOMAIN]["sensor"]
+    for name in ("sensor.test_rollover_day", "sensor.test_rollover_week"):
+        meter = sensors[name].meter
+        assert meter.last_reset == midnight
+        assert meter.prev_measured_value == pytest.approx(120)
+        assert meter.measured_value == pytest.approx(0.03)
+
+    # one of the two writes is spread to later in the window
+    assert sorted(
+        float(hass.states.get(name).state)
+        for name in ("sensor.test_rollover_day", "sensor.test_rollover_week")
+    ) == [pytest.approx(0.03), pytest.approx(60)]
+    freezer.tick(5)
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert float(hass.states.get("sensor.test_rollover_week").state) == pytest.approx(0.03)
+    assert float(hass.states.get("sensor.test_rollover_day").state) == pytest.approx(0.03)
+
+    await async_unload_entry(hass, config_entry)
+    await hass.async_block_till_done()
+
+
+async def test_source_sensor_statistics_and_rolling_period(hass, create_config_entry):
+    """Test the statistics attributes of a source sensor and a sensor with a rolling period."""
+    hass.states.async_set("sensor.water", "100")
+    config_entry = create_config_entry("test_stats", ("day", "last_hour"), statistics=True)
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    hass.states.async_set("sensor.water", "102")
+    await hass.async_block_till_done()
+    hass.states.async_set("sensor.water", "108")
+    await hass.async_block_till_done()
+
+    day = hass.states.get("sensor.test_stats_day")
+    assert day.state == "8.0"
+    assert day.attributes["state_class"] == "total"
+    deltas = day.attributes["delta_statistics"]
+    assert (deltas["count"], deltas["min"], deltas["max"], deltas["mean"]) == (2, 2, 6, 4)
+    assert day.attributes["reading_statistics"]["max"] == 108
+
+    last_hour = hass.states.get("sensor.test_stats_last_hour")
+    assert last_hour.state == "8.0"
+    assert last_hour.attributes["state_class"] == "measurement"
+
+    # the rolling sensor stops following the heartbeat
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_source_sensor_input_filter(hass, create_config_entry, freezer):
+    """Test that held back readings of a source are counted at the end of the period."""
+    tz = dt_util.DEFAULT_TIME_ZONE
+    freezer.move_to(datetime(2024, 1, 1, 23, 0, tzinfo=tz))
+    hass.states.async_set("sensor.water", "100")
+    config_entry = create_config_entry("test_filter", min_delta=5)
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    for value in ("102", "104", "108", "110"):
+        hass.states.async_set("sensor.water", value)
+        await hass.async_block_till_done()
+    # 102 and 104 are held back, 108 is 8 away from the initial 100 and 110 only 2 from 108
+    assert hass.states.get("sensor.test_filter_day").state == "8.0"
+
+    freezer.move_to(datetime(2024, 1, 2, 0, 0, 1, tzinfo=tz))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    day = hass.states.get("sensor.test_filter_day")
+    assert day.state == "0"
+    assert day.attributes["prev_period"] == 10
+    # statistics are only kept when turned on
+    assert "delta_statistics" not in day.attributes
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_source_sensor_median_at_period_end(hass, create_config_entry, freezer):
+    """Test that the last reading itself, not the lagging median, closes the period."""
+    tz = dt_util.DEFAULT_TIME_ZONE
+    freezer.move_to(datetime(2024, 1, 1, 23, 0, tzinfo=tz))
+    hass.states.async_set("sensor.water", "100")
+    config_entry = create_config_entry("test_median", median_size=3)
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    for value in ("101", "102", "103", "104"):
+        hass.states.async_set("sensor.water", value)
+        await hass.async_block_till_done()
+    # the median of 102, 103 and 104
+    assert hass.states.get("sensor.test_median_day").state == "3.0"
+
+    freezer.move_to(datetime(2024, 1, 2, 0, 0, 1, tzinfo=tz))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    day = hass.states.get("sensor.test_median_day")
+    assert day.state == "0"
+    assert day.attributes["prev_period"] == 4
+
+    # the median starts over, the next reading does not go back
+    hass.states.async_set("sensor.water", "105")
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.test_median_day").state == "1.0"
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_source_sensor_flushes_held_back_reading(hass, create_config_entry, freezer):
+    """Test that a reading held back by the minimum interval is counted once the interval has passed."""
+    tz = dt_util.DEFAULT_TIME_ZONE
+    freezer.move_to(datetime(2024, 1, 1, 12, 0, tzinfo=tz))
+    hass.states.async_set("sensor.water", "100")
+    config_entry = create_config_entry("test_flush", min_interval=60)
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    hass.states.async_set("sensor.water", "105")
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.test_flush_day").state == "5.0"
+
+    freezer.tick(10)
+    hass.states.async_set("sensor.water", "107")
+    await hass.async_block_till_done()
+    # held back, and the source does not change again
+    assert hass.states.get("sensor.test_flush_day").state == "5.0"
+
+    freezer.move_to(datetime(2024, 1, 1, 12, 1, 1, tzinfo=tz))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.test_flush_day").state == "7.0"
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_source_sensor_reads_again_at_time_window_edges(hass, create_config_entry, freezer):
+    """Test that a source sensor stops measuring when its time window closes, without new states."""
+    tz = dt_util.DEFAULT_TIME_ZONE
+    freezer.move_to(datetime(2024, 1, 1, 17, 0, tzinfo=tz))
+    hass.states.async_set("sensor.water", "100")
+    config_entry = create_config_entry("test_window", when_from="08:00:00", when_till="18:00:00")
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    hass.states.async_set("sensor.water", "104")
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.test_window_day").state == "4.0"
+
+    freezer.move_to(datetime(2024, 1, 1, 18, 0, 1, tzinfo=tz))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.test_window_day").attributes["status"] == "waiting for time window"
+
+    # used outside of the time window
+    hass.states.async_set("sensor.water", "110")
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.test_window_day").state == "4.0"
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_unavailable_source_across_period_end(hass, create_config_entry, freezer):
+    """Test that a period end without a reading of the source is not tracked again and again."""
+    tz = dt_util.DEFAULT_TIME_ZONE
+    freezer.move_to(datetime(2024, 1, 1, 23, 0, tzinfo=tz))
+    hass.states.async_set("sensor.water", "unavailable")
+    config_entry = create_config_entry("test_unavailable")
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN_DATA][config_entry.entry_id][COORDINATOR]
+    assert coordinator._rollover_boundary == datetime(2024, 1, 2, tzinfo=tz)
+
+    freezer.move_to(datetime(2024, 1, 2, 0, 0, 1, tzinfo=tz))
+    scheduler = async_get_rollover_scheduler(hass)
+    with patch.object(
+        scheduler, "async_track_boundary", wraps=scheduler.async_track_boundary
+    ) as track_boundary:
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+    # the passed period end is not tracked again
+    track_boundary.assert_not_called()
+    assert coordinator._rollover_boundary is None
+
+    # the period rolls over with the first reading
+    hass.states.async_set("sensor.water", "100")
+    await hass.async_block_till_done()
+    hass.states.async_set("sensor.water", "103")
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.test_unavailable_day").state == "3.0"
+    assert coordinator._rollover_boundary == datetime(2024, 1, 3, tzinfo=tz)
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_trace_of_restored_sensor(hass, create_config_entry, freezer):
+    """Test that the trace of a sensor restored from the last session can be dumped."""
+    tz = dt_util.DEFAULT_TIME_ZONE
+    freezer.move_to(datetime(2024, 1, 1, 12, 0, tzinfo=tz))
+    stored = MeasureItMeterStoredData(
+        state="measuring",
+        measured_value=5,
+        session_start_reading=100,
+        start_measured_value=5,
+        period_last_reset=datetime(2024, 1, 1, tzinfo=tz),
+        period_end=datetime(2024, 1, 2, tzinfo=tz),
+    )
+    mock_restore_cache_with_extra_data(
+        hass, [(State("sensor.test_restored_day", "5"), stored.as_dict())]
+    )
+    hass.states.async_set("sensor.water", "100")
+    config_entry = create_config_entry("test_restored", trace=True)
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    hass.states.async_set("sensor.water", "102")
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.test_restored_day").state == "7.0"
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        "get_trace",
+        {"entity_id": "sensor.test_restored_day"},
+        blocking=True,
+        return_response=True,
+    )
+    assert response["test_restored"][-1]["meters"] == {
+        "test_restored_day": {"state": "measuring", "measured_value": 7}
+    }
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
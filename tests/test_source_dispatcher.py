@@ -0,0 +1,69 @@
+"""Tests for MeasureIt source dispatcher class."""
+from homeassistant.core import HomeAssistant
+
+from custom_components.measureit.const import DOMAIN, SOURCE_DISPATCHER
+from custom_components.measureit.source_dispatcher import async_get_source_dispatcher
+
+
+async def test_one_tracker_for_all_subscribers(hass: HomeAssistant):
+    """Test that all subscribers of an entity receive the same parsed value."""
+    dispatcher = async_get_source_dispatcher(hass)
+    assert hass.data[DOMAIN][SOURCE_DISPATCHER] is dispatcher
+
+    readings_1 = []
+    readings_2 = []
+    unsub_1 = dispatcher.async_subscribe("sensor.gas", lambda *args: readings_1.append(args))
+    unsub_2 = dispatcher.async_subscribe("sensor.gas", lambda *args: readings_2.append(args))
+    assert dispatcher._bus_listener is not None
+
+    hass.states.async_set("sensor.gas", "12.5")
+    await hass.async_block_till_done()
+    assert readings_1 == [(12.5, None, "12.5")]
+    assert readings_2 == readings_1
+
+    hass.states.async_set("sensor.gas", "unavailable")
+    await hass.async_block_till_done()
+    value, error, state = readings_1[-1]
+    assert value is None
+    assert isinstance(error, ValueError)
+    assert state == "unavailable"
+
+    unsub_1()
+    hass.states.async_set("sensor.gas", "13")
+    await hass.async_block_till_done()
+    assert len(readings_1) == 2
+    assert readings_2[-1] == (13.0, None, "13")
+
+    # the entity is no longer tracked when the last subscriber leaves
+    unsub_2()
+    assert dispatcher._bus_listener is None
+    hass.states.async_set("sensor.gas", "14")
+    await hass.async_block_till_done()
+    assert len(readings_2) == 3
+
+
+async def test_unchanged_states_are_dropped(hass: HomeAssistant):
+    """Test that attribute-only changes and equal values are not dispatched."""
+    dispatcher = async_get_source_dispatcher(hass)
+    readings = []
+    unsub = dispatcher.async_subscribe("sensor.gas", lambda *args: readings.append(args))
+
+    hass.states.async_set("sensor.gas", "10")
+    hass.states.async_set("sensor.gas", "10", {"payload": list(range(100))})
+    hass.states.async_set("sensor.gas", "10.0")
+    hass.states.async_set("sensor.other", "11")
+    await hass.async_block_till_done()
+    assert readings == [(10.0, None, "10")]
+
+    # after an unavailable state, the same value is passed on again
+    hass.states.async_set("sensor.gas", "unavailable")
+    hass.states.async_set("sensor.gas", "10")
+    await hass.async_block_till_done()
+    assert len(readings) == 3
+    assert readings[-1] == (10.0, None, "10")
+
+    # a removed entity has no new state
+    hass.states.async_remove("sensor.gas")
+    await hass.async_block_till_done()
+    assert readings[-1][0] is None
+    unsub()
@@ -0,0 +1,145 @@
+"""Tests for the MeasureIt statistics import."""
+from datetime import datetime
+from datetime import timedelta
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.measureit.statistics_import import IMPORT_DELAY
+from custom_components.measureit.statistics_import import _last_sums
+from custom_components.measureit.statistics_import import async_get_statistics_importer
+from custom_components.measureit.statistics_import import statistic_id
+from custom_components.measureit.statistics_import import statistic_rows
+
+UTC = dt_util.UTC
+
+
+def test_statistic_id():
+    """Test that the statistic id is a valid external statistic id."""
+    assert statistic_id("Heating_Day") == "measureit:heating_day"
+
+
+def test_rows_per_hour():
+    """Test that periods are added to the hour in which they end, continuing the sum."""
+    midnight = datetime(2024, 1, 2, tzinfo=UTC)
+    periods = [
+        (3.0, midnight - timedelta(days=1), midnight),
+        (1.0, midnight, midnight + timedelta(minutes=5)),
+        (2.0, midnight + timedelta(minutes=5), midnight + timedelta(minutes=10)),
+    ]
+    assert statistic_rows(periods, 10.0) == [
+        {
+            "start": midnight - timedelta(hours=1),
+            "state": 3.0,
+            "sum": 13.0,
+            "last_reset": midnight - timedelta(days=1),
+        },
+        {
+            "start": midnight,
+            "state": 2.0,
+            "sum": 16.0,
+            "last_reset": midnight + timedelta(minutes=5),
+        },
+    ]
+
+
+async def test_import_needs_recorder(hass, caplog):
+    """Test that queued periods are imported in one batch, which needs the recorder."""
+    importer = async_get_statistics_importer(hass)
+    assert async_get_statistics_importer(hass) is importer
+
+    end = dt_util.utcnow()
+    importer.async_queue("test_day", "kWh", [(1.0, end - timedelta(days=1), end)])
+    importer.async_queue("test_week", "kWh", [(2.0, end - timedelta(days=7), end)])
+    importer.async_queue("test_day", "kWh", [])
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=IMPORT_DELAY + 1))
+    await hass.async_block_till_done()
+    assert "Cannot import the statistics of 2 sensors, the recorder is not loaded" in caplog.text
+
+
+def test_last_sums(hass):
+    """Test that the last sum of each statistic is read, without one for new statistics."""
+    last = {
+        "measureit:test_day": {"measureit:test_day": [{"sum": 12.5}]},
+        "measureit:test_week": {"measureit:test_week": [{"sum": None}]},
+        "measureit:test_month": {},
+    }
+    with patch(
+        "homeassistant.components.recorder.statistics.get_last_statistics",
+        side_effect=lambda _hass, _count, identifier, _convert, _types: last[identifier],
+    ) as get_last_statistics:
+        assert _last_sums(hass, list(last)) == {
+            "measureit:test_day": 12.5,
+            "measureit:test_week": 0.0,
+        }
+    get_last_statistics.assert_any_call(hass, 1, "measureit:test_day", True, {"sum"})
+
+
+async def test_import_continues_sums(hass):
+    """Test that queued periods are imported with their metadata, continuing the last sums."""
+    recorder = MagicMock()
+    recorder.async_add_executor_job = hass.async_add_executor_job
+    hass.config.components.add("recorder")
+    importer = async_get_statistics_importer(hass)
+    midnight = datetime(2024, 1, 2, tzinfo=UTC)
+    importer.async_queue("Test_Day", "kWh", [(3.0, midnight - timedelta(days=1), midnight)])
+    importer.async_queue("test_week", None, [(2.0, midnight - timedelta(days=7), midnight)])
+
+    with patch("homeassistant.components.recorder.get_instance", return_value=recorder), patch(
+        "homeassistant.components.recorder.statistics.get_last_statistics",
+        side_effect=lambda _hass, _count, identifier, _convert, _types: {
+            "measureit:test_day": {"measureit:test_day": [{"sum": 10.0}]}
+        }.get(identifier, {}),
+    ), patch(
+        "homeassistant.components.recorder.statistics.async_add_external_statistics"
+    ) as add_statistics:
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=IMPORT_DELAY + 1))
+        await hass.async_block_till_done()
+
+    assert add_statistics.call_count == 2
+    (_, day_metadata, day_rows), (_, week_metadata, week_rows) = (
+        call.args for call in add_statistics.call_args_list
+    )
+    assert day_metadata == {
+        "has_mean": False,
+        "has_sum": True,
+        "name": "Test_Day",
+        "source": "measureit",
+        "statistic_id": "measureit:test_day",
+        "unit_of_measurement": "kWh",
+    }
+    assert day_rows == [
+        {
+            "start": midnight - timedelta(hours=1),
+            "state": 3.0,
+            "sum": 13.0,
+            "last_reset": midnight - timedelta(days=1),
+        }
+    ]
+    assert week_metadata["statistic_id"] == "measureit:test_week"
+    assert week_metadata["unit_of_measurement"] is None
+    # a new statistic starts its sum at 0
+    assert [row["sum"] for row in week_rows] == [2.0]
+
+
+async def test_import_on_stop(hass):
+    """Test that queued periods are imported right away when Home Assistant stops."""
+    recorder = MagicMock()
+    recorder.async_add_executor_job = hass.async_add_executor_job
+    hass.config.components.add("recorder")
+    importer = async_get_statistics_importer(hass)
+    end = dt_util.utcnow()
+    importer.async_queue("test_day", "kWh", [(1.0, end - timedelta(days=1), end)])
+
+    with patch("homeassistant.components.recorder.get_instance", return_value=recorder), patch(
+        "homeassistant.components.recorder.statistics.get_last_statistics", return_value={}
+    ), patch(
+        "homeassistant.components.recorder.statistics.async_add_external_statistics"
+    ) as add_statistics:
+        hass.bus.async_fire(EVENT_HOMEASSISTANT_STOP)
+        await hass.async_block_till_done()
+    add_statistics.assert_called_once()
+    assert add_statistics.call_args.args[1]["statistic_id"] == "measureit:test_day"
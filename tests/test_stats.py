@@ -0,0 +1,76 @@
+"""Tests for MeasureIt streaming statistics."""
+
+import random
+import statistics
+
+import pytest
+from custom_components.measureit.stats import MeterStats
+from custom_components.measureit.stats import P2Quantile
+from custom_components.measureit.stats import StreamingStats
+
+
+def test_streaming_stats():
+    """Test min, max, mean and standard deviation against the statistics module."""
+    values = [3.0, 1.5, 8.25, 4.0, 4.0, 0.5, 12.0]
+    stats = StreamingStats()
+    assert stats.summary() == {
+        "count": 0,
+        "min": None,
+        "max": None,
+        "mean": None,
+        "stdev": None,
+        "p50": None,
+        "p95": None,
+    }
+    for value in values:
+        stats.add(value)
+
+    summary = stats.summary()
+    assert summary["count"] == 7
+    assert summary["min"] == 0.5
+    assert summary["max"] == 12.0
+    assert summary["mean"] == pytest.approx(statistics.fmean(values))
+    assert summary["stdev"] == pytest.approx(statistics.pstdev(values))
+    assert summary["p50"] == pytest.approx(statistics.median(values), abs=1)
+
+
+def test_quantile_few_values():
+    """Test that the quantile of less than five values is one of the values."""
+    quantile = P2Quantile(0.5)
+    assert quantile.value is None
+    for value in (5, 1, 3):
+        quantile.add(value)
+    assert quantile.value == 3
+
+
+@pytest.mark.parametrize("quantile", [0.5, 0.95])
+def test_quantile_estimate(quantile):
+    """Test the P² estimate of a large sample."""
+    rng = random.Random(42)
+    values = [rng.uniform(0, 100) for _ in range(10000)]
+    estimate = P2Quantile(quantile)
+    for value in values:
+        estimate.add(value)
+
+    exact = statistics.quantiles(values, n=100)[round(quantile * 100) - 1]
+    assert estimate.value == pytest.approx(exact, abs=1)
+
+
+def test_store_and_restore():
+    """Test that restored statistics continue where they were stored."""
+    rng = random.Random(7)
+    values = [rng.gauss(10, 2) for _ in range(200)]
+    stats = MeterStats()
+    for value in values[:100]:
+        stats.add(value, value * 2)
+
+    restored = MeterStats()
+    restored.restore(stats.as_dict())
+    for value in values[100:]:
+        stats.add(value, value * 2)
+        restored.add(value, value * 2)
+    assert restored.deltas.summary() == stats.deltas.summary()
+    assert restored.readings.summary() == stats.readings.summary()
+
+    restored.clear()
+    assert restored.deltas.count == 0
@@ -1,7 +1,10 @@
 """Tests for MeasureIt time window class."""
 
 from datetime import datetime
+from datetime import time
+from datetime import timedelta
 
+import pytest
 from homeassistant.util import dt as dt_util
 from custom_components.measureit.time_window import TimeWindow
 
@@ -84,3 +87,86 @@ def test_active_with_equal_window():
 
     fake_now = datetime(2022, 1, 2, 4, 10, tzinfo=TZ)  # monday after start TW
     assert tw.is_active(fake_now) is True
+
+
+def _legacy_is_active(tw: TimeWindow, tznow: datetime) -> bool:
+    """Return is_active as the reference implementation with time comparisons did before compiling."""
+    check_time = tznow.time()
+    if tw.start < tw.end:
+        if check_time >= tw.start and check_time <= tw.end:
+            return tznow.weekday() in tw.days
+    else:  # crosses midnight
+        if check_time >= tw.start or check_time <= tw.end:
+            if check_time < tw.start:
+                prev_weekday = 6 if tznow.weekday() == 0 else tznow.weekday() - 1
+                return prev_weekday in tw.days
+            return tznow.weekday() in tw.days
+    return False
+
+
+WINDOWS = [
+    (["0", "1", "2"], "00:00:00", "02:00:00"),
+    (["0"], "22:00:00", "04:00:00"),
+    (["6"], "22:00:00", "04:00:00"),
+    (["0", "6"], "23:59:59", "00:00:00"),
+    (["0", "1", "2"], "00:00:00", "00:00:00"),
+    (["6", "5"], "04:00:00", "04:00:00"),
+    (["0", "1", "2", "3", "4", "5", "6"], "00:00:00", "00:00:00"),
+    (["0", "1", "2", "3", "4", "5", "6"], "21:30:00", "06:15:00"),
+    (["1", "3", "5"], "08:00:00", "17:30:00"),
+    ([], "08:00:00", "17:30:00"),
+]
+
+
+def _check_moments(tw: TimeWindow):
+    """Yield moments around every edge of the window, and some in between."""
+    offsets = [timedelta(0), timedelta(microseconds=-1), timedelta(microseconds=1), timedelta(minutes=7)]
+    for day in range(3, 10):  # monday 3 jan 2022 until tuesday a week later
+        for moment in (tw.start, tw.end, time(0, 0), time(12, 0)):
+            base = datetime.combine(datetime(2022, 1, day).date(), moment, tzinfo=TZ)
+            for offset in offsets:
+                yield base + offset
+
+
+@pytest.mark.parametrize("window", WINDOWS)
+def test_compiled_window_matches_legacy(window):
+    """Test the compiled window against the original time comparisons."""
+    tw = TimeWindow(*window)
+    for tznow in _check_moments(tw):
+        assert tw.is_active(tznow) is _legacy_is_active(tw, tznow), tznow
+
+
+@pytest.mark.parametrize("window", WINDOWS)
+def test_next_transition(window):
+    """Test that next_transition returns the first moment is_active changes."""
+    tw = TimeWindow(*window)
+    for tznow in _check_moments(tw):
+        transition = tw.next_transition(tznow)
+        active = _legacy_is_active(tw, tznow)
+        if transition is None:
+            for day in range(8):
+                assert _legacy_is_active(tw, tznow + timedelta(days=day, hours=day)) is active
+            continue
+        assert transition > tznow
+        assert _legacy_is_active(tw, transition) is not active
+        assert _legacy_is_active(tw, transition - timedelta(microseconds=1)) is active
+
+
+def test_next_transition_crossing_midnight():
+    """Test next_transition for a window that crosses midnight on sunday."""
+    tw = TimeWindow(["6"], "22:00:00", "04:00:00")  # sunday
+
+    fake_now = datetime(2022, 1, 2, 21, 30, tzinfo=TZ)  # = Sunday before TW
+    assert tw.next_transition(fake_now) == datetime(2022, 1, 2, 22, 0, tzinfo=TZ)
+
+    fake_now = datetime(2022, 1, 3, 1, 30, tzinfo=TZ)  # = monday in TW of sunday
+    assert tw.next_transition(fake_now) == datetime(2022, 1, 3, 4, 0, 0, 1, tzinfo=TZ)
+
+    fake_now = datetime(2022, 1, 3, 5, 0, tzinfo=TZ)  # = monday after TW
+    assert tw.next_transition(fake_now) == datetime(2022, 1, 9, 22, 0, tzinfo=TZ)
+
+
+def test_next_transition_always_active():
+    """Test that a window that is always active has no transitions."""
+    tw = TimeWindow(["0", "1", "2", "3", "4", "5", "6"], "00:00:00", "00:00:00")
+    assert tw.next_transition(datetime(2022, 1, 3, 5, 0, tzinfo=TZ)) is None
@@ -0,0 +1,56 @@
+"""Tests for the MeasureIt trace."""
+from datetime import datetime
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.measureit.meter import MeterState
+from custom_components.measureit.trace import TraceBuffer
+
+
+def test_ring():
+    """Test that the trace keeps the newest records, oldest first."""
+    trace = TraceBuffer(3)
+    assert trace.records() == []
+    for index in range(5):
+        trace.append((float(index), str(index), float(index), None, True, True, ()))
+    assert trace.count == 5
+    assert [record[0] for record in trace.records()] == [2, 3, 4]
+
+
+def test_as_list():
+    """Test that records are only formatted when the trace is dumped."""
+    moment = datetime(2024, 1, 1, 12, 0, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    error = ValueError("Could not process value")
+    trace = TraceBuffer()
+    trace.append((moment.timestamp(), "unknown", None, error, None, None, None))
+    trace.append(
+        (
+            moment.timestamp(),
+            "12.5",
+            12.5,
+            None,
+            False,
+            True,
+            (("water_day", MeterState.WAITING_FOR_TIME_WINDOW, 2.5),),
+        )
+    )
+    assert trace.as_list() == [
+        {
+            "time": moment.isoformat(),
+            "raw": "unknown",
+            "value": None,
+            "error": "Could not process value",
+            "timewindow_active": None,
+            "template_active": None,
+            "meters": None,
+        },
+        {
+            "time": moment.isoformat(),
+            "raw": "12.5",
+            "value": 12.5,
+            "error": None,
+            "timewindow_active": False,
+            "template_active": True,
+            "meters": {"water_day": {"state": "waiting for time window", "measured_value": 2.5}},
+        },
+    ]
@@ -0,0 +1,56 @@
+"""Tests for MeasureIt util functions."""
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.template import Template
+
+from custom_components.measureit.util import compile_simple_template
+from custom_components.measureit.util import create_renderer
+
+SIMPLE_TEMPLATES = [
+    "{{ value }}",
+    "{{ value / 3600 }}",
+    "{{ (value * 0.1) | round(2) }}",
+    "{{ value * 0.1 | round(2) }}",
+    "{{ (value / 60) | int }}",
+    "{{ value | float * 2 }}",
+    "{{ (value / 3600) | round(1, 'floor') }}",
+    "{{ -value + 10 % 3 - value // 7 }}",
+    " {{ (value / 1000) | round }}\n",
+]
+
+JINJA_TEMPLATES = [
+    "{{ value | multiply(2) }}",
+    "{{ states('sensor.x') }}",
+    "{{ value ** 2 }}",
+    "{{ value }} s",
+    "{% if value > 10 %}high{% else %}low{% endif %}",
+    "{{ (value / 3600) | round(precision) }}",
+    "plain text",
+]
+
+
+@pytest.mark.parametrize("value_template", SIMPLE_TEMPLATES)
+@pytest.mark.parametrize("value", [0, 7, 3599.5, 86400, -12.345])
+async def test_native_renderer_matches_jinja(hass: HomeAssistant, value_template, value):
+    """Test that compiled templates render exactly like Jinja does."""
+    assert compile_simple_template(value_template) is not None
+    expected = Template(value_template, hass).async_render({"value": value}, parse_result=False)
+    assert create_renderer(hass, value_template)(value) == expected
+
+
+@pytest.mark.parametrize("value_template", JINJA_TEMPLATES)
+def test_other_templates_are_not_compiled(value_template):
+    """Test that templates outside of the simple subset fall back to Jinja."""
+    assert compile_simple_template(value_template) is None
+
+
+async def test_native_renderer_error(hass: HomeAssistant):
+    """Test that a failing calculation returns the input value."""
+    renderer = create_renderer(hass, "{{ 10 / value }}")
+    assert renderer(5) == "2.0"
+    assert renderer(0) == 0
+
+
+async def test_without_template(hass: HomeAssistant):
+    """Test that the value is passed through without a template."""
+    assert create_renderer(hass, None)(12.5) == 12.5